@@ -1,8 +1,18 @@
 import os
+import io
+import json
 import logging
-from flask import Flask, render_template, request, jsonify, flash
-from converters.sql_to_dax import SQLToDaxConverter
-from converters.spotfire_to_dax import SpotfireToDaxConverter
+import time
+from flask import Flask, render_template, request, jsonify, flash, url_for, g, Response
+from converters.registry import get_converter
+from converters.batch import convert_batch, summarize_results, MAX_BATCH_SIZE
+from converters.parallel import CONVERSION_CHUNK_SIZE, CONVERSION_WORKERS, PARALLEL_MIN_SIZE, convert_items_parallel
+from converters.cache import ConversionCache
+from converters.persistent_cache import open_persistent_cache
+from converters.incremental import get_incremental_converter
+from converters.jobs import JobQueue, JobQueueFull, open_job_store
+from metrics import REQUEST_SECONDS, register_cache, render_prometheus
+from compression import choose_encoding, compress, compress_chunks
 
 # Set up logging
 logging.basicConfig(level=logging.DEBUG)
@@ -10,6 +20,62 @@ logging.basicConfig(level=logging.DEBUG)
 app = Flask(__name__)
 app.secret_key = os.environ.get("SESSION_SECRET", "default_secret_key_for_development")
 
+# Results kept on disk across restarts and shared by every worker process on this host
+persistent_cache = open_persistent_cache(
+    os.environ.get("PERSISTENT_CACHE_PATH", os.path.join(app.instance_path, "conversion_cache.sqlite3")),
+    max_size=int(os.environ.get("PERSISTENT_CACHE_SIZE", "100000"))
+)
+
+# Results of repeated /convert and /validate requests, keyed by source content
+conversion_cache = ConversionCache(max_size=int(os.environ.get("CONVERSION_CACHE_SIZE", "1024")),
+                                   store=persistent_cache)
+register_cache('conversion', conversion_cache)
+if persistent_cache is not None:
+    register_cache('persistent', persistent_cache)
+
+# Background conversions; their statuses are kept in SQLite so any worker process can report them
+job_queue = JobQueue(
+    workers=int(os.environ.get("JOB_WORKERS", "2")),
+    max_queued=int(os.environ.get("JOB_QUEUE_SIZE", "64")),
+    max_finished=int(os.environ.get("JOB_RETENTION", "256")),
+    store=open_job_store(os.environ.get("JOB_STORE_PATH", os.path.join(app.instance_path, "jobs.sqlite3")),
+                         max_finished=int(os.environ.get("JOB_RETENTION", "256"))),
+    cache=conversion_cache
+)
+
+# Buffered responses smaller than this are sent uncompressed
+COMPRESS_MIN_SIZE = int(os.environ.get("COMPRESS_MIN_SIZE", "1024"))
+
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_time(response):
+    """Record request latency per endpoint for /metrics"""
+    start = g.pop('request_start', None)
+    if start is not None and request.endpoint not in (None, 'static', 'metrics'):
+        REQUEST_SECONDS.observe(time.perf_counter() - start, request.endpoint, str(response.status_code))
+    return response
+
+@app.after_request
+def compress_response(response):
+    """Compress large buffered responses with the best encoding the client accepts"""
+    # Streamed responses compress themselves; files are passed through untouched
+    if response.is_streamed or response.direct_passthrough or 'Content-Encoding' in response.headers:
+        return response
+    if response.content_length is None or response.content_length < COMPRESS_MIN_SIZE:
+        return response
+    
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+    
+    response.set_data(compress(response.get_data(), encoding))
+    response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    return response
+
 @app.route('/')
 def index():
     """Main page with the conversion interface"""
@@ -30,28 +96,46 @@ def convert_code():
                 'suggestions': ['Enter SQL or Spotfire code in the input area']
             })
         
-        # Select appropriate converter
-        if conversion_type == 'sql_to_dax':
-            converter = SQLToDaxConverter()
-        elif conversion_type == 'spotfire_to_dax':
-            converter = SpotfireToDaxConverter()
-        else:
+        # Select the shared converter for this conversion type
+        converter = get_converter(conversion_type)
+        if converter is None:
             return jsonify({
                 'success': False,
                 'error': 'Invalid conversion type',
                 'suggestions': ['Please select either SQL to DAX or Spotfire to DAX']
             })
         
-        # Perform conversion
-        result = converter.convert(source_code)
+        # Incremental mode reconverts only the statements that changed since earlier requests;
+        # large scripts use it too when there are worker processes to spread their statements over
+        if data.get('incremental') or (CONVERSION_WORKERS > 1 and len(source_code) >= PARALLEL_MIN_SIZE):
+            engine, kind = get_incremental_converter(conversion_type), 'convert-incremental'
+        else:
+            engine, kind = converter, 'convert'
         
-        return jsonify({
+        # The object inventory is a separate scan of the source; clients can skip it
+        include_objects = data.get('include_objects', True)
+        
+        # Streaming mode writes one NDJSON line per statement as soon as it is converted
+        if data.get('stream'):
+            return stream_conversion(converter, source_code, include_objects)
+        if not include_objects:
+            kind += '-without-objects'
+        
+        # Perform conversion, reusing the result of an identical earlier request
+        result = conversion_cache.get_result(
+            converter, source_code, conversion_type, kind,
+            lambda: engine.convert(source_code, include_objects=include_objects)
+        )
+        
+        response = {
             'success': True,
             'converted_code': result['dax_code'],
-            'objects_identified': result['objects'],
             'warnings': result.get('warnings', []),
             'conversion_notes': result.get('notes', [])
-        })
+        }
+        if include_objects:
+            response['objects_identified'] = result['objects']
+        return jsonify(response)
         
     except Exception as e:
         logging.error(f"Conversion error: {str(e)}")
@@ -65,6 +149,128 @@ def convert_code():
             ]
         })
 
+def stream_conversion(converter, source_code: str, include_objects: bool) -> Response:
+    """Stream a conversion as NDJSON, compressed when the client accepts gzip or br"""
+    def lines():
+        for result in converter.convert_stream(io.StringIO(source_code), include_objects):
+            yield (json.dumps(result) + '\n').encode('utf-8')
+    
+    encoding = choose_encoding(request.accept_encodings)
+    body = compress_chunks(lines(), encoding) if encoding else lines()
+    response = Response(body, mimetype='application/x-ndjson')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    # Ask buffering proxies (e.g. nginx) to pass lines through as they are written
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@app.route('/convert/batch', methods=['POST'])
+def convert_batch_code():
+    """Convert a list of SQL or Spotfire scripts to DAX in one request"""
+    try:
+        data = request.get_json()
+        items = data.get('items') if isinstance(data, dict) else None
+        
+        if not isinstance(items, list) or not items:
+            return jsonify({
+                'success': False,
+                'error': 'Please provide a non-empty list of items to convert',
+                'suggestions': ['Send {"items": [{"id": ..., "source_code": ..., "conversion_type": ...}]}']
+            })
+        
+        if len(items) > MAX_BATCH_SIZE:
+            return jsonify({
+                'success': False,
+                'error': f'Batch too large: {len(items)} items (maximum is {MAX_BATCH_SIZE})',
+                'suggestions': ['Split the batch into smaller requests']
+            })
+        
+        # Failed items are reported per item and do not abort the batch
+        if CONVERSION_WORKERS > 1:
+            results = convert_items_parallel(items, CONVERSION_WORKERS, CONVERSION_CHUNK_SIZE)
+        else:
+            results = convert_batch(items)
+        
+        return jsonify({
+            'success': True,
+            'results': results,
+            'summary': summarize_results(results)
+        })
+        
+    except Exception as e:
+        logging.error(f"Batch conversion error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': f'Batch conversion failed: {str(e)}',
+            'suggestions': ['Check that the request body is valid JSON']
+        })
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """Queue a long-running conversion and return its job id immediately"""
+    try:
+        data = request.get_json()
+        source_code = data.get('source_code', '').strip()
+        conversion_type = data.get('conversion_type', 'sql_to_dax')
+        
+        if not source_code:
+            return jsonify({
+                'success': False,
+                'error': 'Please provide source code to convert',
+                'suggestions': ['Enter SQL or Spotfire code in the input area']
+            })
+        
+        if get_converter(conversion_type) is None:
+            return jsonify({
+                'success': False,
+                'error': 'Invalid conversion type',
+                'suggestions': ['Please select either SQL to DAX or Spotfire to DAX']
+            })
+        
+        # Reject instead of blocking the request worker when the queue is full
+        try:
+            job = job_queue.submit(source_code, conversion_type, data.get('include_objects', True))
+        except JobQueueFull as e:
+            response = jsonify({
+                'success': False,
+                'error': str(e),
+                'suggestions': ['Retry after a few seconds']
+            })
+            response.headers['Retry-After'] = '5'
+            return response, 429
+        
+        status_url = url_for('get_job', job_id=job.id)
+        response = jsonify({
+            'success': True,
+            'job_id': job.id,
+            'status': job.status,
+            'status_url': status_url
+        })
+        response.headers['Location'] = status_url
+        return response, 202
+        
+    except Exception as e:
+        logging.error(f"Job submission error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': f'Job submission failed: {str(e)}',
+            'suggestions': ['Check that the request body is valid JSON']
+        })
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Report a job's progress and, once finished, its result"""
+    job = job_queue.status(job_id)
+    if job is None:
+        return jsonify({
+            'success': False,
+            'error': 'Job not found',
+            'suggestions': ['Finished jobs are kept for a limited time; submit the conversion again']
+        }), 404
+    
+    return jsonify(dict(job, success=True))
+
 @app.route('/validate', methods=['POST'])
 def validate_code():
     """Validate source code before conversion"""
@@ -80,20 +286,29 @@ def validate_code():
                 'suggestions': ['Enter SQL or Spotfire code to validate']
             })
         
-        # Select appropriate converter for validation
-        if conversion_type == 'sql_to_dax':
-            converter = SQLToDaxConverter()
-        elif conversion_type == 'spotfire_to_dax':
-            converter = SpotfireToDaxConverter()
-        else:
+        # Select the shared converter for validation
+        converter = get_converter(conversion_type)
+        if converter is None:
             return jsonify({
                 'valid': False,
                 'errors': ['Invalid conversion type'],
                 'suggestions': ['Select a valid conversion type']
             })
         
-        # Validate the code
-        validation_result = converter.validate(source_code)
+        # Quick mode only checks structure, for as-you-type validation; incremental mode
+        # revalidates only the statements that changed since earlier requests
+        if data.get('mode', 'full') == 'quick':
+            kind, validate = 'validate-quick', lambda: converter.validate(source_code, quick=True)
+        elif data.get('incremental'):
+            engine = get_incremental_converter(conversion_type)
+            kind, validate = 'validate-incremental', lambda: engine.validate(source_code)
+        else:
+            kind, validate = 'validate', lambda: converter.validate(source_code)
+        
+        # Validate the code, reusing the result of an identical earlier request
+        validation_result = conversion_cache.get_result(
+            converter, source_code, conversion_type, kind, validate
+        )
         
         return jsonify(validation_result)
         
@@ -105,5 +320,10 @@ def validate_code():
             'suggestions': ['Check code syntax and try again']
         })
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Expose stage latencies, input sizes, cache hit rates and error counts for Prometheus"""
+    return Response(render_prometheus(), mimetype='text/plain; version=0.0.4')
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)
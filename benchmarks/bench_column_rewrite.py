@@ -0,0 +1,73 @@
+"""Benchmark the single-pass SQL column-reference rewrite against the previous implementation.
+
+The previous rewrite searched the whole expression for every identifier, so its cost per
+identifier grows with expression length; the single pass should stay flat.
+
+Run from the repository root:
+
+    python benchmarks/bench_column_rewrite.py
+"""
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from converters.sql_to_dax import SQLToDaxConverter
+
+
+def legacy_convert_column_references(dax_expr, table_name):
+    """Previous implementation: two regex passes, whole-expression search per identifier"""
+    table_column_pattern = r'\b([a-zA-Z_][a-zA-Z0-9_]*\.[a-zA-Z_][a-zA-Z0-9_]*)\b'
+    def replace_table_column(match):
+        table_ref, column_ref = match.group(1).split('.')
+        return f'{table_name}[{column_ref}]'
+
+    dax_expr = re.sub(table_column_pattern, replace_table_column, dax_expr)
+
+    column_pattern = r'\b([a-zA-Z_][a-zA-Z0-9_]*)\b'
+    def replace_column(match):
+        column = match.group(1)
+        if column.upper() in ['AND', 'OR', 'NOT', 'CASE', 'WHEN', 'THEN', 'ELSE', 'END',
+                              'TRUE', 'FALSE', 'NULL', 'SUM', 'COUNT', 'AVG', 'MIN', 'MAX',
+                              'DATE', 'TIME', 'YEAR', 'MONTH', 'DAY', 'HOUR', 'MINUTE', 'SECOND',
+                              'IS', 'AS', 'IN', 'EXISTS', 'BETWEEN', 'LIKE', 'DISTINCT']:
+            return column
+        if column.isdigit():
+            return column
+        if '[' in dax_expr and ']' in dax_expr:
+            if f'[{column}]' in dax_expr:
+                return column
+        return f'{table_name}[{column}]'
+
+    return re.sub(column_pattern, replace_column, dax_expr)
+
+
+def build_expression(identifiers):
+    """Build a long arithmetic expression with distinct plain and qualified column references"""
+    parts = []
+    for index in range(identifiers):
+        parts.append(f"t.col_{index}" if index % 2 else f"col_{index}")
+    return ' + '.join(parts)
+
+
+def run(sizes=(100, 1000, 5000, 10000), repeat=3):
+    converter = SQLToDaxConverter()
+    for identifiers in sizes:
+        expression = build_expression(identifiers)
+        number = max(1, 20000 // identifiers)
+        legacy = min(timeit.repeat(
+            lambda: legacy_convert_column_references(expression, 'Sales'),
+            number=number, repeat=repeat)) / number
+        single = min(timeit.repeat(
+            lambda: converter._convert_column_references(expression, 'Sales'),
+            number=number, repeat=repeat)) / number
+        print(f"identifiers={identifiers:<6} chars={len(expression):<7} "
+              f"legacy={legacy * 1e3:9.2f}ms ({legacy / identifiers * 1e6:7.2f}us/id) "
+              f"single-pass={single * 1e3:8.2f}ms ({single / identifiers * 1e6:5.2f}us/id) "
+              f"speedup={legacy / single:6.1f}x")
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,55 @@
+"""Benchmark single-pass function-name mapping against the per-mapping regex loop.
+
+Run from the repository root:
+
+    python benchmarks/bench_function_mapping.py
+"""
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from converters.sql_to_dax import SQLToDaxConverter
+from converters.spotfire_to_dax import SpotfireToDaxConverter
+
+
+def legacy_convert_function_calls(function_mappings, expression):
+    """Previous implementation: one pattern build and full scan per mapping entry"""
+    for source_func, dax_func in function_mappings.items():
+        pattern = rf'\b{source_func}\s*\('
+        expression = re.sub(pattern, f'{dax_func}(', expression, flags=re.IGNORECASE)
+    return expression
+
+
+def build_expression(function_names, terms):
+    """Build a long expression calling the given functions in rotation"""
+    parts = []
+    for index in range(terms):
+        name = function_names[index % len(function_names)]
+        parts.append(f"{name}(col_{index})")
+    return ' + '.join(parts)
+
+
+def run(converter, label, terms_list=(10, 100, 1000), repeat=5):
+    names = list(converter.function_mappings)
+    for terms in terms_list:
+        expression = build_expression(names, terms)
+        assert (converter.convert_function_calls(expression) ==
+                legacy_convert_function_calls(converter.function_mappings, expression))
+        number = max(1, 2000 // terms)
+        legacy = min(timeit.repeat(
+            lambda: legacy_convert_function_calls(converter.function_mappings, expression),
+            number=number, repeat=repeat)) / number
+        single = min(timeit.repeat(
+            lambda: converter.convert_function_calls(expression),
+            number=number, repeat=repeat)) / number
+        print(f"{label:<9} terms={terms:<5} chars={len(expression):<7} "
+              f"legacy={legacy * 1e6:10.1f}us single-pass={single * 1e6:10.1f}us "
+              f"speedup={legacy / single:5.1f}x")
+
+
+if __name__ == '__main__':
+    run(SQLToDaxConverter(), 'sql')
+    run(SpotfireToDaxConverter(), 'spotfire')
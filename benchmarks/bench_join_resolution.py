@@ -0,0 +1,79 @@
+"""Benchmark JOIN conversion against a large model's relationship graph.
+
+Builds a snowflake-shaped model of several hundred tables and converts queries with
+many joins, first with an empty path cache and then with the memoized paths.
+
+Run from the repository root:
+
+    python benchmarks/bench_join_resolution.py
+"""
+import os
+import random
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from converters.relationships import Relationship
+from converters.schema import SchemaIndex
+from converters.sql_to_dax import SQLToDaxConverter
+
+
+def build_schema(table_count):
+    """Each table Ti has key Ki and value Vi, and a many-to-one relationship from Pi to its parent's key"""
+    tables = {f'T{index}': [f'K{index}', f'V{index}', f'P{index}'] for index in range(table_count)}
+    relationships = [
+        Relationship(f'T{index}', f'P{index}', f'T{(index - 1) // 2}', f'K{(index - 1) // 2}')
+        for index in range(1, table_count)
+    ]
+    return SchemaIndex(tables, relationships)
+
+
+def build_queries(table_count, joins, count, seed=1):
+    """Random chains of joins along the relationships, half selecting columns and half aggregating"""
+    generator = random.Random(seed)
+    queries = []
+    for number in range(count):
+        chain = [generator.randrange(table_count // 2, table_count)]
+        while len(chain) <= joins and chain[-1] > 0:
+            chain.append((chain[-1] - 1) // 2)
+        clauses = ' '.join(
+            f'INNER JOIN T{table} t{step} ON t{step - 1}.P{chain[step - 1]} = t{step}.K{table}'
+            for step, table in enumerate(chain[1:], 1)
+        )
+        if number % 2:
+            select = 'SUM(t0.V{}) AS Total'.format(chain[0])
+        else:
+            select = ', '.join(f't{step}.V{table}' for step, table in enumerate(chain))
+        queries.append(f'SELECT {select} FROM T{chain[0]} t0 {clauses}')
+    return queries
+
+
+def run(table_counts=(100, 300, 1000), joins=20, count=50, repeat=5):
+    for table_count in table_counts:
+        queries = build_queries(table_count, joins, count)
+        parsed = [SQLToDaxConverter().parse_code(query) for query in queries]
+
+        def convert_all(converter):
+            for parsed_code in parsed:
+                converter.convert_to_dax(parsed_code)
+
+        # A new schema per run starts with no memoized paths
+        cold_times = []
+        for _ in range(repeat):
+            converter = SQLToDaxConverter(build_schema(table_count))
+            start = time.perf_counter()
+            convert_all(converter)
+            cold_times.append(time.perf_counter() - start)
+        cold = min(cold_times) / count
+        converter = SQLToDaxConverter(build_schema(table_count))
+        convert_all(converter)
+        warm = min(timeit.repeat(lambda: convert_all(converter), number=1, repeat=repeat)) / count
+        build = min(timeit.repeat(lambda: build_schema(table_count), number=1, repeat=repeat))
+        print(f"tables={table_count:<5} joins<={joins:<3} schema-build={build * 1e3:8.2f}ms "
+              f"cold={cold * 1e3:7.3f}ms/query warm={warm * 1e3:7.3f}ms/query")
+
+
+if __name__ == '__main__':
+    run()
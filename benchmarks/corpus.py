@@ -0,0 +1,141 @@
+"""Synthetic SQL and Spotfire workloads of controlled size and complexity.
+
+Every generator is deterministic for a given seed, so runs on different commits
+convert exactly the same input.
+"""
+import random
+from typing import Dict, List, Any
+
+TABLES = ['Sales', 'Orders', 'Customers', 'Products', 'Regions', 'Stores', 'Employees', 'Returns']
+AGGREGATES = ['SUM', 'AVG', 'MIN', 'MAX', 'COUNT']
+SCALAR_FUNCTIONS = ['UPPER', 'LOWER', 'LEN', 'ROUND', 'ABS', 'ISNULL', 'COALESCE']
+SPOTFIRE_AGGREGATES = ['Sum', 'Avg', 'Min', 'Max', 'Count', 'Median']
+SPOTFIRE_AXES = ['[Region]', '[Year]', '[Category]', 'AllPrevious([Month])', 'Intersect([Region], [Year])']
+
+
+def _column(rng: random.Random) -> str:
+    return f"col_{rng.randint(0, 199)}"
+
+
+def _sql_select_item(rng: random.Random, index: int) -> str:
+    kind = rng.randrange(4)
+    if kind == 0:
+        return _column(rng)
+    if kind == 1:
+        return f"{rng.choice(AGGREGATES)}({_column(rng)}) AS agg_{index}"
+    if kind == 2:
+        function = rng.choice(SCALAR_FUNCTIONS)
+        if function in ('ISNULL', 'COALESCE'):
+            return f"{function}({_column(rng)}, 0) AS fn_{index}"
+        if function == 'ROUND':
+            return f"ROUND({_column(rng)}, 2) AS fn_{index}"
+        return f"{function}({_column(rng)}) AS fn_{index}"
+    return f"{_column(rng)} * {_column(rng)} + {rng.randint(1, 100)} AS expr_{index}"
+
+
+def wide_select(columns: int, seed: int = 0) -> str:
+    """One SELECT with a long list of plain, aggregated and computed columns"""
+    rng = random.Random(seed)
+    items = ',\n    '.join(_sql_select_item(rng, index) for index in range(columns))
+    return (f"SELECT\n    {items}\nFROM Sales\n"
+            f"WHERE {_column(rng)} IS NOT NULL AND {_column(rng)} > 10\n"
+            f"GROUP BY {_column(rng)}, {_column(rng)}")
+
+
+def deep_case(depth: int, seed: int = 0) -> str:
+    """One SELECT whose column is a CASE expression nested depth levels deep"""
+    rng = random.Random(seed)
+    expression = f"'level_{depth}'"
+    for level in range(depth, 0, -1):
+        expression = (f"CASE WHEN {_column(rng)} > {level} THEN 'level_{level}' "
+                      f"ELSE {expression} END")
+    return f"SELECT customer_id, {expression} AS segment FROM Customers"
+
+
+def many_joins(joins: int, seed: int = 0) -> str:
+    """One SELECT joining a chain of tables"""
+    rng = random.Random(seed)
+    lines = ["SELECT t0.id, SUM(t0.amount) AS total", "FROM Sales t0"]
+    for index in range(1, joins + 1):
+        join_type = rng.choice(['INNER JOIN', 'LEFT JOIN', 'JOIN'])
+        table = f"{rng.choice(TABLES)}_{index}"
+        lines.append(f"{join_type} {table} t{index} ON t{index - 1}.key_{index} = t{index}.key_{index}")
+    lines.append("WHERE t0.amount > 0")
+    lines.append("GROUP BY t0.id")
+    return '\n'.join(lines)
+
+
+def sql_script(statements: int, seed: int = 0) -> str:
+    """A script mixing many small statements of every shape"""
+    rng = random.Random(seed)
+    parts = []
+    for index in range(statements):
+        kind = rng.randrange(4)
+        if kind == 0:
+            parts.append(wide_select(rng.randint(3, 12), seed + index))
+        elif kind == 1:
+            parts.append(deep_case(rng.randint(1, 4), seed + index))
+        elif kind == 2:
+            parts.append(many_joins(rng.randint(1, 4), seed + index))
+        else:
+            table = rng.choice(TABLES)
+            parts.append(f"SELECT {rng.choice(AGGREGATES)}({_column(rng)}) AS total_{index} FROM {table}")
+    return ';\n\n'.join(parts) + ';'
+
+
+def spotfire_over(expressions: int, seed: int = 0) -> str:
+    """Many aggregation expressions with OVER clauses, one per line"""
+    rng = random.Random(seed)
+    lines = []
+    for _ in range(expressions):
+        aggregate = rng.choice(SPOTFIRE_AGGREGATES)
+        lines.append(f"{aggregate}([{rng.choice(TABLES)}_{rng.randint(0, 50)}]) OVER ({rng.choice(SPOTFIRE_AXES)})")
+    return '\n'.join(lines)
+
+
+def spotfire_case(depth: int, seed: int = 0) -> str:
+    """One Spotfire Case expression with depth When branches"""
+    rng = random.Random(seed)
+    branches = ' '.join(f'When [Score] > {rng.randint(0, 1000)} Then "band_{level}"' for level in range(depth))
+    return f'Case {branches} Else "other" End'
+
+
+def spotfire_mixed(expressions: int, seed: int = 0) -> str:
+    """Aggregations, conditionals and calculations in rotation"""
+    rng = random.Random(seed)
+    lines = []
+    for index in range(expressions):
+        kind = index % 3
+        if kind == 0:
+            lines.append(f"Sum([Amount_{rng.randint(0, 20)}]) OVER ([Region])")
+        elif kind == 1:
+            lines.append(f'If([Amount] > {rng.randint(0, 100)}, "high", "low")')
+        else:
+            lines.append(f"Round([Price] * [Quantity] / {rng.randint(1, 9)}, 2)")
+    return '\n'.join(lines)
+
+
+# Named workloads per scale; sizes grow roughly tenfold between scales
+SCALES = {
+    'small': {'columns': 20, 'depth': 5, 'joins': 3, 'statements': 20, 'expressions': 100},
+    'medium': {'columns': 200, 'depth': 20, 'joins': 15, 'statements': 200, 'expressions': 1000},
+    'large': {'columns': 1000, 'depth': 50, 'joins': 40, 'statements': 2000, 'expressions': 5000}
+}
+
+
+def build_corpus(scale: str = 'small', seed: int = 0) -> List[Dict[str, Any]]:
+    """Return the workloads for a scale as dicts with name, conversion_type, source_code and size"""
+    sizes = SCALES[scale]
+    workloads = [
+        ('sql_wide_select', 'sql_to_dax', wide_select(sizes['columns'], seed)),
+        ('sql_deep_case', 'sql_to_dax', deep_case(sizes['depth'], seed)),
+        ('sql_many_joins', 'sql_to_dax', many_joins(sizes['joins'], seed)),
+        ('sql_script', 'sql_to_dax', sql_script(sizes['statements'], seed)),
+        ('spotfire_over', 'spotfire_to_dax', spotfire_over(sizes['expressions'], seed)),
+        ('spotfire_case', 'spotfire_to_dax', spotfire_case(sizes['depth'], seed)),
+        ('spotfire_mixed', 'spotfire_to_dax', spotfire_mixed(sizes['expressions'], seed))
+    ]
+    return [
+        {'name': name, 'conversion_type': conversion_type, 'source_code': source, 'bytes': len(source.encode('utf-8'))}
+        for name, conversion_type, source in workloads
+    ]
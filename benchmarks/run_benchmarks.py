@@ -0,0 +1,204 @@
+"""Benchmark the converters, validators and Flask endpoints on a synthetic corpus.
+
+Run from the repository root:
+
+    python benchmarks/run_benchmarks.py --scale medium
+    python benchmarks/run_benchmarks.py --scale medium --compare benchmarks/results/<previous>.json
+
+Each workload from benchmarks/corpus.py is timed for every operation with all caches
+cleared before each iteration, so the numbers measure real parsing and conversion work.
+The app's persistent cache is pointed at a scratch file, leaving the shared one untouched.
+Results (throughput, p50/p99 latency, peak traced memory) are written as JSON under
+benchmarks/results/ unless --output is given.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Dict, List, Any, Callable, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from corpus import SCALES, build_corpus
+from converters.registry import get_converter
+from converters.incremental import chunk_cache
+
+OPERATIONS = ['convert', 'validate', 'validate_quick', 'http_convert', 'http_validate']
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of a list of values"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_operation(operation: str, workload: Dict[str, Any], client) -> Callable[[], Any]:
+    """Return a zero-argument callable performing one operation on the workload"""
+    converter = get_converter(workload['conversion_type'])
+    source_code = workload['source_code']
+    body = {'source_code': source_code, 'conversion_type': workload['conversion_type']}
+
+    if operation == 'convert':
+        return lambda: converter.convert(source_code)
+    if operation == 'validate':
+        return lambda: converter.validate(source_code)
+    if operation == 'validate_quick':
+        return lambda: converter.validate(source_code, quick=True)
+    if operation == 'http_convert':
+        return lambda: client.post('/convert', json=body)
+    if operation == 'http_validate':
+        return lambda: client.post('/validate', json=body)
+    raise ValueError(f"Unknown operation: {operation}")
+
+
+def clear_caches(conversion_cache) -> None:
+    """Drop cached parses and results so every iteration does the full work"""
+    for conversion_type in ('sql_to_dax', 'spotfire_to_dax'):
+        get_converter(conversion_type).parse_cache.clear()
+    chunk_cache.clear()
+    # The app's persistent store is a scratch file here (see run_benchmarks)
+    conversion_cache.clear(persistent=True)
+
+
+def measure(run: Callable[[], Any], iterations: int, warmup: int, conversion_cache) -> Dict[str, Any]:
+    """Time iterations of an operation, then trace one more run for peak memory"""
+    for _ in range(warmup):
+        clear_caches(conversion_cache)
+        run()
+
+    latencies = []
+    for _ in range(iterations):
+        clear_caches(conversion_cache)
+        start = time.perf_counter()
+        run()
+        latencies.append(time.perf_counter() - start)
+
+    # Traced separately because tracemalloc slows down the timed runs
+    clear_caches(conversion_cache)
+    tracemalloc.start()
+    try:
+        run()
+        peak_memory = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'iterations': iterations,
+        'p50_ms': percentile(latencies, 0.50) * 1e3,
+        'p99_ms': percentile(latencies, 0.99) * 1e3,
+        'mean_ms': sum(latencies) / len(latencies) * 1e3,
+        'min_ms': min(latencies) * 1e3,
+        'ops_per_second': len(latencies) / sum(latencies),
+        'peak_memory_bytes': peak_memory
+    }
+
+
+def run_benchmarks(scale: str, seed: int, iterations: int, warmup: int, operations: List[str],
+                   workload_names: Optional[List[str]] = None) -> Dict[str, Any]:
+    # Every iteration empties the persistent cache, so point the app at a scratch file
+    # instead of the shared one under instance/
+    scratch_dir = tempfile.TemporaryDirectory()
+    os.environ['PERSISTENT_CACHE_PATH'] = os.path.join(scratch_dir.name, 'conversion_cache.sqlite3')
+    import app as app_module
+
+    client = app_module.app.test_client()
+    results = []
+    for workload in build_corpus(scale, seed):
+        if workload_names and workload['name'] not in workload_names:
+            continue
+        for operation in operations:
+            stats = measure(build_operation(operation, workload, client), iterations, warmup,
+                            app_module.conversion_cache)
+            stats.update(
+                workload=workload['name'],
+                operation=operation,
+                conversion_type=workload['conversion_type'],
+                input_bytes=workload['bytes'],
+                throughput_mb_per_second=workload['bytes'] * stats['ops_per_second'] / 1e6
+            )
+            results.append(stats)
+            print(f"{workload['name']:<16} {operation:<15} {workload['bytes']:>9}B "
+                  f"p50={stats['p50_ms']:9.2f}ms p99={stats['p99_ms']:9.2f}ms "
+                  f"{stats['throughput_mb_per_second']:7.2f}MB/s "
+                  f"peak={stats['peak_memory_bytes'] / 1e6:7.2f}MB", file=sys.stderr)
+
+    return {
+        'metadata': {
+            'commit': git_commit(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'scale': scale,
+            'seed': seed,
+            'iterations': iterations,
+            'warmup': warmup
+        },
+        'results': results
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    """Print the p50 latency change of each case against a baseline run"""
+    previous = {(result['workload'], result['operation']): result for result in baseline['results']}
+    print(f"Compared with {baseline['metadata'].get('commit')} ({baseline['metadata'].get('timestamp')}):")
+    for result in current['results']:
+        before = previous.get((result['workload'], result['operation']))
+        if before is None:
+            continue
+        change = (result['p50_ms'] - before['p50_ms']) / before['p50_ms'] * 100 if before['p50_ms'] else 0.0
+        print(f"  {result['workload']:<16} {result['operation']:<15} "
+              f"p50 {before['p50_ms']:9.2f}ms -> {result['p50_ms']:9.2f}ms ({change:+6.1f}%)")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark SQL/Spotfire to DAX conversion')
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small', help='Workload size (default: small)')
+    parser.add_argument('--seed', type=int, default=0, help='Corpus generator seed (default: 0)')
+    parser.add_argument('--iterations', type=int, default=20, help='Timed runs per case (default: 20)')
+    parser.add_argument('--warmup', type=int, default=2, help='Untimed runs per case (default: 2)')
+    parser.add_argument('--operations', nargs='+', choices=OPERATIONS, default=OPERATIONS,
+                        help='Operations to time (default: all)')
+    parser.add_argument('--workloads', nargs='+', help='Only run these workloads (default: all)')
+    parser.add_argument('--output', help='Results JSON path (default: benchmarks/results/<commit>-<scale>.json)')
+    parser.add_argument('--compare', help='Earlier results JSON to compare against')
+    args = parser.parse_args(argv)
+
+    # The app logs at DEBUG; keep benchmark output readable
+    logging.disable(logging.WARNING)
+
+    report = run_benchmarks(args.scale, args.seed, max(1, args.iterations), max(0, args.warmup),
+                            args.operations, args.workloads)
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{report['metadata']['commit'] or 'unknown'}-{args.scale}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as output_file:
+        json.dump(report, output_file, indent=2)
+    print(f"Results written to {output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as baseline_file:
+            compare(report, json.load(baseline_file))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,257 @@
+"""Command-line interface for the SQL/Spotfire to DAX converters.
+
+Usage:
+    python cli.py convert SOURCE_DIR --out OUTPUT_DIR [--workers N] [--force]
+    python cli.py stream [INPUT] [-o OUTPUT] [--type sql_to_dax|spotfire_to_dax] [--jsonl]
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+from typing import Dict, List, Any, Optional
+from converters.batch import convert_item
+from converters.parallel import default_workers, get_executor, resolve_chunk_size
+from converters.registry import CONVERTER_CLASSES, get_converter
+
+SQL_EXTENSIONS = ['.sql']
+SPOTFIRE_EXTENSIONS = ['.spotfire', '.expr']
+SUMMARY_FILENAME = 'conversion_summary.json'
+
+
+def _open_input(path: str):
+    if path == '-':
+        return sys.stdin
+    return open(path, 'r', encoding='utf-8', errors='replace')
+
+
+def _open_output(path: str):
+    if path == '-':
+        return sys.stdout
+    return open(path, 'w', encoding='utf-8')
+
+
+def _find_source_files(source_dir: str, extensions: Dict[str, str]) -> List[Dict[str, str]]:
+    """Walk the source tree and pair each convertible file with its conversion type"""
+    files = []
+    for root, dirs, filenames in os.walk(source_dir):
+        dirs.sort()
+        for filename in sorted(filenames):
+            conversion_type = extensions.get(os.path.splitext(filename)[1].lower())
+            if conversion_type:
+                path = os.path.join(root, filename)
+                files.append({
+                    'source': path,
+                    'relative': os.path.relpath(path, source_dir),
+                    'conversion_type': conversion_type
+                })
+    return files
+
+
+def _output_paths(source_files: List[Dict[str, str]], out_dir: str) -> List[str]:
+    """Map each source to OUTPUT_DIR/<relative path>.dax, replacing its extension.
+
+    Sources that would share an output (a.sql and a.expr) keep their extension instead
+    (a.sql.dax and a.expr.dax), so one conversion does not overwrite the other.
+    """
+    stems = [os.path.splitext(source_file['relative'])[0] for source_file in source_files]
+    counts = {}
+    for stem in stems:
+        # Compared without case, since the output directory may be on a case-insensitive file system
+        counts[stem.lower()] = counts.get(stem.lower(), 0) + 1
+    return [
+        os.path.join(out_dir, (stem if counts[stem.lower()] == 1 else source_file['relative']) + '.dax')
+        for source_file, stem in zip(source_files, stems)
+    ]
+
+
+def _read_summary(path: str) -> Dict[str, Dict[str, Any]]:
+    """Return the file entries of a previous run's summary by output path, or nothing if there is none"""
+    try:
+        with open(path, 'r', encoding='utf-8') as summary_file:
+            files = json.load(summary_file).get('files', [])
+    except (OSError, ValueError, AttributeError):
+        return {}
+    return {entry['output']: entry for entry in files if isinstance(entry, dict) and 'output' in entry}
+
+
+def _is_up_to_date(source: str, output: str, previous: Optional[Dict[str, Any]], version: str) -> bool:
+    """Whether the output is newer than the source and was written by this converter version and schema"""
+    return (previous is not None and previous.get('version') == version
+            and previous.get('status') in ('converted', 'skipped')
+            and os.path.exists(output) and os.path.getmtime(output) >= os.path.getmtime(source))
+
+
+def convert_file(task: Dict[str, str]) -> Dict[str, Any]:
+    """Convert one source file and write its .dax output (runs in worker processes)"""
+    summary = {
+        'source': task['source'],
+        'output': task['output'],
+        'conversion_type': task['conversion_type'],
+        # Outputs of another converter version (or schema) are reconverted by the next run
+        'version': get_converter(task['conversion_type']).version
+    }
+    try:
+        with open(task['source'], 'r', encoding='utf-8', errors='replace') as source_file:
+            source_code = source_file.read()
+    except OSError as e:
+        summary.update(status='failed', error=f'Could not read source: {e}')
+        return summary
+
+    result = convert_item({
+        'id': task['relative'],
+        'source_code': source_code,
+        'conversion_type': task['conversion_type'],
+        # Only the DAX is written, so skip the object inventory
+        'include_objects': False
+    })
+    if not result['success']:
+        summary.update(status='failed', error=result['error'])
+        return summary
+
+    try:
+        os.makedirs(os.path.dirname(task['output']) or '.', exist_ok=True)
+        with open(task['output'], 'w', encoding='utf-8') as output_file:
+            output_file.write(result['converted_code'] + '\n')
+    except OSError as e:
+        summary.update(status='failed', error=f'Could not write output: {e}')
+        return summary
+
+    summary.update(status='converted', warnings=result['warnings'], notes=result['conversion_notes'])
+    return summary
+
+
+def convert_command(args: argparse.Namespace) -> int:
+    """Convert every .sql and Spotfire expression file under a directory to .dax files"""
+    if not os.path.isdir(args.source_dir):
+        print(f"Source directory not found: {args.source_dir}", file=sys.stderr)
+        return 2
+
+    extensions = {ext.lower(): 'sql_to_dax' for ext in args.sql_ext}
+    extensions.update({ext.lower(): 'spotfire_to_dax' for ext in args.spotfire_ext})
+
+    summary_path = args.summary or os.path.join(args.out, SUMMARY_FILENAME)
+    # Versions, warnings and notes of the outputs written by earlier runs
+    previous_results = {} if args.force else _read_summary(summary_path)
+
+    results = []
+    tasks = []
+    source_files = _find_source_files(args.source_dir, extensions)
+    for source_file, output in zip(source_files, _output_paths(source_files, args.out)):
+        previous = previous_results.get(output)
+        version = get_converter(source_file['conversion_type']).version
+        if _is_up_to_date(source_file['source'], output, previous, version):
+            results.append({
+                'source': source_file['source'],
+                'output': output,
+                'conversion_type': source_file['conversion_type'],
+                'version': version,
+                'status': 'skipped',
+                'warnings': previous.get('warnings', []),
+                'notes': previous.get('notes', [])
+            })
+            continue
+        tasks.append(dict(source_file, output=output))
+
+    workers = max(1, min(args.workers or default_workers(), len(tasks) or 1))
+    if workers > 1:
+        chunk_size = resolve_chunk_size(len(tasks), workers, args.chunk_size)
+        results.extend(get_executor(workers).map(convert_file, tasks, chunksize=chunk_size))
+    else:
+        results.extend(convert_file(task) for task in tasks)
+
+    results.sort(key=lambda result: result['source'])
+    counts = {status: sum(1 for result in results if result['status'] == status)
+              for status in ('converted', 'skipped', 'failed')}
+    summary = dict(counts, total=len(results), files=results)
+
+    os.makedirs(os.path.dirname(summary_path) or '.', exist_ok=True)
+    with open(summary_path, 'w', encoding='utf-8') as summary_file:
+        json.dump(summary, summary_file, indent=2)
+
+    for result in results:
+        if result['status'] == 'failed':
+            print(f"{result['source']}: {result['error']}", file=sys.stderr)
+    print(f"{counts['converted']} converted, {counts['skipped']} up to date, "
+          f"{counts['failed']} failed (summary: {summary_path})", file=sys.stderr)
+
+    return 1 if counts['failed'] else 0
+
+
+def stream_command(args: argparse.Namespace) -> int:
+    """Convert a file or stdin statement by statement, writing DAX as it is produced"""
+    converter = get_converter(args.type)
+    failures = 0
+
+    source = _open_input(args.input)
+    output = _open_output(args.output)
+    try:
+        first = True
+        # Objects only appear in JSON Lines output
+        for result in converter.convert_stream(source, include_objects=args.jsonl):
+            if not result['success']:
+                failures += 1
+                print(f"Statement {result['index'] + 1}: {result['error']}", file=sys.stderr)
+
+            if args.jsonl:
+                output.write(json.dumps(result) + '\n')
+            elif result['success'] and result['dax_code']:
+                if not first:
+                    output.write('\n\n')
+                output.write(result['dax_code'])
+                first = False
+
+        if not args.jsonl and not first:
+            output.write('\n')
+        output.flush()
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+
+    return 1 if failures else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='sqldax', description='Convert SQL and Spotfire code to DAX')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    convert_parser = subparsers.add_parser(
+        'convert', help='Convert a directory of .sql and Spotfire expression files to .dax files')
+    convert_parser.add_argument('source_dir', help='Directory to search for source files')
+    convert_parser.add_argument('--out', required=True, help='Directory for .dax outputs')
+    convert_parser.add_argument('--workers', type=int, default=0,
+                                help='Worker processes (default: number of CPUs)')
+    convert_parser.add_argument('--chunk-size', type=int, default=0,
+                                help='Files sent to a worker at a time (default: derived from file count)')
+    convert_parser.add_argument('--force', action='store_true',
+                                help='Reconvert files whose outputs are already up to date')
+    convert_parser.add_argument('--summary', help=f'Summary JSON path (default: OUTPUT_DIR/{SUMMARY_FILENAME})')
+    convert_parser.add_argument('--sql-ext', nargs='+', default=SQL_EXTENSIONS,
+                                help='Extensions converted as SQL (default: .sql)')
+    convert_parser.add_argument('--spotfire-ext', nargs='+', default=SPOTFIRE_EXTENSIONS,
+                                help='Extensions converted as Spotfire expressions (default: .spotfire .expr)')
+    convert_parser.set_defaults(handler=convert_command)
+
+    stream_parser = subparsers.add_parser(
+        'stream', help='Convert a large file or stdin incrementally with bounded memory')
+    stream_parser.add_argument('input', nargs='?', default='-', help='Input file (default: stdin)')
+    stream_parser.add_argument('-o', '--output', default='-', help='Output file (default: stdout)')
+    stream_parser.add_argument('--type', choices=sorted(CONVERTER_CLASSES), default='sql_to_dax',
+                               help='Conversion type (default: sql_to_dax)')
+    stream_parser.add_argument('--jsonl', action='store_true',
+                               help='Write one JSON result per statement instead of plain DAX')
+    stream_parser.set_defaults(handler=stream_command)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    logging.basicConfig(level=logging.WARNING)
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
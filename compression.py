@@ -0,0 +1,97 @@
+"""Response compression negotiated from the Accept-Encoding request header.
+
+gzip is always available; Brotli is preferred when the optional brotli package is installed.
+Streamed output is compressed incrementally and flushed regularly, so clients can decode
+lines as they arrive instead of waiting for the end of the response.
+"""
+from typing import Iterable, Iterator, Optional
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Preferred first; br is only offered when the brotli package is installed
+SUPPORTED_ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def choose_encoding(accept_encodings) -> Optional[str]:
+    """Pick the best supported encoding the client accepts, or None for identity.
+
+    accept_encodings is a werkzeug Accept object (request.accept_encodings).
+    """
+    best = None
+    best_quality = 0
+    for encoding in SUPPORTED_ENCODINGS:
+        quality = accept_encodings.quality(encoding)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class _GzipCompressor:
+    def __init__(self):
+        # wbits=31 writes the gzip header and trailer
+        self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliCompressor:
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+def _compressor(encoding: str):
+    if encoding == 'br' and brotli is not None:
+        return _BrotliCompressor()
+    if encoding == 'gzip':
+        return _GzipCompressor()
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    """Compress a complete response body"""
+    compressor = _compressor(encoding)
+    return compressor.compress(data) + compressor.finish()
+
+
+def compress_chunks(chunks: Iterable[bytes], encoding: str, flush_bytes: int = 64 * 1024) -> Iterator[bytes]:
+    """Compress a stream of chunks, flushing after the first chunk and then every flush_bytes of input.
+
+    Flushing after every chunk would hurt the compression ratio of short lines; flushing the
+    first one early keeps the time to first byte low.
+    """
+    compressor = _compressor(encoding)
+    pending = 0
+    first = True
+    for chunk in chunks:
+        output = compressor.compress(chunk)
+        pending += len(chunk)
+        if first or pending >= flush_bytes:
+            output += compressor.flush()
+            pending = 0
+            first = False
+        if output:
+            yield output
+    yield compressor.finish()
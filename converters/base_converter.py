@@ -1,14 +1,34 @@
 from abc import ABC, abstractmethod
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Iterator, Optional, TextIO, Tuple, Union
+import io
 import re
+from metrics import timed, observe_input, count_error
+from .cache import LRUCache, make_cache_key
+from .null_rewriter import NullRewriter
+from .schema import SchemaIndex
 
 class BaseConverter(ABC):
     """Base class for code converters"""
     
-    def __init__(self):
+    # Bump when conversion output changes so cached results are invalidated
+    version = '0.1.10'
+    
+    # Recent parse results, so validating and then converting the same code parses it once
+    parse_cache_size = 1024
+    parse_cache_ttl = 300.0
+    
+    def __init__(self, schema: Optional[SchemaIndex] = None):
+        # Optional data model used to resolve which table each column belongs to
+        self.schema = schema
+        if schema is not None:
+            # Results depend on the schema, so cache keys must too
+            self.version = f'{type(self).version}+schema.{schema.digest[:12]}'
         self.data_type_mappings = self._get_data_type_mappings()
         self.function_mappings = self._get_function_mappings()
         self.null_handling_rules = self._get_null_handling_rules()
+        self.null_rewriter = NullRewriter(self.null_handling_rules)
+        self.function_call_pattern = self._compile_function_call_pattern()
+        self.parse_cache = LRUCache(max_size=self.parse_cache_size, ttl=self.parse_cache_ttl)
     
     @abstractmethod
     def _get_data_type_mappings(self) -> Dict[str, str]:
@@ -22,7 +42,11 @@ class BaseConverter(ABC):
     
     @abstractmethod
     def _get_null_handling_rules(self) -> Dict[str, str]:
-        """Return NULL handling conversion rules"""
+        """Return NULL handling conversion rules.
+
+        Keys are function names, rewritten with their arguments as {0}, {1}, ... (or {args}),
+        or postfix predicates such as 'IS NULL', rewritten with their operand as {0}.
+        """
         pass
     
     @abstractmethod
@@ -31,31 +55,148 @@ class BaseConverter(ABC):
         pass
     
     @abstractmethod
-    def convert_to_dax(self, parsed_code: Dict[str, Any]) -> str:
-        """Convert parsed code to DAX"""
+    def convert_to_dax(self, parsed_code: Dict[str, Any], warnings: Optional[List[str]] = None) -> str:
+        """Convert parsed code to DAX, appending problems found on the way (e.g. unrelated tables) to warnings"""
         pass
     
-    def convert(self, source_code: str) -> Dict[str, Any]:
-        """Main conversion method"""
+    @abstractmethod
+    def iter_source_chunks(self, stream: TextIO) -> Iterator[Union[str, Exception]]:
+        """Yield independently convertible statements or expressions read from a stream.
+
+        A chunk that cannot be read (such as a statement over a size limit) is yielded as
+        an exception, so the chunks after it are still converted.
+        """
+        pass
+    
+    @abstractmethod
+    def split_source_lines(self, source_code: str) -> List[Tuple[int, str]]:
+        """Split source code like split_source, pairing each chunk with the number of the line it starts on"""
+        pass
+    
+    @abstractmethod
+    def check_structure(self, code: str) -> Dict[str, List[str]]:
+        """Check delimiters and statement structure without a full parse"""
+        pass
+    
+    def parse_cached(self, source_code: str) -> Dict[str, Any]:
+        """Parse source code, reusing a recent parse of the same content.
+
+        Parse results are shared between callers and must not be mutated.
+        """
+        key = make_cache_key(source_code, type(self).__name__, self.version, 'parse')
+        return self.parse_cache.get_or_compute(key, lambda: self.parse_code(source_code))
+    
+    def objects_cached(self, source_code: str) -> Dict[str, List[str]]:
+        """Identify the objects in source code, reusing a recent result for the same content.
+
+        Object identification is a separate scan of the source, so it only runs when a caller asks for it.
+        """
+        key = make_cache_key(source_code, type(self).__name__, self.version, 'objects')
+        return self.parse_cache.get_or_compute(key, lambda: self.identify_objects(source_code))
+    
+    def split_source(self, source_code: str) -> List[str]:
+        """Split source code into independently convertible statements or expressions"""
+        return list(self.iter_source_chunks(io.StringIO(source_code)))
+    
+    @staticmethod
+    def merge_results(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Combine per-statement conversion results into one result, in order"""
+        dax_parts = []
+        objects = {'tables': set(), 'columns': set(), 'functions': set(), 'aliases': set()}
+        warnings = []
+        notes = []
+        
+        for result in results:
+            if result['dax_code']:
+                dax_parts.append(result['dax_code'])
+            for key, values in result.get('objects', {}).items():
+                objects.setdefault(key, set()).update(values)
+            for warning in result.get('warnings', []):
+                if warning not in warnings:
+                    warnings.append(warning)
+            for note in result.get('notes', []):
+                if note not in notes:
+                    notes.append(note)
+        
+        return {
+            'dax_code': '\n\n'.join(dax_parts),
+            'objects': {key: sorted(values) for key, values in objects.items()},
+            'warnings': warnings,
+            'notes': notes
+        }
+    
+    def convert(self, source_code: str, include_objects: bool = True) -> Dict[str, Any]:
+        """Main conversion method.
+
+        With include_objects=False the object inventory is not computed and 'objects' is empty.
+        """
+        component = type(self).__name__
+        observe_input(component, 'convert', source_code)
         try:
-            # Parse the source code
-            parsed_result = self.parse_code(source_code)
+            # Parse the source code (shared with a preceding validate call)
+            with timed(component, 'parse'):
+                parsed_result = self.parse_cached(source_code)
             
-            # Convert to DAX
-            dax_code = self.convert_to_dax(parsed_result)
+            # Convert to DAX; the parse result is cached, so its warnings list is copied before adding to it
+            warnings = list(parsed_result.get('warnings', []))
+            with timed(component, 'convert_to_dax'):
+                dax_code = self.convert_to_dax(parsed_result, warnings)
+            
+            objects = {}
+            if include_objects:
+                objects = self.objects_cached(source_code)
             
             return {
                 'dax_code': dax_code,
-                'objects': parsed_result.get('objects', {}),
-                'warnings': parsed_result.get('warnings', []),
+                'objects': objects,
+                'warnings': warnings,
                 'notes': parsed_result.get('notes', [])
             }
             
         except Exception as e:
+            count_error(component, 'convert')
             raise Exception(f"Conversion failed: {str(e)}")
     
-    def validate(self, source_code: str) -> Dict[str, Any]:
-        """Validate source code"""
+    def convert_stream(self, stream: TextIO, include_objects: bool = True) -> Iterator[Dict[str, Any]]:
+        """Convert a stream one statement or expression at a time, yielding each result as it is produced"""
+        for index, chunk in enumerate(self.iter_source_chunks(stream)):
+            if isinstance(chunk, Exception):
+                yield {
+                    'index': index,
+                    'success': False,
+                    'source': getattr(chunk, 'source', ''),
+                    'error': str(chunk)
+                }
+                continue
+            try:
+                result = self.convert(chunk, include_objects)
+                converted = {
+                    'index': index,
+                    'success': True,
+                    'dax_code': result['dax_code'],
+                    'objects': result['objects'],
+                    'warnings': result['warnings'],
+                    'notes': result['notes']
+                }
+                if not include_objects:
+                    del converted['objects']
+                yield converted
+            except Exception as e:
+                yield {
+                    'index': index,
+                    'success': False,
+                    'source': chunk,
+                    'error': str(e)
+                }
+    
+    def validate(self, source_code: str, quick: bool = False) -> Dict[str, Any]:
+        """Validate source code.
+
+        Quick mode only runs the structural check, which is cheap enough for as-you-type validation;
+        full mode also parses the code and reports semantic errors.
+        """
+        component = type(self).__name__
+        observe_input(component, 'validate_quick' if quick else 'validate', source_code)
         try:
             errors = []
             suggestions = []
@@ -66,15 +207,23 @@ class BaseConverter(ABC):
                 suggestions.append("Enter valid source code")
                 return {'valid': False, 'errors': errors, 'suggestions': suggestions}
             
+            # Structural check: delimiters, statement boundaries and keywords
+            with timed(component, 'check_structure'):
+                structure = self.check_structure(source_code)
+            errors.extend(structure['errors'])
+            suggestions.extend(structure['suggestions'])
+            
             # Try to parse the code
-            try:
-                parsed_result = self.parse_code(source_code)
-                if parsed_result.get('parse_errors'):
-                    errors.extend(parsed_result['parse_errors'])
-                    suggestions.extend(parsed_result.get('suggestions', []))
-            except Exception as e:
-                errors.append(f"Parse error: {str(e)}")
-                suggestions.append("Check syntax and formatting")
+            if not quick:
+                try:
+                    with timed(component, 'parse'):
+                        parsed_result = self.parse_cached(source_code)
+                    if parsed_result.get('parse_errors'):
+                        errors.extend(parsed_result['parse_errors'])
+                        suggestions.extend(parsed_result.get('suggestions', []))
+                except Exception as e:
+                    errors.append(f"Parse error: {str(e)}")
+                    suggestions.append("Check syntax and formatting")
             
             return {
                 'valid': len(errors) == 0,
@@ -83,6 +232,7 @@ class BaseConverter(ABC):
             }
             
         except Exception as e:
+            count_error(component, 'validate')
             return {
                 'valid': False,
                 'errors': [f"Validation failed: {str(e)}"],
@@ -128,8 +278,21 @@ class BaseConverter(ABC):
         function_lower = function_name.lower()
         return self.function_mappings.get(function_lower, function_name)
     
+    def _compile_function_call_pattern(self) -> re.Pattern:
+        """Compile all mapped function names into a single call-matching pattern"""
+        # Longest names first so a name never shadows a longer one sharing its prefix
+        names = sorted(self.function_mappings, key=len, reverse=True)
+        alternation = '|'.join(re.escape(name) for name in names)
+        return re.compile(rf'\b({alternation})\s*\(', re.IGNORECASE)
+    
+    def convert_function_calls(self, expression: str) -> str:
+        """Rename every mapped function call to its DAX equivalent in a single pass"""
+        function_mappings = self.function_mappings
+        return self.function_call_pattern.sub(
+            lambda match: f'{function_mappings[match.group(1).lower()]}(',
+            expression
+        )
+    
     def handle_null_conversion(self, expression: str) -> str:
         """Apply NULL handling conversion rules"""
-        for source_pattern, dax_replacement in self.null_handling_rules.items():
-            expression = re.sub(source_pattern, dax_replacement, expression, flags=re.IGNORECASE)
-        return expression
+        return self.null_rewriter.rewrite(expression)
@@ -0,0 +1,81 @@
+from typing import Dict, List, Any
+import logging
+from .registry import get_converter
+
+MAX_BATCH_SIZE = 1000
+
+
+def convert_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a single batch item, reporting failures in the result instead of raising"""
+    if not isinstance(item, dict):
+        return {
+            'id': None,
+            'success': False,
+            'error': 'Batch item must be an object with id, source_code and conversion_type'
+        }
+
+    item_id = item.get('id')
+    source_code = item.get('source_code') or ''
+    conversion_type = item.get('conversion_type', 'sql_to_dax')
+    include_objects = item.get('include_objects', True)
+
+    # Checked per item, so one malformed item fails alone instead of aborting the batch
+    error = None
+    if not isinstance(source_code, str):
+        error = 'source_code must be a string'
+    elif not isinstance(conversion_type, str):
+        error = 'conversion_type must be a string'
+    elif not isinstance(include_objects, bool):
+        error = 'include_objects must be true or false'
+    elif not source_code.strip():
+        error = 'Please provide source code to convert'
+    if error is not None:
+        return {
+            'id': item_id,
+            'success': False,
+            'error': error
+        }
+    source_code = source_code.strip()
+
+    converter = get_converter(conversion_type)
+    if converter is None:
+        return {
+            'id': item_id,
+            'success': False,
+            'error': 'Invalid conversion type'
+        }
+
+    try:
+        result = converter.convert(source_code, include_objects)
+        converted = {
+            'id': item_id,
+            'success': True,
+            'converted_code': result['dax_code'],
+            'warnings': result.get('warnings', []),
+            'conversion_notes': result.get('notes', [])
+        }
+        if include_objects:
+            converted['objects_identified'] = result['objects']
+        return converted
+    except Exception as e:
+        logging.error(f"Batch item {item_id} conversion error: {str(e)}")
+        return {
+            'id': item_id,
+            'success': False,
+            'error': str(e)
+        }
+
+
+def convert_batch(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Convert a list of items in order"""
+    return [convert_item(item) for item in items]
+
+
+def summarize_results(results: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Count succeeded and failed items in a batch result"""
+    succeeded = sum(1 for result in results if result.get('success'))
+    return {
+        'total': len(results),
+        'succeeded': succeeded,
+        'failed': len(results) - succeeded
+    }
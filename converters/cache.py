@@ -0,0 +1,135 @@
+from collections import OrderedDict
+from typing import Dict, Any, Callable, Hashable, Optional
+import hashlib
+import threading
+import time
+
+_MISSING = object()
+
+
+def normalize_source(source_code: str) -> str:
+    """Normalize line endings so copies saved on different platforms share a cache entry.
+
+    Whitespace is kept: it can be part of a multi-line string literal, and leading lines
+    shift the line numbers reported by validation.
+    """
+    return source_code.replace('\r\n', '\n').replace('\r', '\n')
+
+
+def make_cache_key(source_code: str, conversion_type: str, version: str, kind: str = 'convert') -> str:
+    """Build a content-addressed key from the normalized source, conversion type and converter version"""
+    digest = hashlib.sha256()
+    for part in (kind, conversion_type, version, normalize_source(source_code)):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\x00')
+    return digest.hexdigest()
+
+
+class LRUCache:
+    """Thread-safe bounded cache with least-recently-used eviction and hit/miss counters.
+
+    With a ttl (in seconds), entries also expire that long after they were stored.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value and mark it as recently used"""
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING and self.ttl is not None and entry[1] < time.monotonic():
+                del self._entries[key]
+                entry = _MISSING
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entries beyond max_size"""
+        if self.max_size <= 0:
+            return
+        expires = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Return the cached value, computing and storing it on a miss"""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            # Computed outside the lock so slow conversions don't block other threads
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self) -> None:
+        """Remove all entries and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def stats(self) -> Dict[str, Any]:
+        """Return size and hit/miss counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+
+class ConversionCache(LRUCache):
+    """LRU cache of conversion and validation results keyed by source content.
+
+    With a persistent store (such as a SQLiteCache), in-memory misses are looked up in the
+    store before computing, and computed results are written to both.
+
+    Cached results are shared between callers and must not be mutated.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = None, store=None):
+        super().__init__(max_size, ttl)
+        self.store = store
+
+    def get_result(self, converter, source_code: str, conversion_type: str, kind: str,
+                   compute: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """Return the cached result for this source, running compute on a miss"""
+        key = make_cache_key(source_code, conversion_type, converter.version, kind)
+        if self.store is not None:
+            return self.get_or_compute(key, lambda: self.store.get_or_compute(key, compute))
+        return self.get_or_compute(key, compute)
+
+    def clear(self, persistent: bool = False) -> None:
+        """Remove all in-memory entries and reset the counters.
+
+        The persistent store is shared with other processes and survives restarts, so it is
+        only emptied when persistent is true.
+        """
+        super().clear()
+        if persistent and self.store is not None:
+            self.store.clear()
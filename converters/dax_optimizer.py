@@ -0,0 +1,205 @@
+"""Filter arguments for the CALCULATE calls of generated measures.
+
+A WHERE condition is split into the terms combined by AND. Terms that test a single column
+against constants become KEEPFILTERS(<predicate>) column filters, which the storage engine
+resolves without iterating a table; KEEPFILTERS keeps the intersection with the report's filters
+that FILTER would give. Only the other terms go into a FILTER over the table they need rows of.
+"""
+from typing import List, Optional, Tuple
+import re
+
+TOKEN_PATTERN = re.compile(r"""
+    (?P<string>"(?:[^"]|"")*"?)
+  | (?P<quoted>'(?:[^']|'')*'?)
+  | (?P<column>\[[^\]]*\]?)
+  | (?P<name>[A-Za-z_][A-Za-z0-9_.]*)
+  | (?P<number>[0-9]+(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?)
+  | (?P<comment>--[^\n]*|//[^\n]*|/\*.*?(?:\*/|$))
+  | (?P<space>\s+)
+  | (?P<operator>&&|\|\||<=|>=|<>|==|.)
+""", re.VERBOSE | re.DOTALL)
+
+
+# Functions allowed in a predicate that is turned into a column filter
+PREDICATE_FUNCTIONS = frozenset({'BLANK', 'TRUE', 'FALSE', 'DATE', 'TIME', 'DATEVALUE', 'ISBLANK', 'NOT'})
+
+PREDICATE_KEYWORDS = frozenset({'TRUE', 'FALSE', 'IN', 'NOT'})
+
+
+class Token:
+    """A lexical token with its position in the expression"""
+    __slots__ = ('kind', 'text', 'start', 'end')
+
+    def __init__(self, kind: str, text: str, start: int, end: int):
+        self.kind = kind
+        self.text = text
+        self.start = start
+        self.end = end
+
+
+def tokenize(expression: str) -> List[Token]:
+    """Split an expression into tokens, dropping whitespace and comments"""
+    return [
+        Token(match.lastgroup, match.group(), match.start(), match.end())
+        for match in TOKEN_PATTERN.finditer(expression)
+        if match.lastgroup not in ('space', 'comment')
+    ]
+
+
+def _split_conjunction(tokens: List[Token]) -> List[List[Token]]:
+    """Split a condition's tokens into the terms combined by its top-level && operators and AND(a, b) calls"""
+    # Parentheses around the whole condition
+    while len(tokens) > 2 and tokens[0].text == '(' and _closes_at_end(tokens):
+        tokens = tokens[1:-1]
+
+    separator = '&&'
+    if len(tokens) > 3 and tokens[0].text.upper() == 'AND' and tokens[1].text == '(' and _closes_at_end(tokens[1:]):
+        # The two arguments of AND(a, b)
+        separator = ','
+        inner = tokens[2:-1]
+    else:
+        inner = tokens
+    parts = []
+    depth = 0
+    part_start = 0
+    for index, token in enumerate(inner):
+        if token.text in ('(', '{'):
+            depth += 1
+        elif token.text in (')', '}'):
+            depth -= 1
+        elif token.text == separator and depth == 0:
+            parts.append(inner[part_start:index])
+            part_start = index + 1
+    parts.append(inner[part_start:])
+    if len(parts) == 1 or not all(parts) or (separator == ',' and len(parts) != 2):
+        return [tokens]
+
+    terms = []
+    for part in parts:
+        terms.extend(_split_conjunction(part))
+    return terms
+
+
+def _closes_at_end(tokens: List[Token]) -> bool:
+    """Whether the opening parenthesis of tokens[0] is closed by the last token"""
+    depth = 0
+    for index, token in enumerate(tokens):
+        if token.text == '(':
+            depth += 1
+        elif token.text == ')':
+            depth -= 1
+            if depth == 0:
+                return index == len(tokens) - 1
+    return False
+
+
+def _is_table(token: Token) -> bool:
+    return token.kind in ('name', 'quoted')
+
+
+def _column_predicate(condition: str, tokens: List[Token], table: str) -> Optional[str]:
+    """Return the predicate as a column filter if it tests a single column against constants.
+
+    The column may be a bare column of table, a qualified column of any table, or
+    RELATED(Other[Column]): a filter on a table on the one side of a relationship reaches
+    table through it.
+    """
+    column = None
+    pieces = []
+    position = tokens[0].start
+    index = 0
+    while index < len(tokens):
+        token = tokens[index]
+        following = tokens[index + 1] if index + 1 < len(tokens) else None
+        if (token.kind == 'name' and token.text.upper() == 'RELATED' and index + 4 < len(tokens)
+                and tokens[index + 1].text == '(' and _is_table(tokens[index + 2])
+                and tokens[index + 3].kind == 'column' and tokens[index + 3].start == tokens[index + 2].end
+                and tokens[index + 4].text == ')'):
+            # RELATED(Other[Column]) filters Other[Column] directly
+            reference = tokens[index + 2].text + tokens[index + 3].text
+            pieces.append(condition[position:token.start] + reference)
+            position = tokens[index + 4].end
+            index += 5
+        elif _is_table(token) and following is not None and following.kind == 'column' \
+                and following.start == token.end:
+            # table[column]
+            reference = token.text + following.text
+            index += 2
+        elif token.kind == 'column':
+            # An unqualified column in FILTER's condition belongs to the filtered table
+            reference = table + token.text
+            pieces.append(condition[position:token.start] + table)
+            position = token.start
+            index += 1
+        elif token.kind == 'name':
+            if following is not None and following.text == '(':
+                if token.text.upper() not in PREDICATE_FUNCTIONS:
+                    return None
+            elif token.text.upper() not in PREDICATE_KEYWORDS:
+                return None
+            index += 1
+            continue
+        else:
+            index += 1
+            continue
+        if column is not None and reference.lower() != column.lower():
+            return None
+        column = reference
+    if column is None:
+        return None
+    pieces.append(condition[position:tokens[-1].end])
+    return ''.join(pieces)
+
+
+def _row_table(tokens: List[Token], table: str) -> str:
+    """Return the table a term's row context must come from: the only table it references, else table"""
+    tables = set()
+    for index, token in enumerate(tokens):
+        if token.kind != 'column':
+            continue
+        previous = tokens[index - 1] if index else None
+        if previous is None or previous.end != token.start or not _is_table(previous):
+            # An unqualified column belongs to table
+            return table
+        if index >= 2 and tokens[index - 2].text == '(' and index >= 3 and tokens[index - 3].text.upper() == 'RELATED':
+            # RELATED(Other[Column]) needs a row of table
+            return table
+        tables.add(previous.text)
+    return tables.pop() if len(tables) == 1 else table
+
+
+def _split_filter(table: str, condition: str) -> Tuple[List[str], List[Tuple[str, str]]]:
+    """Split a condition on the rows of table into column predicates and the remaining terms with the table to iterate for each"""
+    predicates = []
+    remaining = []
+    tokens = tokenize(condition)
+    if not tokens:
+        return predicates, remaining
+    for term in _split_conjunction(tokens):
+        predicate = _column_predicate(condition, term, table)
+        if predicate is None:
+            remaining.append((_row_table(term, table), condition[term[0].start:term[-1].end]))
+        else:
+            predicates.append(predicate)
+    return predicates, remaining
+
+
+def filter_arguments(table: str, condition: str) -> List[str]:
+    """Return CALCULATE filter arguments keeping the rows of table that satisfy condition.
+
+    Terms of the condition that test one column (of table or of another model table) against
+    constants become KEEPFILTERS column filters. The rest go into a FILTER over the only table
+    they reference, or over table when they reference several or need its row context.
+    """
+    predicates, remaining = _split_filter(table, condition)
+    filters = [f'KEEPFILTERS({predicate})' for predicate in predicates]
+    # Terms that are not column predicates stay in a FILTER over their table; the arguments intersect
+    terms_by_table = {}
+    for row_table, term in remaining:
+        terms_by_table.setdefault(row_table, []).append(term)
+    for row_table, terms in terms_by_table.items():
+        if len(terms) == 1:
+            filters.append(f'FILTER({row_table}, {terms[0]})')
+        else:
+            filters.append(f"FILTER({row_table}, {' && '.join(f'({term})' for term in terms)})")
+    return filters
@@ -0,0 +1,120 @@
+from collections import Counter
+from typing import Dict, List, Any, Callable, Optional
+import os
+import re
+import threading
+from metrics import register_cache
+from .base_converter import BaseConverter
+from .cache import LRUCache, make_cache_key
+from .parallel import CONVERSION_CHUNK_SIZE, CONVERSION_WORKERS, convert_chunks_parallel
+from .registry import get_converter
+
+# Per-statement results shared by all incremental converters in this process
+chunk_cache = LRUCache(max_size=int(os.environ.get("CHUNK_CACHE_SIZE", "8192")))
+register_cache('chunk', chunk_cache)
+
+# Line numbers in validation messages ("at line 3", "(line 3)")
+LINE_NUMBER_PATTERN = re.compile(r'\bline (\d+)\b')
+
+_incremental_converters = {}
+_lock = threading.Lock()
+
+
+class IncrementalConverter:
+    """Converts and validates documents statement by statement, reusing results for unchanged statements.
+
+    Editing one statement of a large script only re-parses and reconverts that statement;
+    every other statement is served from the chunk cache by content hash. With several
+    workers, the statements not in the cache are converted across worker processes.
+    """
+    
+    def __init__(self, converter: BaseConverter, conversion_type: str, cache: Optional[LRUCache] = None,
+                 workers: int = 1, chunk_size: Optional[int] = None):
+        self.converter = converter
+        self.conversion_type = conversion_type
+        self.cache = cache if cache is not None else chunk_cache
+        self.workers = workers
+        self.chunk_size = chunk_size
+    
+    def _chunk_key(self, chunk: str, kind: str) -> str:
+        return make_cache_key(chunk, self.conversion_type, self.converter.version, f'chunk-{kind}')
+    
+    def _chunk_result(self, chunk: str, kind: str, compute: Callable[[str], Dict[str, Any]]) -> Dict[str, Any]:
+        return self.cache.get_or_compute(self._chunk_key(chunk, kind), lambda: compute(chunk))
+    
+    def convert(self, source_code: str,
+                progress: Optional[Callable[[int, int], None]] = None,
+                include_objects: bool = True) -> Dict[str, Any]:
+        """Convert source code, reconverting only statements not seen before.
+
+        progress, if given, is called with (statements done, total) once the code is split,
+        once for the statements found in the cache and again after each statement converted.
+        Worker processes convert with the shared converter for this conversion type.
+        """
+        chunks = self.converter.split_source(source_code)
+        kind = 'convert' if include_objects else 'convert-without-objects'
+        if progress is not None:
+            progress(0, len(chunks))
+        
+        keys = [self._chunk_key(chunk, kind) for chunk in chunks]
+        counts = Counter(keys)
+        results = {key: self.cache.get(key) for key in counts}
+        # Statements not seen before, each converted once however often it repeats in the script
+        missing = [(key, chunk) for key, chunk in dict(zip(keys, chunks)).items() if results[key] is None]
+        if self.workers > 1 and len(missing) > 1:
+            converted = convert_chunks_parallel(self.conversion_type, [chunk for _, chunk in missing],
+                                                include_objects, self.workers, self.chunk_size)
+        else:
+            converted = (self.converter.convert(chunk, include_objects) for _, chunk in missing)
+        
+        done = len(chunks) - sum(counts[key] for key, _ in missing)
+        if progress is not None and done:
+            progress(done, len(chunks))
+        for (key, _), result in zip(missing, converted):
+            self.cache.put(key, result)
+            results[key] = result
+            done += counts[key]
+            if progress is not None:
+                progress(done, len(chunks))
+        return self.converter.merge_results([results[key] for key in keys])
+    
+    def validate(self, source_code: str) -> Dict[str, Any]:
+        """Validate source code, revalidating only statements not seen before"""
+        if not source_code.strip():
+            return self.converter.validate(source_code)
+        
+        errors = []
+        suggestions = []
+        for start_line, chunk in self.converter.split_source_lines(source_code):
+            result = self._chunk_result(chunk, 'validate', self.converter.validate)
+            # Cached per statement, so line numbers are relative to it until shifted here
+            errors.extend(
+                LINE_NUMBER_PATTERN.sub(lambda match: f'line {int(match.group(1)) + start_line - 1}', error)
+                for error in result.get('errors', [])
+            )
+            for suggestion in result.get('suggestions', []):
+                if suggestion not in suggestions:
+                    suggestions.append(suggestion)
+        
+        return {
+            'valid': len(errors) == 0,
+            'errors': errors,
+            'suggestions': suggestions
+        }
+
+
+def get_incremental_converter(conversion_type: str) -> Optional[IncrementalConverter]:
+    """Return the shared incremental converter for a conversion type"""
+    incremental = _incremental_converters.get(conversion_type)
+    if incremental is not None:
+        return incremental
+    
+    with _lock:
+        incremental = _incremental_converters.get(conversion_type)
+        if incremental is None:
+            converter = get_converter(conversion_type)
+            if converter is not None:
+                incremental = IncrementalConverter(converter, conversion_type,
+                                                   workers=CONVERSION_WORKERS, chunk_size=CONVERSION_CHUNK_SIZE)
+                _incremental_converters[conversion_type] = incremental
+        return incremental
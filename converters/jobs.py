@@ -0,0 +1,251 @@
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from .incremental import get_incremental_converter
+from .persistent_cache import SQLiteConnections
+
+QUEUED = 'queued'
+RUNNING = 'running'
+COMPLETED = 'completed'
+FAILED = 'failed'
+
+
+class JobQueueFull(Exception):
+    """Raised when a job is submitted while the queue is at capacity"""
+    pass
+
+
+class Job:
+    """A conversion submitted to the job queue, with its progress and result"""
+
+    def __init__(self, source_code: str, conversion_type: str, include_objects: bool = True):
+        self.id = uuid.uuid4().hex
+        self.source_code = source_code
+        self.conversion_type = conversion_type
+        self.include_objects = include_objects
+        self.status = QUEUED
+        self.done = 0
+        self.total = None
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (COMPLETED, FAILED)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the job status, progress and (once finished) its result"""
+        job = {
+            'job_id': self.id,
+            'status': self.status,
+            'conversion_type': self.conversion_type,
+            'progress': {'done': self.done, 'total': self.total},
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
+        if self.status == COMPLETED:
+            job['result'] = self.result
+        elif self.status == FAILED:
+            job['error'] = self.error
+        return job
+
+
+class SQLiteJobStore:
+    """Statuses of jobs in a local SQLite file, so every process opening it can report any job.
+
+    Only the most recent max_finished finished jobs are kept. Database errors are logged and
+    a job that cannot be read is reported as unknown; they never fail the job itself.
+    """
+
+    def __init__(self, path: str, max_finished: int = 256, timeout: float = 1.0):
+        self.path = path
+        self.max_finished = max_finished
+        self._connections = SQLiteConnections(path, timeout)
+        self.enabled = True
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            connection = self._connections.get()
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, status TEXT NOT NULL, finished_at REAL)'
+            )
+            connection.execute('CREATE INDEX IF NOT EXISTS jobs_finished_at ON jobs (finished_at)')
+        except (OSError, sqlite3.Error) as e:
+            logging.error(f"Job store disabled, cannot open {path}: {str(e)}")
+            self.enabled = False
+
+    def put(self, job: Job) -> None:
+        """Store the job's current status, dropping the oldest finished jobs once it has finished"""
+        if not self.enabled:
+            return
+        try:
+            connection = self._connections.get()
+            connection.execute('INSERT OR REPLACE INTO jobs (id, status, finished_at) VALUES (?, ?, ?)',
+                               (job.id, json.dumps(job.to_dict()), job.finished_at))
+            if job.finished:
+                connection.execute(
+                    'DELETE FROM jobs WHERE finished_at IS NOT NULL AND id NOT IN '
+                    '(SELECT id FROM jobs WHERE finished_at IS NOT NULL ORDER BY finished_at DESC LIMIT ?)',
+                    (self.max_finished,)
+                )
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logging.error(f"Job store write error: {str(e)}")
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return the stored status of a job, or None if it is unknown or unreadable"""
+        if not self.enabled:
+            return None
+        try:
+            row = self._connections.get().execute('SELECT status FROM jobs WHERE id = ?', (job_id,)).fetchone()
+            return json.loads(row[0]) if row is not None else None
+        except (sqlite3.Error, ValueError) as e:
+            logging.error(f"Job store read error: {str(e)}")
+            return None
+
+
+def open_job_store(path: Optional[str], max_finished: int) -> Optional[SQLiteJobStore]:
+    """Open the job store at path, or return None when no path is configured or it cannot be opened"""
+    if not path:
+        return None
+    store = SQLiteJobStore(path, max_finished=max_finished)
+    return store if store.enabled else None
+
+
+class JobQueue:
+    """Bounded in-process queue of conversion jobs served by a pool of worker threads.
+
+    Jobs run in the process that accepted them. With a store their statuses are also written
+    to it, so with several gunicorn workers any of them can answer a poll; without one a job
+    must be polled from the worker that accepted it. With a cache (a ConversionCache),
+    resubmitting a source converted before returns the earlier result without reconverting.
+    """
+
+    # Seconds between writes of a running job's progress to the store
+    progress_interval = 1.0
+
+    def __init__(self, workers: int = 2, max_queued: int = 64, max_finished: int = 256,
+                 store: Optional[SQLiteJobStore] = None, cache=None):
+        self.workers = max(1, workers)
+        self.max_finished = max_finished
+        self.store = store
+        self.cache = cache
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def submit(self, source_code: str, conversion_type: str, include_objects: bool = True) -> Job:
+        """Queue a conversion, raising JobQueueFull instead of waiting when the queue is full"""
+        job = Job(source_code, conversion_type, include_objects)
+        with self._lock:
+            self._start_workers()
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                raise JobQueueFull(f"Job queue is full ({self._queue.maxsize} jobs waiting)")
+            self._jobs[job.id] = job
+            # Under the lock, so a worker thread cannot store the job as running first
+            self._store(job)
+        return job
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return a job's status, progress and result, or None if it is unknown or has been discarded"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        # Accepted by another process (or discarded here and still in the store)
+        if self.store is not None:
+            return self.store.get(job_id)
+        return None
+
+    def _store(self, job: Job) -> None:
+        if self.store is not None:
+            self.store.put(job)
+
+    def stats(self) -> Dict[str, int]:
+        """Return queue length and job counts by status"""
+        with self._lock:
+            counts = {status: 0 for status in (QUEUED, RUNNING, COMPLETED, FAILED)}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+            return dict(counts, waiting=self._queue.qsize(), capacity=self._queue.maxsize)
+
+    def _start_workers(self) -> None:
+        # Threads start on first submit so importing the app (or forking gunicorn workers) spawns none
+        if self._threads:
+            return
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f'conversion-job-{index}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _work(self) -> None:
+        while True:
+            job = self._queue.get()
+            try:
+                self._run(job)
+            finally:
+                self._queue.task_done()
+
+    def _run(self, job: Job) -> None:
+        with self._lock:
+            job.status = RUNNING
+            job.started_at = time.time()
+        self._store(job)
+        stored_at = time.monotonic()
+
+        def progress(done: int, total: int) -> None:
+            nonlocal stored_at
+            job.done, job.total = done, total
+            if self.store is not None and time.monotonic() - stored_at >= self.progress_interval:
+                self._store(job)
+                stored_at = time.monotonic()
+
+        try:
+            converter = get_incremental_converter(job.conversion_type)
+            if converter is None:
+                raise ValueError(f"Invalid conversion type: {job.conversion_type}")
+            source_code, include_objects = job.source_code, job.include_objects
+            convert = lambda: converter.convert(source_code, progress=progress, include_objects=include_objects)
+            if self.cache is not None:
+                # Shared with incremental /convert requests for the same source
+                kind = 'convert-incremental' if include_objects else 'convert-incremental-without-objects'
+                result = self.cache.get_result(converter.converter, source_code, job.conversion_type, kind, convert)
+            else:
+                result = convert()
+            job.result = {
+                'converted_code': result['dax_code'],
+                'warnings': result.get('warnings', []),
+                'conversion_notes': result.get('notes', [])
+            }
+            if job.include_objects:
+                job.result['objects_identified'] = result['objects']
+            job.status = COMPLETED
+        except Exception as e:
+            logging.error(f"Job {job.id} conversion error: {str(e)}")
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+            job.source_code = None
+            self._store(job)
+            self._discard_finished()
+
+    def _discard_finished(self) -> None:
+        # Keep only the most recent finished jobs; queued and running jobs are never dropped
+        with self._lock:
+            finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+            for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+                del self._jobs[job_id]
+
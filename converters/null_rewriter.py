@@ -0,0 +1,136 @@
+from typing import Dict, List
+import re
+
+# Keywords that end the operand of a postfix predicate such as IS NULL
+BOUNDARY_WORDS = ('AND', 'OR', 'NOT', 'CASE', 'WHEN', 'THEN', 'ELSE', 'END', 'WHERE', 'ON', 'HAVING', 'SELECT', 'RETURN')
+
+
+class NullRewriter:
+    """Rewrites NULL handling constructs in one left-to-right pass.
+
+    Rules map either a function name to a template over its arguments ({0}, {1}, ... or
+    {args} for all of them), or a postfix predicate such as 'IS NOT NULL' to a template
+    over its operand ({0}). Arguments are split on top-level commas, so nested calls and
+    parentheses are handled, and rewrites apply inside arguments before the outer template.
+    The operand of a postfix predicate extends back to the nearest comparison or logical
+    operator, comma or opening parenthesis.
+    """
+
+    def __init__(self, rules: Dict[str, str]):
+        self.function_rules = {}
+        self.postfix_rules = {}
+        for source, template in rules.items():
+            words = source.split()
+            if len(words) > 1:
+                self.postfix_rules[' '.join(words).upper()] = template
+            else:
+                self.function_rules[source.upper()] = template
+        # Substring prefilter: much cheaper than a case-insensitive regex scan on expressions without NULL handling
+        self.trigger_words = frozenset(
+            [phrase.split()[-1].lower() for phrase in self.postfix_rules] +
+            [name.lower() for name in self.function_rules]
+        )
+        self.pattern = self._compile_pattern()
+
+    def _compile_pattern(self) -> re.Pattern:
+        # Longest first so IS NOT NULL wins over IS NULL
+        phrases = sorted(self.postfix_rules, key=len, reverse=True)
+        postfix = '|'.join(r'\s+'.join(map(re.escape, phrase.split())) for phrase in phrases) or '(?!)'
+        names = '|'.join(sorted(map(re.escape, self.function_rules), key=len, reverse=True)) or '(?!)'
+        boundary_words = '|'.join(BOUNDARY_WORDS)
+        stop = rf'\b(?:{postfix})\b|\b(?:{names})\s*\(|\b(?:{boundary_words})\b'
+        # Everything between the tokens the rewriter acts on is collected into one atom
+        return re.compile(rf"""
+            (?P<string>'(?:[^']|'')*'?|"(?:[^"]|"")*"?)
+          | (?P<postfix>\b(?:{postfix})\b)
+          | (?P<call>\b(?:{names})\s*\()
+          | (?P<open>\()
+          | (?P<close>\))
+          | (?P<comma>,)
+          | (?P<boundary>\b(?:{boundary_words})\b|[=<>&|!]+)
+          | (?P<atom>(?:(?!{stop})(?:[A-Za-z0-9_.]*\[[^\]]*\]|[A-Za-z0-9_.]+|[^A-Za-z0-9_.'"(),=<>&|!]))+)
+        """, re.IGNORECASE | re.VERBOSE | re.DOTALL)
+
+    def rewrite(self, expression: str) -> str:
+        """Apply the NULL rules to an expression"""
+        lowered = expression.lower()
+        if not any(word in lowered for word in self.trigger_words):
+            return expression
+
+        # Open parentheses and calls, innermost last, so nesting depth is not limited by recursion
+        top = _Frame(None)
+        stack = [top]
+        for match in self.pattern.finditer(expression):
+            kind = match.lastgroup
+            text = match.group()
+            frame = stack[-1]
+            if kind == 'open':
+                stack.append(_Frame('('))
+            elif kind == 'call':
+                stack.append(_Frame(text))
+            elif kind in ('close', 'comma') and frame is top:
+                # Unbalanced ')' or a top-level comma: keep it and carry on
+                frame.units.append(text)
+                frame.operand_start = len(frame.units)
+            elif kind == 'comma':
+                frame.end_argument()
+            elif kind == 'close':
+                stack.pop()
+                stack[-1].units.append(self._close(frame, closed=True))
+            elif kind == 'postfix':
+                frame.apply_postfix(self.postfix_rules[' '.join(text.split()).upper()], text)
+            else:
+                frame.units.append(text)
+                if kind == 'boundary':
+                    frame.operand_start = len(frame.units)
+
+        # Groups and calls still open at the end are kept without their ')'
+        while len(stack) > 1:
+            frame = stack.pop()
+            stack[-1].units.append(self._close(frame, closed=False))
+        return ''.join(top.units)
+
+    def _close(self, frame: '_Frame', closed: bool) -> str:
+        """Return the text of a group, or of a call rewritten by its rule, its arguments rewritten first"""
+        frame.end_argument()
+        arguments = frame.arguments
+        original = frame.opener + ','.join(arguments) + (')' if closed else '')
+        if frame.opener == '(' or not closed:
+            return original
+
+        template = self.function_rules[frame.opener.rstrip('(').strip().upper()]
+        stripped = [argument.strip() for argument in arguments]
+        try:
+            return template.format(*stripped, args=', '.join(stripped))
+        except IndexError:
+            # Fewer arguments than the template expects: leave the call unchanged
+            return original
+
+
+class _Frame:
+    """Output of a parenthesized group or call being rewritten (or of the whole expression)"""
+    __slots__ = ('opener', 'arguments', 'units', 'operand_start')
+
+    def __init__(self, opener):
+        # '(' for a group, the call text (e.g. 'ISNULL(') for a call
+        self.opener = opener
+        self.arguments: List[str] = []
+        # Output units of the current argument; a nested group or rewritten call is one unit
+        self.units: List[str] = []
+        # Where the operand of a postfix predicate starts: after the last boundary
+        self.operand_start = 0
+
+    def end_argument(self) -> None:
+        self.arguments.append(''.join(self.units))
+        self.units = []
+        self.operand_start = 0
+
+    def apply_postfix(self, template: str, text: str) -> None:
+        """Rewrite the operand collected since the last boundary with a postfix rule"""
+        operand = ''.join(self.units[self.operand_start:])
+        if operand.strip():
+            del self.units[self.operand_start:]
+            self.units.append(operand[:len(operand) - len(operand.lstrip())])
+            self.units.append(template.format(operand.strip()))
+        else:
+            self.units.append(text)
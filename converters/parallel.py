@@ -0,0 +1,104 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+import atexit
+import multiprocessing
+import os
+import threading
+from .batch import convert_item
+from .registry import get_converter
+
+# Worker processes for batches and for the statements of large scripts (1 converts in the calling process)
+CONVERSION_WORKERS = int(os.environ.get("CONVERSION_WORKERS", "1"))
+CONVERSION_CHUNK_SIZE = int(os.environ.get("CONVERSION_CHUNK_SIZE", "0")) or None
+
+# Scripts at least this many characters long are converted statement by statement across the workers
+PARALLEL_MIN_SIZE = int(os.environ.get("PARALLEL_MIN_SIZE", str(64 << 10)))
+
+_executor = None
+_executor_workers = 0
+_executor_lock = threading.Lock()
+
+
+def default_workers() -> int:
+    """Number of worker processes to use when none is configured"""
+    return os.cpu_count() or 1
+
+
+def _mp_context() -> multiprocessing.context.BaseContext:
+    """Start workers from a clean process rather than a fork of the server, whose threads and locks they would copy"""
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('forkserver')
+    return multiprocessing.get_context('spawn')
+
+
+def get_executor(workers: int) -> ProcessPoolExecutor:
+    """Return a shared process pool, recreating it if the worker count changed.
+
+    Callers pass their configured worker count, not one derived from the size of the work,
+    so the pool is not shut down and rebuilt between batches of different sizes.
+    """
+    global _executor, _executor_workers
+    with _executor_lock:
+        if _executor is None or _executor_workers != workers:
+            if _executor is not None:
+                _executor.shutdown(wait=True)
+            _executor = ProcessPoolExecutor(max_workers=workers, mp_context=_mp_context())
+            _executor_workers = workers
+        return _executor
+
+
+@atexit.register
+def shutdown_executor():
+    """Stop the shared process pool"""
+    global _executor, _executor_workers
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+            _executor_workers = 0
+
+
+def resolve_chunk_size(item_count: int, workers: int, chunk_size: Optional[int]) -> int:
+    """Pick a chunk size giving each worker a few chunks to balance uneven items"""
+    if chunk_size and chunk_size > 0:
+        return chunk_size
+    return max(1, item_count // (workers * 4))
+
+
+def convert_items_parallel(items: List[Dict[str, Any]], workers: Optional[int] = None,
+                           chunk_size: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Convert batch items across a pool of worker processes, keeping input order"""
+    if workers is None:
+        workers = default_workers()
+
+    # A single item gains nothing from a worker process
+    if workers <= 1 or len(items) <= 1:
+        return [convert_item(item) for item in items]
+
+    executor = get_executor(workers)
+    chunk_size = resolve_chunk_size(len(items), workers, chunk_size)
+    # Each worker process builds its converters once through the registry.
+    # Executor.map yields results in submission order, so output is deterministic.
+    return list(executor.map(convert_item, items, chunksize=chunk_size))
+
+
+def _convert_chunk(task: Tuple[str, str, bool]) -> Dict[str, Any]:
+    """Convert one statement or expression in a worker process"""
+    conversion_type, chunk, include_objects = task
+    return get_converter(conversion_type).convert(chunk, include_objects)
+
+
+def convert_chunks_parallel(conversion_type: str, chunks: List[str], include_objects: bool = True,
+                            workers: Optional[int] = None, chunk_size: Optional[int] = None
+                            ) -> Iterator[Dict[str, Any]]:
+    """Convert the statements or expressions of one script across the worker processes.
+
+    Results are yielded in input order as they arrive; a failed conversion raises its error.
+    """
+    if workers is None:
+        workers = default_workers()
+    tasks = [(conversion_type, chunk, include_objects) for chunk in chunks]
+    if workers <= 1 or len(tasks) <= 1:
+        return map(_convert_chunk, tasks)
+    chunk_size = resolve_chunk_size(len(tasks), workers, chunk_size)
+    return get_executor(workers).map(_convert_chunk, tasks, chunksize=chunk_size)
@@ -0,0 +1,179 @@
+from typing import Dict, Any, Callable, Optional
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+_MISSING = object()
+
+
+class SQLiteConnections:
+    """One autocommit connection per thread to a SQLite file in WAL mode, reopened after a fork (gunicorn preloads the app)"""
+
+    def __init__(self, path: str, timeout: float = 1.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def get(self) -> sqlite3.Connection:
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None,
+                                         check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+
+class SQLiteCache:
+    """Persistent bounded cache of JSON-serializable values in a local SQLite file.
+
+    Every process opening the same file shares its entries, so gunicorn workers see each
+    other's results and a restarted worker starts warm. Once the table holds more than
+    max_size entries the least recently used ones are deleted. Database errors (a locked
+    or read-only file, a full disk) are logged and treated as misses; they never fail the caller.
+    """
+
+    # Seconds between last-used updates of an entry, so hot entries don't cost a write per hit
+    touch_interval = 60.0
+    # Puts between size checks; the table may exceed max_size by this many entries
+    evict_interval = 64
+
+    def __init__(self, path: str, max_size: int = 100000, timeout: float = 1.0):
+        self.path = path
+        self.max_size = max_size
+        self.timeout = timeout
+        self._connections = SQLiteConnections(path, timeout)
+        self._lock = threading.Lock()
+        self._puts_since_evict = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.enabled = True
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            connection = self._connection()
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS entries '
+                '(key TEXT PRIMARY KEY, value TEXT NOT NULL, last_used REAL NOT NULL)'
+            )
+            connection.execute('CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)')
+        except (OSError, sqlite3.Error) as e:
+            logging.error(f"Persistent cache disabled, cannot open {path}: {str(e)}")
+            self.enabled = False
+
+    def _connection(self) -> sqlite3.Connection:
+        return self._connections.get()
+
+    def _count(self, counter: str, amount: int = 1) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the stored value, or default if it is missing or unreadable"""
+        if not self.enabled:
+            return default
+        try:
+            connection = self._connection()
+            row = connection.execute('SELECT value, last_used FROM entries WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                self._count('misses')
+                return default
+            now = time.time()
+            if row[1] < now - self.touch_interval:
+                connection.execute('UPDATE entries SET last_used = ? WHERE key = ?', (now, key))
+            value = json.loads(row[0])
+        except (sqlite3.Error, ValueError) as e:
+            logging.error(f"Persistent cache read error: {str(e)}")
+            self._count('misses')
+            return default
+        self._count('hits')
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        """Store a value, evicting least recently used entries when the table is over max_size"""
+        if not self.enabled or self.max_size <= 0:
+            return
+        try:
+            data = json.dumps(value)
+            connection = self._connection()
+            connection.execute('INSERT OR REPLACE INTO entries (key, value, last_used) VALUES (?, ?, ?)',
+                               (key, data, time.time()))
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logging.error(f"Persistent cache write error: {str(e)}")
+            return
+
+        with self._lock:
+            self._puts_since_evict += 1
+            due = self._puts_since_evict >= self.evict_interval
+            if due:
+                self._puts_since_evict = 0
+        if due:
+            self._evict()
+
+    def _evict(self) -> None:
+        try:
+            connection = self._connection()
+            excess = connection.execute('SELECT COUNT(*) FROM entries').fetchone()[0] - self.max_size
+            if excess > 0:
+                connection.execute(
+                    'DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY last_used LIMIT ?)',
+                    (excess,)
+                )
+                self._count('evictions', excess)
+        except sqlite3.Error as e:
+            logging.error(f"Persistent cache eviction error: {str(e)}")
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        """Return the stored value, computing and storing it on a miss"""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self) -> None:
+        """Delete all entries (for every process sharing the file) and reset the counters"""
+        if self.enabled:
+            try:
+                self._connection().execute('DELETE FROM entries')
+            except sqlite3.Error as e:
+                logging.error(f"Persistent cache clear error: {str(e)}")
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def __len__(self) -> int:
+        if not self.enabled:
+            return 0
+        try:
+            return self._connection().execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+        except sqlite3.Error:
+            return 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return size and this process's hit/miss counters"""
+        size = len(self)
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': size,
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+
+def open_persistent_cache(path: Optional[str], max_size: int) -> Optional[SQLiteCache]:
+    """Open the persistent cache at path, or return None when no path is configured or it cannot be opened"""
+    if not path:
+        return None
+    cache = SQLiteCache(path, max_size=max_size)
+    return cache if cache.enabled else None
@@ -0,0 +1,48 @@
+from typing import Dict, Optional
+import threading
+from metrics import register_cache
+from .base_converter import BaseConverter
+from .sql_to_dax import SQLToDaxConverter
+from .spotfire_to_dax import SpotfireToDaxConverter
+from .schema import get_schema
+
+CONVERTER_CLASSES = {
+    'sql_to_dax': SQLToDaxConverter,
+    'spotfire_to_dax': SpotfireToDaxConverter
+}
+
+# One converter per conversion type per process. Converters and their parsers keep no
+# per-call state, so a single instance can serve concurrent requests from many threads.
+_converters: Dict[str, BaseConverter] = {}
+_lock = threading.Lock()
+
+
+def create_converter(conversion_type: str) -> Optional[BaseConverter]:
+    """Create a new converter for a conversion type, or None if the type is unknown"""
+    converter_class = CONVERTER_CLASSES.get(conversion_type)
+    if converter_class is None:
+        return None
+    return converter_class(schema=get_schema())
+
+
+def get_converter(conversion_type: str) -> Optional[BaseConverter]:
+    """Return the shared converter for a conversion type, building it on first use"""
+    converter = _converters.get(conversion_type)
+    if converter is not None:
+        return converter
+    
+    with _lock:
+        # Another thread may have built it while we waited for the lock
+        converter = _converters.get(conversion_type)
+        if converter is None:
+            converter = create_converter(conversion_type)
+            if converter is not None:
+                _converters[conversion_type] = converter
+                register_cache(f'parse_{conversion_type}', converter.parse_cache)
+        return converter
+
+
+def reset_converters() -> None:
+    """Drop the shared converters so they are rebuilt on next use"""
+    with _lock:
+        _converters.clear()
@@ -0,0 +1,80 @@
+from dataclasses import dataclass
+from typing import Dict, List, Iterable, NamedTuple, Optional, Tuple
+from collections import deque
+
+
+@dataclass(frozen=True)
+class Relationship:
+    """A model relationship from a many-side column to a one-side column"""
+    from_table: str
+    from_column: str
+    to_table: str
+    to_column: str
+    active: bool = True
+    both_directions: bool = False
+
+
+class Step(NamedTuple):
+    """One hop along a relationship, from one table to the related table"""
+    from_table: str
+    to_table: str
+    relationship: Relationship
+    # True when moving from the many side to the one side (the direction RELATED follows)
+    to_one: bool
+
+
+class RelationshipGraph:
+    """Undirected graph of a model's active relationships with memoized shortest paths.
+
+    The first lookup from a table runs one breadth-first search that records the path to
+    every table reachable from it; later lookups from that table are dictionary hits.
+    """
+
+    def __init__(self, relationships: Iterable[Relationship]):
+        self._edges: Dict[str, List[Step]] = {}
+        for relationship in relationships:
+            # Inactive relationships only apply through USERELATIONSHIP, so they are not followed
+            if not relationship.active:
+                continue
+            self._edges.setdefault(relationship.from_table, []).append(
+                Step(relationship.from_table, relationship.to_table, relationship, True))
+            self._edges.setdefault(relationship.to_table, []).append(
+                Step(relationship.to_table, relationship.from_table, relationship, False))
+        self._paths: Dict[str, Dict[str, Tuple[Step, ...]]] = {}
+
+    def path(self, source: str, target: str) -> Optional[Tuple[Step, ...]]:
+        """Shortest chain of relationships from source to target: () for the same table, None if unrelated"""
+        if source == target:
+            return ()
+        paths = self._paths.get(source)
+        if paths is None:
+            # Computed without a lock: concurrent searches from the same table produce equal results
+            paths = self._search(source)
+            self._paths[source] = paths
+        return paths.get(target)
+
+    def _search(self, source: str) -> Dict[str, Tuple[Step, ...]]:
+        paths = {source: ()}
+        queue = deque([source])
+        while queue:
+            table = queue.popleft()
+            for step in self._edges.get(table, ()):
+                if step.to_table not in paths:
+                    paths[step.to_table] = paths[table] + (step,)
+                    queue.append(step.to_table)
+        return paths
+
+
+def is_to_one(path: Tuple[Step, ...]) -> bool:
+    """Whether every step goes from the many side to the one side, so RELATED can follow the path"""
+    return all(step.to_one for step in path)
+
+
+def is_to_many(path: Tuple[Step, ...]) -> bool:
+    """Whether every step goes from the one side to the many side, so RELATEDTABLE can follow the path"""
+    return all(not step.to_one for step in path)
+
+
+def propagates_filters(path: Tuple[Step, ...]) -> bool:
+    """Whether filters on the last table of the path reach the first through the relationships"""
+    return all(step.to_one or step.relationship.both_directions for step in path)
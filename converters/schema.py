@@ -0,0 +1,176 @@
+"""Data-model schema (tables, columns, relationships) indexed for constant-time table lookups.
+
+A schema is read from JSON in either of two shapes:
+
+- a plain description: {"tables": [{"name": "Sales", "columns": ["Amount", ...], "aliases": ["dbo.FactSales"]}],
+  "relationships": [{"fromTable": "Sales", "fromColumn": "ProductKey", "toTable": "Product", "toColumn": "ProductKey"}]}
+- a Tabular model: a .bim file or a TMSL createOrReplace script, whose model holds tables and relationships
+  in the same form with columns given as objects ({"name": ...}).
+"""
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+import hashlib
+import json
+import logging
+import os
+import threading
+from .relationships import Relationship, RelationshipGraph
+
+
+# SQL identifier quoting characters, removed before lookups
+_QUOTES = str.maketrans('', '', '[]"`')
+
+
+def _normalize_name(name: str) -> str:
+    """Lower-case a table or column name and drop SQL quoting"""
+    return name.translate(_QUOTES).strip().lower()
+
+
+class SchemaIndex:
+    """Tables and columns of a data model, with hash maps from column names and table aliases to tables"""
+
+    def __init__(self, tables: Dict[str, List[str]], relationships: Iterable[Relationship] = (),
+                 aliases: Optional[Dict[str, str]] = None):
+        self.tables = {name: list(columns) for name, columns in tables.items()}
+        self.relationships = list(relationships)
+        self.graph = RelationshipGraph(self.relationships)
+        self._table_names = {}
+        self._tables_by_column = {}
+        self._column_names = {}
+
+        for table, columns in self.tables.items():
+            self._table_names[_normalize_name(table)] = table
+            for column in columns:
+                key = _normalize_name(column)
+                self._tables_by_column.setdefault(key, []).append(table)
+                self._column_names[(table, key)] = column
+        for alias, table in (aliases or {}).items():
+            if table in self.tables:
+                key = _normalize_name(alias)
+                self._table_names.setdefault(key, table)
+                # The SQL parser drops schema prefixes, so dbo.FactSales is also looked up as FactSales
+                if '.' in key:
+                    self._table_names.setdefault(key.rsplit('.', 1)[1], table)
+        self._tables_by_column = {column: tuple(tables) for column, tables in self._tables_by_column.items()}
+
+        # Identifies the schema content in cache keys, so results computed against another schema are not reused
+        content = json.dumps([self.tables, sorted(self._table_names.items()),
+                              [list(vars(relationship).values()) for relationship in self.relationships]])
+        self.digest = hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    def table_name(self, name: str) -> Optional[str]:
+        """Return the model table for a table name or alias, ignoring case, quoting and a schema prefix"""
+        key = _normalize_name(name)
+        table = self._table_names.get(key)
+        if table is None and '.' in key:
+            table = self._table_names.get(_normalize_name(key.rsplit('.', 1)[1]))
+        return table
+
+    def tables_with_column(self, column: str) -> Tuple[str, ...]:
+        """Return the tables that have a column of this name, in schema order"""
+        return self._tables_by_column.get(_normalize_name(column), ())
+
+    def resolve(self, column: str, table: Optional[str] = None, candidates: Iterable[str] = (),
+                default: Optional[str] = None) -> Tuple[Optional[str], str]:
+        """Return the model table and column name for a column reference.
+
+        An explicit table known to the schema (by name or alias) wins. Otherwise the first of
+        the candidate tables (e.g. the tables of a FROM clause) holding the column is used, then
+        the only table in the model holding it. Failing that the explicit table, or else the
+        default table, is returned with the column name unchanged.
+        """
+        if table:
+            resolved = self.table_name(table)
+            if resolved is not None:
+                return resolved, self.column_name(resolved, column)
+            # A source table missing from the model: fall back to the column lookup
+            default = table
+
+        tables = self.tables_with_column(column)
+        if tables:
+            for candidate in candidates:
+                resolved = self.table_name(candidate)
+                if resolved in tables:
+                    return resolved, self.column_name(resolved, column)
+            if len(tables) == 1:
+                return tables[0], self.column_name(tables[0], column)
+
+        if default:
+            return self.table_name(default) or default, column
+        return None, column
+
+    def has_column(self, table: str, column: str) -> bool:
+        """Whether the model table has a column of this name"""
+        return (table, _normalize_name(column)) in self._column_names
+
+    def column_name(self, table: str, column: str) -> str:
+        """Return the column's name as written in the schema, or the given name if the table lacks it"""
+        return self._column_names.get((table, _normalize_name(column)), column)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'SchemaIndex':
+        """Build an index from a plain schema description, a .bim model or a TMSL script"""
+        model = data
+        if 'createOrReplace' in model:
+            model = model['createOrReplace'].get('database', {})
+        if 'model' in model:
+            model = model['model']
+
+        tables = {}
+        aliases = dict(model.get('aliases', {}))
+        for table in model.get('tables', []):
+            columns = []
+            for column in table.get('columns', []):
+                columns.append(column['name'] if isinstance(column, dict) else column)
+            # Hidden row-number columns of Tabular models are never referenced by source queries
+            tables[table['name']] = [column for column in columns if not column.startswith('RowNumber-')]
+            for alias in table.get('aliases', []):
+                aliases[alias] = table['name']
+
+        relationships = [
+            Relationship(
+                relationship['fromTable'], relationship['fromColumn'],
+                relationship['toTable'], relationship['toColumn'],
+                active=relationship.get('isActive', True),
+                both_directions=relationship.get('crossFilteringBehavior') == 'bothDirections'
+            )
+            for relationship in model.get('relationships', [])
+        ]
+        return cls(tables, relationships, aliases)
+
+    @classmethod
+    def from_file(cls, path: str) -> 'SchemaIndex':
+        """Read a schema from a JSON, .bim or TMSL file"""
+        # .bim files written by Visual Studio start with a byte order mark
+        with open(path, 'r', encoding='utf-8-sig') as schema_file:
+            return cls.from_dict(json.load(schema_file))
+
+
+_schema = None
+_schema_loaded = False
+_lock = threading.Lock()
+
+
+def get_schema() -> Optional[SchemaIndex]:
+    """Return the schema named by SCHEMA_PATH, read once per process, or None if none is configured"""
+    global _schema, _schema_loaded
+    if _schema_loaded:
+        return _schema
+
+    with _lock:
+        if not _schema_loaded:
+            path = os.environ.get("SCHEMA_PATH")
+            if path:
+                try:
+                    _schema = SchemaIndex.from_file(path)
+                except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+                    logging.error(f"Could not load schema from {path}: {str(e)}")
+            _schema_loaded = True
+        return _schema
+
+
+def reset_schema() -> None:
+    """Forget the loaded schema so the next get_schema() reads SCHEMA_PATH again"""
+    global _schema, _schema_loaded
+    with _lock:
+        _schema = None
+        _schema_loaded = False
@@ -1,13 +1,16 @@
 from .base_converter import BaseConverter
 from parsers.spotfire_parser import SpotfireParser
-from typing import Dict, List, Any
+from parsers.nodes import AggregationExpression, CalculationExpression, ConditionalExpression
+from .dax_optimizer import filter_arguments
+from .schema import SchemaIndex
+from typing import Dict, List, Any, Iterator, Optional, TextIO, Tuple
 import re
 
 class SpotfireToDaxConverter(BaseConverter):
     """Converter for Spotfire expressions to DAX"""
     
-    def __init__(self):
-        super().__init__()
+    def __init__(self, schema: Optional[SchemaIndex] = None):
+        super().__init__(schema)
         self.spotfire_parser = SpotfireParser()
     
     def _get_data_type_mappings(self) -> Dict[str, str]:
@@ -98,82 +101,101 @@ class SpotfireToDaxConverter(BaseConverter):
     def _get_null_handling_rules(self) -> Dict[str, str]:
         """Spotfire NULL handling to DAX conversion rules"""
         return {
-            r'IsNull\s*\(([^)]+)\)': r'ISBLANK(\1)',
-            r'IsEmpty\s*\(([^)]+)\)': r'ISBLANK(\1)',
-            r'IfNull\s*\(([^,]+),([^)]+)\)': r'IF(ISBLANK(\1), \2, \1)',
-            r'NullIf\s*\(([^,]+),([^)]+)\)': r'IF(\1 = \2, BLANK(), \1)',
-            r'Coalesce\s*\(([^)]+)\)': r'COALESCE(\1)'
+            'IsNull': 'ISBLANK({0})',
+            'IsEmpty': 'ISBLANK({0})',
+            'IfNull': 'IF(ISBLANK({0}), {1}, {0})',
+            'NullIf': 'IF({0} = {1}, BLANK(), {0})',
+            'Coalesce': 'COALESCE({args})'
         }
     
     def parse_code(self, code: str) -> Dict[str, Any]:
         """Parse Spotfire expression code"""
         return self.spotfire_parser.parse(code)
     
-    def convert_to_dax(self, parsed_code: Dict[str, Any]) -> str:
+    def identify_objects(self, code: str) -> Dict[str, List[str]]:
+        """Identify columns and functions in Spotfire code"""
+        return self.spotfire_parser.identify_objects(code)
+    
+    def check_structure(self, code: str) -> Dict[str, List[str]]:
+        """Check Spotfire expressions structure without parsing"""
+        return self.spotfire_parser.check_structure(code)
+    
+    def iter_source_chunks(self, stream: TextIO) -> Iterator[str]:
+        """Read Spotfire expressions from a stream line by line"""
+        return self.spotfire_parser.iter_expressions(stream)
+    
+    def split_source_lines(self, source_code: str) -> List[Tuple[int, str]]:
+        """Split Spotfire code into expressions, each with the number of the line it starts on"""
+        return list(self.spotfire_parser.iter_numbered_expressions(source_code.split('\n')))
+    
+    def convert_to_dax(self, parsed_code: Dict[str, Any], warnings: Optional[List[str]] = None) -> str:
         """Convert parsed Spotfire expression to DAX"""
         try:
             expressions = parsed_code.get('expressions', [])
             converted_expressions = []
             
             for expr in expressions:
-                if expr['type'] == 'AGGREGATION':
+                if expr.type == 'AGGREGATION':
                     dax_expr = self._convert_aggregation_expression(expr)
                     converted_expressions.append(dax_expr)
-                elif expr['type'] == 'CALCULATION':
+                elif expr.type == 'CALCULATION':
                     dax_expr = self._convert_calculation_expression(expr)
                     converted_expressions.append(dax_expr)
-                elif expr['type'] == 'CONDITIONAL':
+                elif expr.type == 'CONDITIONAL':
                     dax_expr = self._convert_conditional_expression(expr)
                     converted_expressions.append(dax_expr)
                 else:
-                    converted_expressions.append(f"-- Unsupported expression type: {expr['type']}")
+                    converted_expressions.append(f"-- Unsupported expression type: {expr.type}")
             
             return '\n\n'.join(converted_expressions)
             
         except Exception as e:
             raise Exception(f"DAX conversion failed: {str(e)}")
     
-    def _convert_aggregation_expression(self, expr: Dict[str, Any]) -> str:
+    def _convert_aggregation_expression(self, expr: AggregationExpression) -> str:
         """Convert Spotfire aggregation to DAX measure"""
-        function = self.convert_function(expr['function'])
-        column = expr['column']
-        table = expr.get('table', 'Table')
+        function = self.convert_function(expr.function)
+        table, column = self._resolve_column(expr.column, expr.table)
         
-        # Handle aggregation context
-        over_clause = expr.get('over_clause', '')
+        # The OVER context and WHERE conditions become filter arguments of CALCULATE
+        filters = []
+        over_clause = expr.over_clause
         if over_clause:
             # Convert OVER clause to appropriate DAX context
             context_expr = self._convert_over_clause_to_context(over_clause, table)
             if context_expr:
-                return f"{function}({table}[{column}], {context_expr})"
+                filters.append(context_expr)
         
         # Handle WHERE conditions in aggregation
-        where_condition = expr.get('where_condition', '')
+        where_condition = expr.where_condition
         if where_condition:
-            filter_expr = self._convert_spotfire_condition_to_filter(where_condition, table)
-            return f"{function}({table}[{column}], {filter_expr})"
+            filters.extend(self._convert_spotfire_condition_to_filters(where_condition, table))
         
+        if filters:
+            return f"CALCULATE({function}({table}[{column}]), {', '.join(filters)})"
         return f"{function}({table}[{column}])"
     
-    def _convert_calculation_expression(self, expr: Dict[str, Any]) -> str:
+    def _convert_calculation_expression(self, expr: CalculationExpression) -> str:
         """Convert Spotfire calculation to DAX calculated column"""
-        expression = expr['expression']
-        table = expr.get('table', 'Table')
+        expression = expr.expression
+        table = expr.table
         
         # Convert the expression
         dax_expr = self._convert_spotfire_expression_to_dax(expression, table)
         
         return dax_expr
     
-    def _convert_conditional_expression(self, expr: Dict[str, Any]) -> str:
+    def _convert_conditional_expression(self, expr: ConditionalExpression) -> str:
         """Convert Spotfire conditional expression to DAX"""
-        condition_type = expr.get('condition_type', 'IF')
+        condition_type = expr.condition_type
         
         if condition_type.upper() == 'IF':
-            condition = expr['condition']
-            true_value = expr['true_value']
-            false_value = expr.get('false_value', 'BLANK()')
-            table = expr.get('table', 'Table')
+            if expr.condition is None:
+                raise ValueError(f"Could not parse If expression: {expr.original}")
+            condition = expr.condition
+            true_value = expr.true_value
+            false_value = expr.false_value if expr.false_value is not None else 'BLANK()'
+            table = 'Table'
             
             # Convert condition and values
             dax_condition = self._convert_spotfire_expression_to_dax(condition, table)
@@ -187,10 +209,10 @@ class SpotfireToDaxConverter(BaseConverter):
         
         return "-- Unsupported conditional type"
     
-    def _convert_case_expression(self, expr: Dict[str, Any]) -> str:
+    def _convert_case_expression(self, expr: ConditionalExpression) -> str:
         """Convert Spotfire CASE expression to DAX SWITCH"""
-        cases = expr.get('cases', [])
-        table = expr.get('table', 'Table')
+        cases = expr.cases or []
+        table = 'Table'
         
         if not cases:
             return "BLANK()"
@@ -199,12 +221,12 @@ class SpotfireToDaxConverter(BaseConverter):
         switch_parts = []
         
         for case in cases:
-            condition = self._convert_spotfire_expression_to_dax(case['condition'], table)
-            value = self._convert_spotfire_expression_to_dax(case['value'], table)
+            condition = self._convert_spotfire_expression_to_dax(case.condition, table)
+            value = self._convert_spotfire_expression_to_dax(case.value, table)
             switch_parts.extend([condition, value])
         
         # Add default case if exists
-        default_value = expr.get('default_value')
+        default_value = expr.default_value
         if default_value:
             default_dax = self._convert_spotfire_expression_to_dax(default_value, table)
             switch_parts.append(default_dax)
@@ -213,6 +235,13 @@ class SpotfireToDaxConverter(BaseConverter):
         
         return f"SWITCH(TRUE(), {', '.join(switch_parts)})"
     
+    def _resolve_column(self, column: str, table: str) -> Tuple[str, str]:
+        """Return the table and column for a [Column] reference, looking the column up in the schema if there is one"""
+        if self.schema is None:
+            return table, column
+        resolved_table, column = self.schema.resolve(column, default=table)
+        return resolved_table or table, column
+    
     def _convert_over_clause_to_context(self, over_clause: str, table: str) -> str:
         """Convert Spotfire OVER clause to DAX context"""
         # This is a simplified conversion - real implementation would need more parsing
@@ -221,16 +250,16 @@ class SpotfireToDaxConverter(BaseConverter):
             partition_match = re.search(r'PARTITION\s+BY\s+(.+?)(?:\s+ORDER\s+BY|$)', over_clause, re.IGNORECASE)
             if partition_match:
                 partition_cols = partition_match.group(1).split(',')
-                partition_cols = [col.strip() for col in partition_cols]
+                partition_cols = [col.strip().strip("[]") for col in partition_cols]
                 filter_conditions = [f"{table}[{col}] = EARLIER({table}[{col}])" for col in partition_cols]
                 return f"FILTER({table}, {' && '.join(filter_conditions)})"
         
         return ""
     
-    def _convert_spotfire_condition_to_filter(self, condition: str, table: str) -> str:
-        """Convert Spotfire condition to DAX FILTER expression"""
+    def _convert_spotfire_condition_to_filters(self, condition: str, table: str) -> List[str]:
+        """Convert Spotfire condition to CALCULATE filter arguments, using FILTER only for terms that are not column predicates"""
         dax_condition = self._convert_spotfire_expression_to_dax(condition, table)
-        return f"FILTER({table}, {dax_condition})"
+        return filter_arguments(table, dax_condition)
     
     def _convert_spotfire_expression_to_dax(self, expression: str, table: str) -> str:
         """Convert Spotfire expression to DAX expression"""
@@ -240,17 +269,13 @@ class SpotfireToDaxConverter(BaseConverter):
         dax_expr = expression
         
         # Convert functions
-        for spotfire_func, dax_func in self.function_mappings.items():
-            pattern = rf'\b{spotfire_func}\s*\('
-            replacement = f'{dax_func}('
-            dax_expr = re.sub(pattern, replacement, dax_expr, flags=re.IGNORECASE)
+        dax_expr = self.convert_function_calls(dax_expr)
         
         # Convert column references - Spotfire uses [Column] format
         # Convert to Table[Column] format
         column_pattern = r'\[([^\]]+)\]'
         def replace_column(match):
-            column = match.group(1)
-            return f'{table}[{column}]'
+            return '{}[{}]'.format(*self._resolve_column(match.group(1), table))
         
         dax_expr = re.sub(column_pattern, replace_column, dax_expr)
         
@@ -1,13 +1,72 @@
 from .base_converter import BaseConverter
 from parsers.sql_parser import SQLParser
-from typing import Dict, List, Any
+from parsers.sql_ast import iter_statement_spans, split_statement_texts
+from parsers.sql_stream import iter_sql_statements
+from parsers.nodes import Join, SelectStatement
+from .schema import SchemaIndex
+from .dax_optimizer import filter_arguments
+from .relationships import is_to_many, is_to_one, propagates_filters
+from typing import Dict, List, Any, Callable, Iterator, Optional, TextIO, Tuple, Union
 import re
 
+# Words left as they are when rewriting column references
+SQL_EXPRESSION_KEYWORDS = frozenset({
+    'AND', 'OR', 'NOT', 'CASE', 'WHEN', 'THEN', 'ELSE', 'END',
+    'TRUE', 'FALSE', 'NULL',
+    'IS', 'AS', 'IN', 'EXISTS', 'BETWEEN', 'LIKE', 'DISTINCT'
+})
+
+# Tokens relevant to column rewriting. Already bracketed references are matched whole,
+# so they are never rewritten twice and no lookback over the expression is needed.
+# Type names that are also common column names (date, time) are matched together with
+# the AS before them (CAST(x AS DATE)); elsewhere they are columns.
+COLUMN_REFERENCE_PATTERN = re.compile(r"""
+    (?P<string>'(?:[^']|'')*'?)
+  | (?P<bracketed>(?:[A-Za-z_][A-Za-z0-9_]*)?\[[^\]]*\]?)
+  | (?P<type_name>(?i:AS)\s+(?i:DATE|TIME)(?![A-Za-z0-9_]))
+  | (?P<qualified>[A-Za-z_][A-Za-z0-9_]*(?:\.[A-Za-z_][A-Za-z0-9_]*)+)
+  | (?P<function>[A-Za-z_][A-Za-z0-9_]*)(?=\s*\()
+  | (?P<number>[0-9]+(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?[A-Za-z0-9_]*)
+  | (?P<name>[A-Za-z_][A-Za-z0-9_]*)
+""", re.VERBOSE)
+
+# A JOIN condition term equating two columns, e.g. s.ProductKey = p.ProductKey
+JOIN_KEY_PATTERN = re.compile(r'(?P<left>[\w.\[\]"`]+)\s*=\s*(?P<right>[\w.\[\]"`]+)')
+
+# SQL identifier quoting, removed from JOIN keys
+IDENTIFIER_QUOTES = str.maketrans('', '', '[]"`')
+
+# Operands of BETWEEN and IN: a column, a number or a string
+_OPERAND = r"(?:'(?:[^']|'')*'|-?[0-9]+(?:\.[0-9]+)?|[A-Za-z_][\w.]*|\[[^\]]*\](?:\.\[[^\]]*\])?)"
+
+BETWEEN_PATTERN = re.compile(
+    rf"(?P<operand>{_OPERAND})\s+(?P<negated>NOT\s+)?BETWEEN\s+(?P<low>{_OPERAND})\s+AND\s+(?P<high>{_OPERAND})",
+    re.IGNORECASE)
+
+# IN with a list of values; IN (SELECT ...) is left as it is
+IN_LIST_PATTERN = re.compile(
+    rf"(?P<operand>{_OPERAND})\s+(?P<negated>NOT\s+)?IN\s*\((?!\s*SELECT\b)(?P<values>[^()]*)\)",
+    re.IGNORECASE)
+
+# Strings (left intact apart from quoting) and the SQL operators spelled differently in DAX
+CONDITION_OPERATOR_PATTERN = re.compile(r"""'(?:[^']|'')*'|"(?:[^"]|"")*"|\bAND\b|\bOR\b|!=""", re.IGNORECASE)
+
+SQL_TO_DAX_OPERATORS = {'AND': '&&', 'OR': '||', '!=': '<>'}
+
+INNER_JOIN_TYPES = frozenset({'JOIN', 'INNER JOIN'})
+
+
+def _warn(warnings: List[str], message: str) -> None:
+    """Add a warning once, however many references or statements it applies to"""
+    if message not in warnings:
+        warnings.append(message)
+
+
 class SQLToDaxConverter(BaseConverter):
     """Converter for SQL to DAX"""
     
-    def __init__(self):
-        super().__init__()
+    def __init__(self, schema: Optional[SchemaIndex] = None):
+        super().__init__(schema)
         self.sql_parser = SQLParser()
     
     def _get_data_type_mappings(self) -> Dict[str, str]:
@@ -59,7 +118,6 @@ class SQLToDaxConverter(BaseConverter):
             'trim': 'TRIM',
             'concat': 'CONCATENATE',
             'coalesce': 'COALESCE',
-            'isnull': 'IF',
             'case': 'SWITCH',
             'cast': 'VALUE',
             'convert': 'VALUE',
@@ -77,81 +135,119 @@ class SQLToDaxConverter(BaseConverter):
     def _get_null_handling_rules(self) -> Dict[str, str]:
         """SQL NULL handling to DAX conversion rules"""
         return {
-            r'IS\s+NULL': 'ISBLANK',
-            r'IS\s+NOT\s+NULL': 'NOT(ISBLANK',
-            r'ISNULL\s*\(([^,]+),([^)]+)\)': r'IF(ISBLANK(\1), \2, \1)',
-            r'COALESCE\s*\(([^)]+)\)': r'COALESCE(\1)',
-            r'NULLIF\s*\(([^,]+),([^)]+)\)': r'IF(\1 = \2, BLANK(), \1)'
+            'IS NULL': 'ISBLANK({0})',
+            'IS NOT NULL': 'NOT(ISBLANK({0}))',
+            'ISNULL': 'IF(ISBLANK({0}), {1}, {0})',
+            'COALESCE': 'COALESCE({args})',
+            'NULLIF': 'IF({0} = {1}, BLANK(), {0})'
         }
     
     def parse_code(self, code: str) -> Dict[str, Any]:
         """Parse SQL code"""
         return self.sql_parser.parse(code)
     
-    def convert_to_dax(self, parsed_code: Dict[str, Any]) -> str:
+    def identify_objects(self, code: str) -> Dict[str, List[str]]:
+        """Identify tables, columns, functions and aliases in SQL code"""
+        return self.sql_parser.identify_objects(code)
+    
+    def check_structure(self, code: str) -> Dict[str, List[str]]:
+        """Check SQL structure without parsing"""
+        return self.sql_parser.check_structure(code)
+    
+    def iter_source_chunks(self, stream: TextIO) -> Iterator[Union[str, Exception]]:
+        """Read SQL statements from a stream incrementally, reporting any over MAX_STATEMENT_SIZE"""
+        return iter_sql_statements(stream)
+    
+    def split_source(self, source_code: str) -> List[str]:
+        """Split SQL code already in memory into statements, with no statement size limit"""
+        return split_statement_texts(source_code)
+    
+    def split_source_lines(self, source_code: str) -> List[Tuple[int, str]]:
+        """Split SQL code into statements, each with the number of the line it starts on"""
+        chunks = []
+        line = 1
+        position = 0
+        for start, end, _ in iter_statement_spans(source_code):
+            line += source_code.count('\n', position, start)
+            position = start
+            chunks.append((line, source_code[start:end]))
+        return chunks
+    
+    def convert_to_dax(self, parsed_code: Dict[str, Any], warnings: Optional[List[str]] = None) -> str:
         """Convert parsed SQL to DAX"""
+        if warnings is None:
+            warnings = []
         try:
             statements = parsed_code.get('statements', [])
             converted_statements = []
             
             for statement in statements:
-                if statement['type'] == 'SELECT':
-                    dax_statement = self._convert_select_statement(statement)
+                if statement.type == 'SELECT':
+                    dax_statement = self._convert_select_statement(statement, warnings)
                     converted_statements.append(dax_statement)
-                elif statement['type'] == 'INSERT':
+                elif statement.type == 'INSERT':
                     # DAX doesn't support INSERT directly
                     converted_statements.append("-- INSERT statements not supported in DAX")
-                elif statement['type'] == 'UPDATE':
+                elif statement.type == 'UPDATE':
                     # DAX doesn't support UPDATE directly
                     converted_statements.append("-- UPDATE statements not supported in DAX")
-                elif statement['type'] == 'DELETE':
+                elif statement.type == 'DELETE':
                     # DAX doesn't support DELETE directly
                     converted_statements.append("-- DELETE statements not supported in DAX")
                 else:
-                    converted_statements.append(f"-- Unsupported statement type: {statement['type']}")
+                    converted_statements.append(f"-- Unsupported statement type: {statement.type}")
             
             return '\n\n'.join(converted_statements)
             
         except Exception as e:
             raise Exception(f"DAX conversion failed: {str(e)}")
     
-    def _convert_select_statement(self, statement: Dict[str, Any]) -> str:
+    def _convert_select_statement(self, statement: SelectStatement, warnings: List[str]) -> str:
         """Convert SELECT statement to DAX"""
         dax_parts = []
         
         # Handle aggregations and measures
-        if statement.get('has_aggregation'):
-            return self._convert_to_measure(statement)
+        if statement.has_aggregation:
+            return self._convert_to_measure(statement, warnings)
         else:
-            return self._convert_to_calculated_column(statement)
+            return self._convert_to_calculated_column(statement, warnings)
     
-    def _convert_to_measure(self, statement: Dict[str, Any]) -> str:
+    def _convert_to_measure(self, statement: SelectStatement, warnings: List[str]) -> str:
         """Convert SQL SELECT with aggregation to DAX measure"""
-        select_columns = statement.get('select_columns', [])
-        from_tables = statement.get('from_tables', [])
-        where_clause = statement.get('where_clause', '')
-        group_by = statement.get('group_by', [])
+        select_columns = statement.select_columns
+        from_tables = statement.from_tables
+        where_clause = statement.where_clause
+        group_by = statement.group_by
+        resolve = self._column_resolver(statement)
+        join_keys = self._join_keys(statement, resolve, warnings)
+        # The WHERE filters are the same for every aggregated column, so they are converted once
+        where_filters = []
+        if where_clause:
+            base_table = from_tables[0] if from_tables else 'Table'
+            if self.schema is not None:
+                base_table = self.schema.table_name(base_table) or base_table
+            reference = self._column_reference(statement, resolve, join_keys, warnings)
+            where_filters = self._convert_where_to_filters(where_clause, base_table, reference)
         
         measures = []
         
         for column in select_columns:
-            if column.get('is_aggregation'):
-                function = self.convert_function(column['function'])
-                column_name = column['column']
-                # Clean column name if it has table prefix
-                if '.' in column_name:
-                    column_name = column_name.split('.')[-1]
-                table_name = from_tables[0] if from_tables else 'Table'
+            if column.is_aggregation:
+                function = self.convert_function(column.function)
+                # Split off any table prefix or alias and find the column's table
+                prefix, _, column_name = column.column.rpartition('.')
+                table_name, column_name = resolve(column_name, prefix)
                 
                 # Build measure
-                measure_name = column.get('alias', '').strip()
+                measure_name = column.alias.strip()
                 if not measure_name:
                     measure_name = f"SUM_{column_name}" if function == "SUM" else f"{function}_{column_name}"
                 
-                if where_clause:
-                    # Convert WHERE clause to FILTER
-                    filter_expression = self._convert_where_to_filter(where_clause, table_name)
-                    dax_expression = f"{function}({table_name}[{column_name}], {filter_expression})"
+                # WHERE conditions and INNER JOINs that the model's relationships don't carry
+                # (as TREATAS) become filter arguments of CALCULATE
+                filters = where_filters + self._join_filters(join_keys, table_name)
+                if filters:
+                    dax_expression = f"CALCULATE({function}({table_name}[{column_name}]), {', '.join(filters)})"
                 else:
                     dax_expression = f"{function}({table_name}[{column_name}])"
                 
@@ -159,106 +255,225 @@ class SQLToDaxConverter(BaseConverter):
         
         return '\n'.join(measures)
     
-    def _convert_to_calculated_column(self, statement: Dict[str, Any]) -> str:
+    def _convert_to_calculated_column(self, statement: SelectStatement, warnings: List[str]) -> str:
         """Convert SQL SELECT without aggregation to DAX calculated column"""
-        select_columns = statement.get('select_columns', [])
-        from_tables = statement.get('from_tables', [])
-        where_clause = statement.get('where_clause', '')
+        select_columns = statement.select_columns
+        from_tables = statement.from_tables
+        where_clause = statement.where_clause
         
         if not select_columns:
             return "-- No columns to convert"
         
         table_name = from_tables[0] if from_tables else 'Table'
+        resolve = self._column_resolver(statement)
+        reference = self._column_reference(statement, resolve, self._join_keys(statement, resolve, warnings), warnings)
         calculations = []
         
         for column in select_columns:
             # Check if it's a complex expression or simple column reference
-            if (column.get('expression') and 
-                column['expression'] != column.get('column', '') and
-                not column.get('is_aggregation')):
+            if (column.expression and 
+                column.expression != column.column and
+                not column.is_aggregation):
                 # Handle calculated expressions (when expression differs from column name)
-                expression = column['expression']
-                expression = self._convert_sql_expression_to_dax(expression, table_name)
-                column_name = column.get('alias', 'CalculatedColumn')
+                expression = column.expression
+                expression = self._convert_sql_expression_to_dax(expression, table_name, reference)
+                column_name = column.alias or column.column or 'CalculatedColumn'
                 calculations.append(f"{column_name} = {expression}")
             else:
                 # Simple column reference - convert to proper DAX reference
-                column_name = column['column']
-                # Clean column name if it has table prefix
-                if '.' in column_name:
-                    column_name = column_name.split('.')[-1]
-                alias_name = column.get('alias', '').strip()
+                prefix, _, column_name = column.column.rpartition('.')
+                alias_name = column.alias.strip()
                 if alias_name:
-                    calculations.append(f"{alias_name} = {table_name}[{column_name}]")
+                    calculations.append(f"{alias_name} = {reference(column_name, prefix)}")
                 else:
-                    calculations.append(f"{column_name} = {table_name}[{column_name}]")
+                    calculations.append(f"{column_name} = {reference(column_name, prefix)}")
         
         return '\n'.join(calculations)
     
-    def _convert_where_to_filter(self, where_clause: str, table_name: str) -> str:
-        """Convert SQL WHERE clause to DAX FILTER expression"""
-        # Basic conversion - this would need more sophisticated parsing
-        filter_expr = where_clause
+    def _column_resolver(self, statement: SelectStatement) -> Callable[..., Tuple[str, str]]:
+        """Return a function mapping a column and optional table prefix or alias to its DAX table and column"""
+        default_table = statement.from_tables[0] if statement.from_tables else 'Table'
+        if self.schema is None:
+            # Without a schema every column belongs to the first FROM table
+            return lambda column, prefix='': (default_table, column)
+        
+        schema = self.schema
+        aliases = statement.table_aliases
+        candidates = statement.from_tables
+        def resolve(column: str, prefix: str = '') -> Tuple[str, str]:
+            table = aliases.get(prefix, prefix) if prefix else None
+            return schema.resolve(column, table, candidates, default_table)
+        return resolve
+    
+    def _join_keys(self, statement: SelectStatement, resolve: Callable[..., Tuple[str, str]], warnings: List[str]
+                   ) -> List[Tuple[Join, Tuple[str, str], Tuple[str, str]]]:
+        """Return the column pairs equated by the JOIN conditions, each as resolved (table, column).
+
+        Key columns the schema doesn't have are reported in warnings.
+        """
+        if self.schema is None:
+            return []
         
-        # Convert common patterns
-        filter_expr = re.sub(r'\b(\w+)\s*=\s*(.+)', rf'{table_name}[\1] = \2', filter_expr)
-        filter_expr = re.sub(r'\b(\w+)\s*>\s*(.+)', rf'{table_name}[\1] > \2', filter_expr)
-        filter_expr = re.sub(r'\b(\w+)\s*<\s*(.+)', rf'{table_name}[\1] < \2', filter_expr)
-        filter_expr = re.sub(r'\bAND\b', '&&', filter_expr, flags=re.IGNORECASE)
-        filter_expr = re.sub(r'\bOR\b', '||', filter_expr, flags=re.IGNORECASE)
+        keys = []
+        for join in statement.joins:
+            for condition in re.split(r'\s+AND\s+', join.condition, flags=re.IGNORECASE):
+                match = JOIN_KEY_PATTERN.fullmatch(condition.strip().strip('()').strip())
+                if match:
+                    left_prefix, _, left_column = match.group('left').translate(IDENTIFIER_QUOTES).rpartition('.')
+                    right_prefix, _, right_column = match.group('right').translate(IDENTIFIER_QUOTES).rpartition('.')
+                    key = (join, resolve(left_column, left_prefix), resolve(right_column, right_prefix))
+                    for table, column in key[1:]:
+                        if not self.schema.has_column(table, column):
+                            _warn(warnings, f'JOIN column {table}[{column}] is not in the schema')
+                    keys.append(key)
+        return keys
+    
+    def _column_reference(self, statement: SelectStatement, resolve: Callable[..., Tuple[str, str]],
+                          keys: List[Tuple[Join, Tuple[str, str], Tuple[str, str]]], warnings: List[str]
+                          ) -> Callable[..., str]:
+        """Return a function giving the row-level DAX reference to a column from the first FROM table.
+
+        Columns of other tables, joined or not, are reached with RELATED when the model's
+        relationships lead from the first table to the one side, with RELATEDTABLE towards the
+        many side, and with LOOKUPVALUE over the JOIN keys when no relationship path exists.
+        Columns of tables connected by neither are reported in warnings.
+        """
+        if self.schema is None or not statement.from_tables:
+            return lambda column, prefix='': '{}[{}]'.format(*resolve(column, prefix))
         
-        # Handle NULL conversions
-        filter_expr = self.handle_null_conversion(filter_expr)
+        graph = self.schema.graph
+        base_table = self.schema.table_name(statement.from_tables[0]) or statement.from_tables[0]
+        def reference(column: str, prefix: str = '') -> str:
+            table, column = resolve(column, prefix)
+            if table == base_table:
+                return f'{table}[{column}]'
+            path = graph.path(base_table, table)
+            if path and is_to_one(path):
+                return f'RELATED({table}[{column}])'
+            if path and is_to_many(path):
+                # One row of the first table matches many rows here; take a single value per row
+                return f'MAXX(RELATEDTABLE({table}), {table}[{column}])'
+            for _, left, right in keys:
+                if left[0] == base_table and right[0] == table:
+                    return f'LOOKUPVALUE({table}[{column}], {table}[{right[1]}], {base_table}[{left[1]}])'
+                if right[0] == base_table and left[0] == table:
+                    return f'LOOKUPVALUE({table}[{column}], {table}[{left[1]}], {base_table}[{right[1]}])'
+            _warn(warnings, f'{table}[{column}] is used with {base_table} rows, but no relationship or JOIN '
+                            f'connects {table} to {base_table}')
+            return f'{table}[{column}]'
+        return reference
+    
+    def _join_filters(self, join_keys: List[Tuple[Join, Tuple[str, str], Tuple[str, str]]],
+                      table_name: str) -> List[str]:
+        """Return TREATAS filters for INNER JOINs whose keys the model's relationships don't connect to table_name"""
+        if not join_keys:
+            return []
         
-        return f"FILTER({table_name}, {filter_expr})"
+        graph = self.schema.graph
+        filters = []
+        for join, left, right in join_keys:
+            if join.type not in INNER_JOIN_TYPES:
+                continue
+            # The side of the key on the joined table filters the other side
+            joined_table = self.schema.table_name(join.table) or join.table
+            if left[0] == joined_table:
+                source, target = left, right
+            elif right[0] == joined_table:
+                source, target = right, left
+            else:
+                continue
+            path = graph.path(table_name, target[0])
+            related = graph.path(target[0], source[0])
+            if path is not None and propagates_filters(path) and related is not None and propagates_filters(related):
+                # The relationships already carry the join's filter to the aggregated table
+                continue
+            filters.append(f'TREATAS(VALUES({source[0]}[{source[1]}]), {target[0]}[{target[1]}])')
+        return filters
     
-    def _convert_sql_expression_to_dax(self, expression: str, table_name: str) -> str:
+    def _convert_where_to_filters(self, where_clause: str, table_name: str,
+                                  reference: Optional[Callable[..., str]] = None) -> List[str]:
+        """Convert SQL WHERE clause to CALCULATE filter arguments.
+
+        Conditions on a single column become column filters, which the storage engine resolves;
+        only the rest are evaluated row by row in a FILTER over table_name.
+        """
+        condition = self._convert_sql_condition_to_dax(where_clause, table_name, reference)
+        return filter_arguments(table_name, condition)
+    
+    def _convert_sql_condition_to_dax(self, condition: str, table_name: str,
+                                      reference: Optional[Callable[..., str]] = None) -> str:
+        """Convert a SQL boolean condition to a DAX boolean expression"""
+        # BETWEEN and IN lists have no direct DAX syntax
+        upper = condition.upper()
+        if 'BETWEEN' in upper:
+            condition = BETWEEN_PATTERN.sub(
+                lambda match: '{}({operand} >= {low} AND {operand} <= {high})'.format(
+                    'NOT ' if match.group('negated') else '', **match.groupdict()),
+                condition)
+        if 'IN' in upper:
+            condition = IN_LIST_PATTERN.sub(
+                lambda match: '{}({} IN {{{}}})'.format(
+                    'NOT ' if match.group('negated') else '', match.group('operand'), match.group('values').strip()),
+                condition)
+        
+        dax_condition = self._convert_sql_expression_to_dax(condition, table_name, reference)
+        
+        def replace_operator(match):
+            token = match.group(0)
+            if token.startswith("'"):
+                # DAX strings are double-quoted
+                return '"{}"'.format(token[1:-1].replace("''", "'").replace('"', '""'))
+            if token.startswith('"'):
+                return token
+            return SQL_TO_DAX_OPERATORS[token.upper()]
+        
+        return CONDITION_OPERATOR_PATTERN.sub(replace_operator, dax_condition)
+    
+    def _convert_sql_expression_to_dax(self, expression: str, table_name: str,
+                                       reference: Optional[Callable[..., str]] = None) -> str:
         """Convert SQL expression to DAX expression"""
         dax_expr = expression
         
         # Convert functions
-        for sql_func, dax_func in self.function_mappings.items():
-            pattern = rf'\b{sql_func}\s*\('
-            replacement = f'{dax_func}('
-            dax_expr = re.sub(pattern, replacement, dax_expr, flags=re.IGNORECASE)
+        dax_expr = self.convert_function_calls(dax_expr)
         
         # Convert column references to table[column] format
-        # Handle table.column or alias.column references first
-        table_column_pattern = r'\b([a-zA-Z_][a-zA-Z0-9_]*\.[a-zA-Z_][a-zA-Z0-9_]*)\b'
-        def replace_table_column(match):
-            full_ref = match.group(1)
-            parts = full_ref.split('.')
-            if len(parts) == 2:
-                table_ref, column_ref = parts
-                # Use the actual table name instead of alias
-                return f'{table_name}[{column_ref}]'
-            return full_ref
-        
-        dax_expr = re.sub(table_column_pattern, replace_table_column, dax_expr)
-        
-        # Then handle simple column references
-        column_pattern = r'\b([a-zA-Z_][a-zA-Z0-9_]*)\b'
-        def replace_column(match):
-            column = match.group(1)
-            # Don't convert function names, keywords, or literals
-            if column.upper() in ['AND', 'OR', 'NOT', 'CASE', 'WHEN', 'THEN', 'ELSE', 'END', 
-                                  'TRUE', 'FALSE', 'NULL', 'SUM', 'COUNT', 'AVG', 'MIN', 'MAX',
-                                  'DATE', 'TIME', 'YEAR', 'MONTH', 'DAY', 'HOUR', 'MINUTE', 'SECOND',
-                                  'IS', 'AS', 'IN', 'EXISTS', 'BETWEEN', 'LIKE', 'DISTINCT']:
-                return column
-            # Don't convert numeric literals
-            if column.isdigit():
-                return column
-            # Don't convert if already in table[column] format
-            if '[' in dax_expr and ']' in dax_expr:
-                # Check if this column is already converted
-                if f'[{column}]' in dax_expr:
-                    return column
-            return f'{table_name}[{column}]'
-        
-        dax_expr = re.sub(column_pattern, replace_column, dax_expr)
+        dax_expr = self._convert_column_references(dax_expr, table_name, reference)
         
         # Handle NULL conversions
         dax_expr = self.handle_null_conversion(dax_expr)
         
         return dax_expr
+    
+    def _convert_column_references(self, expression: str, table_name: str,
+                                   reference: Optional[Callable[..., str]] = None) -> str:
+        """Rewrite column references as table[column] in one left-to-right pass.
+
+        reference, if given, maps a column and its table prefix or alias to its DAX reference;
+        otherwise every column belongs to table_name.
+        """
+        def replace_reference(match):
+            kind = match.lastgroup
+            if kind == 'qualified':
+                # table.column or alias.column: use the actual table name instead of the alias
+                prefix, column = match.group(kind).rsplit('.', 1)
+                if reference is None:
+                    return f'{table_name}[{column}]'
+                return reference(column, prefix)
+            if kind == 'name':
+                name = match.group(kind)
+                if name.upper() in SQL_EXPRESSION_KEYWORDS:
+                    return name
+                if reference is None:
+                    return f'{table_name}[{name}]'
+                return reference(name)
+            if kind == 'bracketed' and match.group(kind).startswith('['):
+                # SQL Server quoted identifier
+                bracketed = match.group(kind)
+                if reference is None or not bracketed.endswith(']'):
+                    return f'{table_name}{bracketed}'
+                return reference(bracketed[1:-1])
+            # Strings, numbers, function names, AS <type> and existing table[column] references stay as they are
+            return match.group(0)
+        
+        return COLUMN_REFERENCE_PATTERN.sub(replace_reference, expression)
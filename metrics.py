@@ -0,0 +1,246 @@
+"""In-process metrics for the converters: stage latencies, input sizes, cache hit rates and errors.
+
+Metrics are kept per process and exposed in the Prometheus text format by the /metrics
+endpoint, or as plain dictionaries through get_metrics().
+"""
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, List, Any, Iterator, Sequence, Tuple
+import threading
+import time
+
+# Latency buckets in seconds, from 50 microseconds to 10 seconds
+LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Input size buckets in bytes, from 100 bytes to 10 MB
+SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000)
+
+
+def _format_labels(labelnames: Sequence[str], labelvalues: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    type = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        with self._lock:
+            return [(self.name, _format_labels(self.labelnames, labels), value)
+                    for labels, value in sorted(self._values.items())]
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [{'labels': dict(zip(self.labelnames, labels)), 'value': value}
+                    for labels, value in sorted(self._values.items())]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram:
+    """Bucketed distribution of observed values with optional labels"""
+
+    type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket (last is +Inf), sum, count]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labelvalues)
+            if entry is None:
+                entry = self._values[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        samples = []
+        with self._lock:
+            for labels, (counts, total, count) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                    cumulative += bucket_count
+                    le = f'le="{_format_value(float(bound))}"'
+                    samples.append((f'{self.name}_bucket', _format_labels(self.labelnames, labels, le), cumulative))
+                samples.append((f'{self.name}_sum', _format_labels(self.labelnames, labels), total))
+                samples.append((f'{self.name}_count', _format_labels(self.labelnames, labels), count))
+        return samples
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [
+                {
+                    'labels': dict(zip(self.labelnames, labels)),
+                    'count': count,
+                    'sum': total,
+                    'mean': total / count if count else 0.0,
+                    'buckets': dict(zip([str(bound) for bound in self.buckets] + ['+Inf'], counts))
+                }
+                for labels, (counts, total, count) in sorted(self._values.items())
+            ]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class MetricsRegistry:
+    """Holds metrics and caches and renders them for the /metrics endpoint"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._caches = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def register_cache(self, name: str, cache) -> None:
+        """Report a cache's stats() (hits, misses, evictions, size) under a cache label"""
+        with self._lock:
+            self._caches[name] = cache
+
+    def _cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            caches = dict(self._caches)
+        return {name: cache.stats() for name, cache in sorted(caches.items())}
+
+    def render(self) -> str:
+        """Return all metrics in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            for name, labels, value in metric.samples():
+                lines.append(f'{name}{labels} {_format_value(value)}')
+
+        cache_stats = self._cache_stats()
+        cache_metrics = (
+            ('sqldax_cache_hits_total', 'counter', 'Cache lookups served from the cache', 'hits'),
+            ('sqldax_cache_misses_total', 'counter', 'Cache lookups that had to compute the value', 'misses'),
+            ('sqldax_cache_evictions_total', 'counter', 'Entries evicted to stay within the size limit', 'evictions'),
+            ('sqldax_cache_entries', 'gauge', 'Entries currently stored', 'size'),
+            ('sqldax_cache_hit_ratio', 'gauge', 'Hits divided by lookups', 'hit_rate')
+        )
+        for name, metric_type, documentation, key in cache_metrics:
+            lines.append(f'# HELP {name} {documentation}')
+            lines.append(f'# TYPE {name} {metric_type}')
+            for cache_name, stats in cache_stats.items():
+                lines.append(f'{name}{{cache="{_escape(cache_name)}"}} {_format_value(stats[key])}')
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return all metrics and cache stats as plain dictionaries"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        result = {metric.name: metric.snapshot() for metric in metrics}
+        result['caches'] = self._cache_stats()
+        return result
+
+    def clear(self) -> None:
+        """Reset all recorded values (registered metrics and caches are kept)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.clear()
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    'sqldax_stage_duration_seconds', 'Time spent in each parsing and conversion stage',
+    ['component', 'stage'])
+INPUT_BYTES = REGISTRY.histogram(
+    'sqldax_input_size_bytes', 'Size of the source code passed to each operation',
+    ['component', 'operation'], buckets=SIZE_BUCKETS)
+ERRORS = REGISTRY.counter(
+    'sqldax_errors_total', 'Failed operations', ['component', 'operation'])
+REQUEST_SECONDS = REGISTRY.histogram(
+    'sqldax_request_duration_seconds', 'HTTP request latency by endpoint',
+    ['endpoint', 'status'])
+
+
+@contextmanager
+def timed(component: str, stage: str) -> Iterator[None]:
+    """Record the time spent in the block under the component and stage labels"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, component, stage)
+
+
+def observe_input(component: str, operation: str, source_code: str) -> None:
+    """Record the size in bytes of a source passed to an operation"""
+    INPUT_BYTES.observe(len(source_code.encode('utf-8')), component, operation)
+
+
+def count_error(component: str, operation: str) -> None:
+    ERRORS.inc(component, operation)
+
+
+def register_cache(name: str, cache) -> None:
+    """Expose a cache's hit/miss/eviction counters"""
+    REGISTRY.register_cache(name, cache)
+
+
+def get_metrics() -> Dict[str, Any]:
+    """Return a snapshot of all metrics for use from Python"""
+    return REGISTRY.snapshot()
+
+
+def render_prometheus() -> str:
+    """Return all metrics in the Prometheus text format"""
+    return REGISTRY.render()
+
+
+def reset_metrics() -> None:
+    """Clear recorded values, e.g. between benchmark runs"""
+    REGISTRY.clear()
@@ -0,0 +1,150 @@
+"""Parse result nodes for SQL statements and Spotfire expressions.
+
+Nodes are slotted dataclasses, so large scripts don't pay for a dict per statement,
+column and expression. to_dict() gives the plain-dict form (optional fields that are
+unset are omitted) for JSON output.
+"""
+from dataclasses import dataclass, field, fields
+from typing import Dict, List, Any, Optional
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, Node):
+        return value.to_dict()
+    if isinstance(value, list):
+        return [_plain(item) for item in value]
+    return value
+
+
+class Node:
+    """Base class for parse result nodes"""
+
+    __slots__ = ()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the node as a plain dict, leaving out optional fields that are unset"""
+        result = {}
+        for node_field in fields(self):
+            value = getattr(self, node_field.name)
+            if value is not None:
+                result[node_field.name] = _plain(value)
+        return result
+
+
+@dataclass(slots=True)
+class SelectColumn(Node):
+    """One item of a SELECT list"""
+    original: str
+    column: str = ''
+    alias: str = ''
+    is_aggregation: bool = False
+    function: str = ''
+    expression: str = ''
+
+
+@dataclass(slots=True)
+class Join(Node):
+    """A joined table with its join type and ON condition"""
+    type: str
+    table: str
+    alias: str
+    condition: str
+
+
+@dataclass(slots=True)
+class SelectStatement(Node):
+    """A parsed SELECT statement"""
+    original: str
+    type: str = 'SELECT'
+    select_columns: List[SelectColumn] = field(default_factory=list)
+    from_tables: List[str] = field(default_factory=list)
+    where_clause: str = ''
+    group_by: List[str] = field(default_factory=list)
+    having_clause: str = ''
+    order_by: List[str] = field(default_factory=list)
+    has_aggregation: bool = False
+    joins: List[Join] = field(default_factory=list)
+    table_aliases: Dict[str, str] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        # Keep the key order of the original dict output
+        result = {'type': self.type, 'original': self.original}
+        result.update(Node.to_dict(self))
+        return result
+
+
+@dataclass(slots=True)
+class UnsupportedStatement(Node):
+    """A statement that is not converted (INSERT, UPDATE, unknown or failed to parse)"""
+    type: str
+    original: str
+    supported: Optional[bool] = None
+    note: Optional[str] = None
+    error: Optional[str] = None
+
+
+@dataclass(slots=True)
+class CaseBranch(Node):
+    """One When ... Then ... branch of a Spotfire Case expression"""
+    condition: str
+    value: str
+
+
+@dataclass(slots=True)
+class AggregationExpression(Node):
+    """A Spotfire aggregation such as Sum([Sales]) OVER ([Region])"""
+    original: str
+    type: str = 'AGGREGATION'
+    function: str = ''
+    column: str = ''
+    table: str = ''
+    over_clause: str = ''
+    where_condition: str = ''
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = {'type': self.type, 'original': self.original}
+        result.update(Node.to_dict(self))
+        return result
+
+
+@dataclass(slots=True)
+class ConditionalExpression(Node):
+    """A Spotfire If(...) or Case ... End expression"""
+    original: str
+    type: str = 'CONDITIONAL'
+    condition_type: str = 'IF'
+    condition: Optional[str] = None
+    true_value: Optional[str] = None
+    false_value: Optional[str] = None
+    cases: Optional[List[CaseBranch]] = None
+    default_value: Optional[str] = None
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = {'type': self.type, 'original': self.original}
+        result.update(Node.to_dict(self))
+        return result
+
+
+@dataclass(slots=True)
+class CalculationExpression(Node):
+    """A Spotfire calculation, or an expression of unknown type"""
+    original: str
+    type: str = 'CALCULATION'
+    expression: str = ''
+    table: Optional[str] = 'Table'
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = {'type': self.type, 'original': self.original}
+        result.update(Node.to_dict(self))
+        return result
+
+
+@dataclass(slots=True)
+class ExpressionError(Node):
+    """A Spotfire expression that failed to parse"""
+    type: str
+    original: str
+    error: str
@@ -1,6 +1,20 @@
 import re
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Iterable, Iterator, Tuple
 import logging
+from metrics import timed, count_error
+from .nodes import (
+    Node, AggregationExpression, ConditionalExpression, CaseBranch, CalculationExpression, ExpressionError
+)
+
+# Quoted text, column references, parentheses and Case/End for the fast structure check
+STRUCTURE_PATTERN = re.compile(r"""
+    (?P<comment>^[ \t]*--[^\n]*)
+  | (?P<string>"(?:[^"]|"")*(?:"|\Z)|'(?:[^']|'')*(?:'|\Z))
+  | (?P<column>\[(?:[^\]]|\]\])*(?:\]|\Z))
+  | (?P<paren>[()])
+  | (?P<keyword>\b(?:Case|End)\b)
+""", re.VERBOSE | re.IGNORECASE | re.MULTILINE)
+
 
 class SpotfireParser:
     """Parser for Spotfire expressions"""
@@ -21,56 +35,117 @@ class SpotfireParser:
         }
         
         self.conditional_keywords = {'If', 'Case', 'When', 'Then', 'Else', 'End'}
+        
+        self.expression_type_pattern = self._compile_expression_type_pattern()
     
     def parse(self, spotfire_code: str) -> Dict[str, Any]:
-        """Parse Spotfire expression code"""
+        """Parse Spotfire expression code (objects are identified separately by identify_objects)"""
         try:
             result = {
                 'expressions': [],
-                'objects': self._identify_objects(spotfire_code),
                 'warnings': [],
                 'notes': [],
                 'parse_errors': []
             }
             
             # Split into individual expressions (by line or semicolon)
-            expressions = self._split_expressions(spotfire_code)
+            with timed('SpotfireParser', 'split'):
+                expressions = self._split_expressions(spotfire_code)
             
-            for expr in expressions:
-                if expr.strip():
-                    parsed_expr = self._parse_expression(expr)
-                    if parsed_expr:
-                        result['expressions'].append(parsed_expr)
+            with timed('SpotfireParser', 'parse_expressions'):
+                for expr in expressions:
+                    if expr.strip():
+                        parsed_expr = self._parse_expression(expr)
+                        if parsed_expr:
+                            result['expressions'].append(parsed_expr)
             
             # Add validation warnings
-            result['warnings'].extend(self._validate_spotfire(spotfire_code))
+            with timed('SpotfireParser', 'validate'):
+                result['warnings'].extend(self._validate_spotfire(spotfire_code))
             
             return result
             
         except Exception as e:
             logging.error(f"Spotfire parsing error: {str(e)}")
+            count_error('SpotfireParser', 'parse')
             return {
                 'expressions': [],
-                'objects': {},
                 'warnings': [],
                 'notes': [],
                 'parse_errors': [f"Parse error: {str(e)}"]
             }
     
+    def check_structure(self, spotfire_code: str) -> Dict[str, List[str]]:
+        """Fast structural check: balanced parentheses and column brackets, closed quotes, Case/End pairs"""
+        errors = []
+        suggestions = []
+        open_positions = []
+        open_cases = []
+        
+        for match in STRUCTURE_PATTERN.finditer(spotfire_code):
+            kind = match.lastgroup
+            value = match.group()
+            if kind == 'paren':
+                if value == '(':
+                    open_positions.append(match.start())
+                elif open_positions:
+                    open_positions.pop()
+                else:
+                    errors.append(f"Unmatched ')' at line {self._line_of(spotfire_code, match.start())}")
+                    suggestions.append("Check that parentheses are balanced")
+            elif kind == 'keyword':
+                if value.upper() == 'CASE':
+                    open_cases.append(match.start())
+                elif open_cases:
+                    open_cases.pop()
+                else:
+                    errors.append(f"'End' without a matching 'Case' at line {self._line_of(spotfire_code, match.start())}")
+                    suggestions.append("Every Case expression must finish with End")
+            elif kind == 'string':
+                if len(value) < 2 or not value.endswith(value[0]) or value.count(value[0]) % 2:
+                    errors.append(f"Unterminated string starting at line {self._line_of(spotfire_code, match.start())}")
+                    suggestions.append("Close every quoted string")
+            elif kind == 'column':
+                if not value.endswith(']') or (len(value) - len(value.rstrip(']'))) % 2 == 0:
+                    errors.append(f"Unclosed '[' column reference at line {self._line_of(spotfire_code, match.start())}")
+                    suggestions.append("Close every column reference with ]")
+        
+        if open_positions:
+            errors.append(f"Unclosed '(' at line {self._line_of(spotfire_code, open_positions[0])}")
+            suggestions.append("Check that parentheses are balanced")
+        
+        for position in open_cases:
+            errors.append(f"'Case' without a matching 'End' at line {self._line_of(spotfire_code, position)}")
+            suggestions.append("Every Case expression must finish with End")
+        
+        return {'errors': errors, 'suggestions': list(dict.fromkeys(suggestions))}
+    
+    def _line_of(self, code: str, position: int) -> int:
+        return code.count('\n', 0, position) + 1
+    
     def _split_expressions(self, code: str) -> List[str]:
         """Split code into individual expressions"""
         # Split by lines first
-        lines = code.split('\n')
-        expressions = []
-        
+        return list(self.iter_expressions(code.split('\n')))
+    
+    def iter_expressions(self, lines: Iterable[str]) -> Iterator[str]:
+        """Yield complete expressions from lines, joining lines until parentheses balance"""
+        for _, expression in self.iter_numbered_expressions(lines):
+            yield expression
+    
+    def iter_numbered_expressions(self, lines: Iterable[str]) -> Iterator[Tuple[int, str]]:
+        """Yield (number of the line it starts on, expression) for each complete expression"""
         current_expr = ""
+        start_line = 0
         paren_count = 0
         
-        for line in lines:
+        for line_number, line in enumerate(lines, 1):
             line = line.strip()
             if not line or line.startswith('--'):
                 continue
             
+            if not current_expr:
+                start_line = line_number
             current_expr += " " + line if current_expr else line
             
             # Count parentheses to handle multi-line expressions
@@ -78,16 +153,14 @@ class SpotfireParser:
             
             # If parentheses are balanced, we have a complete expression
             if paren_count == 0:
-                expressions.append(current_expr.strip())
+                yield start_line, current_expr.strip()
                 current_expr = ""
         
         # Add any remaining expression
         if current_expr.strip():
-            expressions.append(current_expr.strip())
-        
-        return expressions
+            yield start_line, current_expr.strip()
     
-    def _parse_expression(self, expression: str) -> Dict[str, Any]:
+    def _parse_expression(self, expression: str) -> Node:
         """Parse individual Spotfire expression"""
         try:
             expr_type = self._determine_expression_type(expression)
@@ -99,52 +172,45 @@ class SpotfireParser:
             elif expr_type == 'CALCULATION':
                 return self._parse_calculation_expression(expression)
             else:
-                return {
-                    'type': 'UNKNOWN',
-                    'original': expression,
-                    'expression': expression
-                }
+                return CalculationExpression(expression, type='UNKNOWN', expression=expression, table=None)
                 
         except Exception as e:
             logging.error(f"Expression parsing error: {str(e)}")
-            return {
-                'type': 'ERROR',
-                'original': expression,
-                'error': str(e)
-            }
+            return ExpressionError('ERROR', expression, str(e))
+    
+    def _compile_expression_type_pattern(self) -> re.Pattern:
+        """Compile aggregation calls and conditional keywords into one classifier pattern"""
+        aggregations = '|'.join(sorted(self.aggregation_functions, key=len, reverse=True))
+        conditionals = '|'.join(sorted(self.conditional_keywords, key=len, reverse=True))
+        return re.compile(
+            rf'\b(?:(?P<aggregation>{aggregations})\s*\(|(?P<conditional>{conditionals})\b)',
+            re.IGNORECASE
+        )
     
     def _determine_expression_type(self, expression: str) -> str:
         """Determine the type of Spotfire expression"""
-        # Check for aggregation functions
-        for func in self.aggregation_functions:
-            if re.search(rf'\b{func}\s*\(', expression, re.IGNORECASE):
+        # Single scan: any aggregation call wins, otherwise any conditional keyword
+        is_conditional = False
+        for match in self.expression_type_pattern.finditer(expression):
+            if match.lastgroup == 'aggregation':
                 return 'AGGREGATION'
+            is_conditional = True
         
-        # Check for conditional expressions
-        for keyword in self.conditional_keywords:
-            if re.search(rf'\b{keyword}\b', expression, re.IGNORECASE):
-                return 'CONDITIONAL'
+        if is_conditional:
+            return 'CONDITIONAL'
         
         # Default to calculation
         return 'CALCULATION'
     
-    def _parse_aggregation_expression(self, expression: str) -> Dict[str, Any]:
+    def _parse_aggregation_expression(self, expression: str) -> AggregationExpression:
         """Parse Spotfire aggregation expression"""
-        result = {
-            'type': 'AGGREGATION',
-            'original': expression,
-            'function': '',
-            'column': '',
-            'table': '',
-            'over_clause': '',
-            'where_condition': ''
-        }
+        result = AggregationExpression(expression)
         
         try:
             # Find aggregation function
             agg_match = re.search(r'\b(\w+)\s*\(', expression, re.IGNORECASE)
             if agg_match:
-                result['function'] = agg_match.group(1)
+                result.function = agg_match.group(1)
             
             # Extract column/expression inside function
             func_content_match = re.search(r'\w+\s*\(([^)]+)\)', expression, re.IGNORECASE)
@@ -153,34 +219,30 @@ class SpotfireParser:
                 
                 # Check for column reference
                 if content.startswith('[') and content.endswith(']'):
-                    result['column'] = content[1:-1]  # Remove brackets
+                    result.column = content[1:-1]  # Remove brackets
                 else:
-                    result['column'] = content
+                    result.column = content
             
             # Look for OVER clause
             over_match = re.search(r'OVER\s*\(([^)]+)\)', expression, re.IGNORECASE)
             if over_match:
-                result['over_clause'] = over_match.group(1)
+                result.over_clause = over_match.group(1)
             
             # Look for WHERE condition (in some Spotfire aggregations)
             where_match = re.search(r'WHERE\s+(.+?)(?:\s+OVER|$)', expression, re.IGNORECASE)
             if where_match:
-                result['where_condition'] = where_match.group(1)
+                result.where_condition = where_match.group(1)
             
             return result
             
         except Exception as e:
             logging.error(f"Aggregation parsing error: {str(e)}")
-            result['error'] = str(e)
+            result.error = str(e)
             return result
     
-    def _parse_conditional_expression(self, expression: str) -> Dict[str, Any]:
+    def _parse_conditional_expression(self, expression: str) -> ConditionalExpression:
         """Parse Spotfire conditional expression"""
-        result = {
-            'type': 'CONDITIONAL',
-            'original': expression,
-            'condition_type': 'IF'
-        }
+        result = ConditionalExpression(expression)
         
         try:
             if re.search(r'\bIf\s*\(', expression, re.IGNORECASE):
@@ -188,29 +250,29 @@ class SpotfireParser:
             elif re.search(r'\bCase\b', expression, re.IGNORECASE):
                 return self._parse_case_expression(expression, result)
             else:
-                result['condition_type'] = 'UNKNOWN'
+                result.condition_type = 'UNKNOWN'
                 return result
                 
         except Exception as e:
             logging.error(f"Conditional parsing error: {str(e)}")
-            result['error'] = str(e)
+            result.error = str(e)
             return result
     
-    def _parse_if_expression(self, expression: str, result: Dict[str, Any]) -> Dict[str, Any]:
+    def _parse_if_expression(self, expression: str, result: ConditionalExpression) -> ConditionalExpression:
         """Parse Spotfire IF expression"""
         # Pattern: If(condition, true_value, false_value)
         if_match = re.search(r'If\s*\(\s*([^,]+),\s*([^,]+),\s*([^)]+)\)', expression, re.IGNORECASE)
         if if_match:
-            result['condition'] = if_match.group(1).strip()
-            result['true_value'] = if_match.group(2).strip()
-            result['false_value'] = if_match.group(3).strip()
+            result.condition = if_match.group(1).strip()
+            result.true_value = if_match.group(2).strip()
+            result.false_value = if_match.group(3).strip()
         
         return result
     
-    def _parse_case_expression(self, expression: str, result: Dict[str, Any]) -> Dict[str, Any]:
+    def _parse_case_expression(self, expression: str, result: ConditionalExpression) -> ConditionalExpression:
         """Parse Spotfire CASE expression"""
-        result['condition_type'] = 'CASE'
-        result['cases'] = []
+        result.condition_type = 'CASE'
+        result.cases = []
         
         # This is a simplified parser for CASE expressions
         # Real implementation would need more sophisticated parsing
@@ -218,26 +280,24 @@ class SpotfireParser:
         cases = re.findall(case_pattern, expression, re.IGNORECASE)
         
         for condition, value in cases:
-            result['cases'].append({
-                'condition': condition.strip(),
-                'value': value.strip()
-            })
+            result.cases.append(CaseBranch(condition.strip(), value.strip()))
         
         # Look for ELSE clause
         else_match = re.search(r'Else\s+([^E]+)', expression, re.IGNORECASE)
         if else_match:
-            result['default_value'] = else_match.group(1).strip()
+            result.default_value = else_match.group(1).strip()
         
         return result
     
-    def _parse_calculation_expression(self, expression: str) -> Dict[str, Any]:
+    def _parse_calculation_expression(self, expression: str) -> CalculationExpression:
         """Parse Spotfire calculation expression"""
-        return {
-            'type': 'CALCULATION',
-            'original': expression,
-            'expression': expression,
-            'table': 'Table'  # Default table name
-        }
+        # The table defaults to 'Table'
+        return CalculationExpression(expression, expression=expression)
+    
+    def identify_objects(self, spotfire_code: str) -> Dict[str, List[str]]:
+        """Identify the columns and functions used in Spotfire code"""
+        with timed('SpotfireParser', 'identify_objects'):
+            return self._identify_objects(spotfire_code)
     
     def _identify_objects(self, spotfire_code: str) -> Dict[str, List[str]]:
         """Identify Spotfire objects (columns, functions)"""
@@ -0,0 +1,572 @@
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+# Token kinds
+WHITESPACE = 'whitespace'
+COMMENT = 'comment'
+STRING = 'string'
+QUOTED_NAME = 'quoted_name'
+NUMBER = 'number'
+NAME = 'name'
+PUNCTUATION = 'punctuation'
+OPERATOR = 'operator'
+OTHER = 'other'
+
+# Every alternative is anchored on its first character, so scanning is a single linear pass
+TOKEN_PATTERN = re.compile(r"""
+    (?P<whitespace>\s+)
+  | (?P<comment>--[^\n]*|/\*.*?(?:\*/|\Z))
+  | (?P<string>[Nn]?'(?:[^']|'')*(?:'|\Z))
+  | (?P<quoted_name>"(?:[^"]|"")*(?:"|\Z)|\[[^\]]*(?:\]|\Z)|`[^`]*(?:`|\Z))
+  | (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+  | (?P<name>[A-Za-z_@#][\w@#$]*)
+  | (?P<punctuation>[(),;.])
+  | (?P<operator><>|!=|>=|<=|\|\||::|[-+*/%=<>!~^&|])
+  | (?P<other>.)
+""", re.VERBOSE | re.DOTALL)
+
+IGNORED_KINDS = frozenset({WHITESPACE, COMMENT})
+
+# Where a statement boundary scan must stop in plain text: literals and comments, which can hide
+# a semicolon, semicolons, and GO batch separator lines (T-SQL). Literals and comments the text
+# ends inside of are matched by their opener alone.
+STATEMENT_BOUNDARY_PATTERN = re.compile(r"""
+    (?P<comment>--[^\n]*|/\*.*?\*/)
+  | (?P<literal>'(?:[^']|'')*'|"(?:[^"]|"")*"|\[[^\]]*\]|`[^`]*`)
+  | (?P<open>--|/\*|['"\[`])
+  | (?P<end>;)
+  | (?P<batch>(?:\A|\n)[ \t]*(?i:GO)(?:[ \t]+[0-9]+)?[ \t]*(?=\r?\n|\Z))
+""", re.VERBOSE | re.DOTALL)
+
+# The end of a line that may still become a GO line once more text arrives
+PARTIAL_BATCH_PATTERN = re.compile(r'[ \t]*(?:(?i:GO?)(?:[ \t]+[0-9]*)?[ \t]*)?\r?')
+
+# A whole GO line, matched from the start of the line
+BATCH_LINE_PATTERN = re.compile(r'[ \t]*(?i:GO)(?:[ \t]+[0-9]+)?[ \t]*(?=\r?\n|\Z)')
+
+# What closes each literal or comment opened in a statement
+BOUNDARY_CLOSERS = {"'": "'", '"': '"', '[': ']', '`': '`', '--': '\n', '/*': '*/'}
+LITERAL_CLOSERS = frozenset({"'", '"', ']', '`'})
+
+# Keywords that start a top-level clause of a SELECT query
+CLAUSE_KEYWORDS = frozenset({'SELECT', 'FROM', 'WHERE', 'GROUP', 'HAVING', 'ORDER', 'LIMIT'})
+SET_OPERATORS = frozenset({'UNION', 'INTERSECT', 'EXCEPT'})
+JOIN_MODIFIERS = frozenset({'INNER', 'LEFT', 'RIGHT', 'FULL', 'CROSS', 'OUTER'})
+
+# Words that can never be an implicit alias
+RESERVED_WORDS = frozenset({
+    'SELECT', 'FROM', 'WHERE', 'GROUP', 'HAVING', 'ORDER', 'BY', 'LIMIT', 'ON', 'USING',
+    'JOIN', 'INNER', 'LEFT', 'RIGHT', 'FULL', 'CROSS', 'OUTER', 'UNION', 'INTERSECT',
+    'EXCEPT', 'AS', 'AND', 'OR', 'NOT', 'CASE', 'WHEN', 'THEN', 'ELSE', 'END', 'IS',
+    'NULL', 'IN', 'LIKE', 'BETWEEN', 'EXISTS', 'DISTINCT', 'ALL', 'ASC', 'DESC', 'WITH'
+})
+
+
+class Token(NamedTuple):
+    """A lexical token with its position in the source text"""
+    kind: str
+    value: str
+    start: int
+    end: int
+
+    @property
+    def upper(self) -> str:
+        return self.value.upper()
+
+    def is_keyword(self, *words: str) -> bool:
+        return self.kind == NAME and self.value.upper() in words
+
+
+@dataclass
+class Statement:
+    """One statement of a script with its significant tokens"""
+    source: str
+    tokens: List[Token]
+
+    @property
+    def text(self) -> str:
+        if not self.tokens:
+            return ''
+        return self.source[self.tokens[0].start:self.tokens[-1].end]
+
+    @property
+    def keyword(self) -> str:
+        """Leading keyword, e.g. SELECT or INSERT"""
+        first = self.tokens[0] if self.tokens else None
+        return first.upper if first is not None and first.kind == NAME else ''
+
+
+@dataclass
+class Clause:
+    """A top-level clause of a query: its keyword and the tokens that follow it"""
+    keyword: str
+    tokens: List[Token]
+
+
+@dataclass
+class TableReference:
+    """A table in the FROM clause, optionally introduced by a JOIN"""
+    name: str
+    qualified_name: str
+    alias: str = ''
+    join_type: str = ''
+    condition: List[Token] = field(default_factory=list)
+
+
+@dataclass
+class SelectQuery:
+    """Typed tree of a SELECT statement's top-level clauses"""
+    source: str
+    tokens: List[Token]
+    clauses: Dict[str, Clause]
+    ctes: List[str] = field(default_factory=list)
+
+    def clause(self, keyword: str) -> Optional[Clause]:
+        return self.clauses.get(keyword)
+
+    def text_of(self, tokens: List[Token]) -> str:
+        """Original source text spanned by the given tokens"""
+        return text_of(self.source, tokens)
+
+
+def tokenize(source: str) -> List[Token]:
+    """Scan source text into tokens in a single pass"""
+    return list(iter_tokens(source))
+
+
+def iter_tokens(source: str) -> Iterator[Token]:
+    """Scan source text into tokens lazily, without materializing the whole token list"""
+    for match in TOKEN_PATTERN.finditer(source):
+        yield Token(match.lastgroup, match.group(), match.start(), match.end())
+
+
+def significant(tokens: List[Token]) -> List[Token]:
+    """Drop whitespace and comment tokens"""
+    return [token for token in tokens if token.kind not in IGNORED_KINDS]
+
+
+def text_of(source: str, tokens: List[Token]) -> str:
+    """Original source text spanned by the given tokens"""
+    if not tokens:
+        return ''
+    return source[tokens[0].start:tokens[-1].end]
+
+
+def split_statements(source: str) -> List[Statement]:
+    """Split a script into statements at semicolons and GO lines outside strings and comments"""
+    statements = []
+    current = []
+    batch_end = 0
+    for token in iter_tokens(source):
+        if token.kind in IGNORED_KINDS or token.start < batch_end:
+            continue
+        if token.kind == NAME and token.upper == 'GO':
+            line = BATCH_LINE_PATTERN.match(source, source.rfind('\n', 0, token.start) + 1)
+            if line is not None and line.end() >= token.end:
+                # A batch separator: ends the statement, and its repeat count is skipped
+                if current:
+                    statements.append(Statement(source, current))
+                current = []
+                batch_end = line.end()
+                continue
+        current.append(token)
+        if token.kind == PUNCTUATION and token.value == ';':
+            if len(current) > 1:
+                statements.append(Statement(source, current))
+            current = []
+    if current:
+        statements.append(Statement(source, current))
+    return statements
+
+
+class StatementScanner:
+    """Finds statement boundaries in a script that arrives in pieces.
+
+    The scan resumes where the previous piece stopped, carrying whether it is inside a
+    literal or comment, so each character is scanned once however long a statement is.
+    Statements end at semicolons and at GO lines; spans exclude leading and trailing
+    comments and whitespace, keep the terminating semicolon and drop GO lines.
+    """
+
+    def __init__(self):
+        self.buffer = ''
+        # Where scanning resumes, and the closer of the literal or comment it is inside
+        self.position = 0
+        self.closer: Optional[str] = None
+        # Span of the statement being read, None until its first significant character
+        self.start: Optional[int] = None
+        self.end: Optional[int] = None
+        # Set while skipping the rest of a statement whose text was dropped
+        self.discarding = False
+
+    def feed(self, text: str, final: bool = False) -> List[Tuple[int, int, bool]]:
+        """Append text and return (start, end, terminated) buffer spans of the statements it completes.
+
+        With final, the end of the script has been reached and an unterminated statement
+        is returned too.
+        """
+        self.buffer += text
+        buffer = self.buffer
+        length = len(buffer)
+        position = self.position
+        start, end = self.start, self.end
+        discarding = self.discarding
+        spans = []
+
+        while position < length:
+            closer = self.closer
+            if closer is None:
+                match = STATEMENT_BOUNDARY_PATTERN.search(buffer, position)
+                stop = match.start() if match is not None else (length if final else self._safe_end(position))
+                if stop > position and not discarding:
+                    # Plain text up to the match
+                    gap = buffer[position:stop]
+                    stripped = gap.strip()
+                    if stripped:
+                        if start is None:
+                            start = position + gap.index(stripped[0])
+                        end = stop - (len(gap) - len(gap.rstrip()))
+                if match is None:
+                    position = stop
+                    break
+                kind = match.lastgroup
+                if match.end() == length and not final and kind != 'end':
+                    if kind == 'batch':
+                        # The line may go on (GOTO ...)
+                        position = stop
+                        break
+                    # A comment or literal may go on in the next piece (a doubled quote, say)
+                    kind = 'open'
+                    opener = '--' if buffer.startswith('--', stop) else '/*' if buffer.startswith('/*', stop) \
+                        else buffer[stop]
+                    match_end = stop + len(opener)
+                else:
+                    opener = match.group()
+                    match_end = match.end()
+                if kind == 'literal':
+                    if start is None and not discarding:
+                        start = stop
+                    if not discarding:
+                        end = match_end
+                elif kind == 'open':
+                    closer = self.closer = BOUNDARY_CLOSERS[opener]
+                    if closer in LITERAL_CLOSERS and start is None and not discarding:
+                        start = stop
+                elif kind in ('end', 'batch'):
+                    if start is not None:
+                        spans.append((start, match_end if kind == 'end' else end, True))
+                        start = None
+                    discarding = False
+                position = match_end
+                continue
+
+            index = buffer.find(closer, position)
+            if index < 0:
+                # The last character may begin a two-character closer
+                position = length if final else max(position, length - len(closer) + 1)
+                break
+            if closer in ("'", '"'):
+                if index + 1 == length and not final:
+                    # A doubled quote is an escaped one; wait for the next character
+                    position = index
+                    break
+                if index + 1 < length and buffer[index + 1] == closer:
+                    position = index + 2
+                    continue
+            self.closer = None
+            if closer == '\n':
+                # A line comment ends before its newline
+                position = index
+            else:
+                position = index + len(closer)
+                if closer in LITERAL_CLOSERS and start is not None:
+                    end = position
+
+        self.position = position
+        if final:
+            if self.closer in LITERAL_CLOSERS and start is not None:
+                # An unterminated literal runs to the end of the script
+                end = length
+            self.closer = None
+            if start is not None:
+                spans.append((start, end, False))
+            start = None
+            discarding = False
+        self.start, self.end = start, end
+        self.discarding = discarding
+        return spans
+
+    def _safe_end(self, position: int) -> int:
+        """How far plain text at the end of an incomplete buffer can be scanned"""
+        newline = self.buffer.rfind('\n')
+        # From the newline, which the GO line pattern starts with
+        if max(newline, 0) >= position and PARTIAL_BATCH_PATTERN.fullmatch(self.buffer, newline + 1):
+            return max(newline, 0)
+        # Keep the last character, which may begin a two-character comment opener
+        return max(position, len(self.buffer) - 1)
+
+    def discard(self) -> None:
+        """Drop the statement being read; the scan skips to its end"""
+        self.start = None
+        self.end = None
+        self.discarding = True
+
+    def compact(self) -> None:
+        """Free the buffered text before the statement being read"""
+        cut = self.start if self.start is not None else self.position
+        # One character stays, so a GO line is never taken to start the script
+        cut -= 1
+        if cut <= 0:
+            return
+        self.buffer = self.buffer[cut:]
+        self.position -= cut
+        if self.start is not None:
+            self.start -= cut
+        if self.end is not None:
+            self.end -= cut
+
+
+def iter_statement_spans(source: str) -> Iterator[Tuple[int, int, bool]]:
+    """Yield (start, end, terminated) for each statement of a script without tokenizing it.
+
+    Spans match the text of split_statements (leading and trailing comments and
+    whitespace trimmed, terminating semicolon kept, GO lines dropped) at a fraction of the cost.
+    """
+    return iter(StatementScanner().feed(source, final=True))
+
+
+def split_statement_texts(source: str) -> List[str]:
+    """Split a script into statement texts without tokenizing it"""
+    return [source[start:end] for start, end, _ in iter_statement_spans(source)]
+
+
+def split_top_level(tokens: List[Token], separator: str = ',') -> List[List[Token]]:
+    """Split tokens on a punctuation separator that is not nested in parentheses"""
+    parts = [[]]
+    depth = 0
+    for token in tokens:
+        if token.kind == PUNCTUATION:
+            if token.value == '(':
+                depth += 1
+            elif token.value == ')':
+                depth -= 1
+            elif token.value == separator and depth == 0:
+                parts.append([])
+                continue
+        parts[-1].append(token)
+    return [part for part in parts if part]
+
+
+def matching_paren(tokens: List[Token], open_index: int) -> int:
+    """Index of the parenthesis closing the one at open_index (or the last token)"""
+    depth = 0
+    for index in range(open_index, len(tokens)):
+        token = tokens[index]
+        if token.kind == PUNCTUATION:
+            if token.value == '(':
+                depth += 1
+            elif token.value == ')':
+                depth -= 1
+                if depth == 0:
+                    return index
+    return len(tokens) - 1
+
+
+def unquote_name(value: str) -> str:
+    """Strip identifier delimiters: "name", [name] or `name`"""
+    if len(value) >= 2 and value[0] in '"[`':
+        return value[1:-1]
+    return value
+
+
+def read_qualified_name(tokens: List[Token], index: int) -> Tuple[List[str], int]:
+    """Read a dotted name such as schema.table starting at index; return parts and next index"""
+    parts = []
+    while index < len(tokens) and tokens[index].kind in (NAME, QUOTED_NAME):
+        parts.append(unquote_name(tokens[index].value))
+        index += 1
+        if index < len(tokens) and tokens[index].value == '.':
+            index += 1
+        else:
+            break
+    return parts, index
+
+
+def parse_select(statement: Statement) -> SelectQuery:
+    """Build the clause tree of a SELECT statement (optionally preceded by WITH)"""
+    tokens = statement.tokens
+    if tokens and tokens[-1].value == ';':
+        tokens = tokens[:-1]
+
+    clauses = {}
+    ctes = []
+    current = None
+    depth = 0
+    index = 0
+
+    if tokens and tokens[0].is_keyword('WITH'):
+        index = _skip_ctes(tokens, 1, ctes)
+
+    while index < len(tokens):
+        token = tokens[index]
+        if token.kind == PUNCTUATION and token.value in '()':
+            depth += 1 if token.value == '(' else -1
+        elif depth == 0 and token.kind == NAME:
+            word = token.upper
+            if word in SET_OPERATORS and current is not None:
+                # Only the first query of a compound statement is converted
+                break
+            if word in CLAUSE_KEYWORDS and (word != 'SELECT' or 'SELECT' not in clauses):
+                if word in ('GROUP', 'ORDER') and index + 1 < len(tokens) and tokens[index + 1].is_keyword('BY'):
+                    index += 1
+                current = Clause(word, [])
+                clauses.setdefault(word, current)
+                index += 1
+                continue
+        if current is not None:
+            current.tokens.append(token)
+        index += 1
+
+    return SelectQuery(statement.source, tokens, clauses, ctes)
+
+
+def _skip_ctes(tokens: List[Token], index: int, ctes: List[str]) -> int:
+    """Skip WITH name [(columns)] AS (query), ... definitions, collecting CTE names"""
+    if index < len(tokens) and tokens[index].is_keyword('RECURSIVE'):
+        index += 1
+    while index < len(tokens):
+        if tokens[index].kind in (NAME, QUOTED_NAME):
+            ctes.append(unquote_name(tokens[index].value))
+            index += 1
+        if index < len(tokens) and tokens[index].value == '(':
+            index = matching_paren(tokens, index) + 1
+        if index < len(tokens) and tokens[index].is_keyword('AS'):
+            index += 1
+        if index < len(tokens) and tokens[index].value == '(':
+            index = matching_paren(tokens, index) + 1
+        if index < len(tokens) and tokens[index].value == ',':
+            index += 1
+            continue
+        break
+    return index
+
+
+def parse_from_clause(tokens: List[Token]) -> List[TableReference]:
+    """Read the tables, aliases and joins of a FROM clause"""
+    tables = []
+    index = 0
+    expecting_table = True
+    join_type = ''
+    current = None
+
+    while index < len(tokens):
+        token = tokens[index]
+
+        if token.kind == NAME and (token.upper in JOIN_MODIFIERS or token.upper == 'JOIN'):
+            words = []
+            while index < len(tokens) and tokens[index].kind == NAME and (
+                    tokens[index].upper in JOIN_MODIFIERS or tokens[index].upper == 'JOIN'):
+                words.append(tokens[index].upper)
+                index += 1
+                if words[-1] == 'JOIN':
+                    break
+            join_type = ' '.join(words)
+            expecting_table = True
+            current = None
+            continue
+
+        if token.is_keyword('ON') and current is not None:
+            index += 1
+            start = index
+            depth = 0
+            while index < len(tokens):
+                inner = tokens[index]
+                if inner.kind == PUNCTUATION and inner.value in '()':
+                    depth += 1 if inner.value == '(' else -1
+                elif depth == 0 and (inner.value == ',' or (
+                        inner.kind == NAME and (inner.upper in JOIN_MODIFIERS or inner.upper == 'JOIN'))):
+                    break
+                index += 1
+            current.condition = tokens[start:index]
+            continue
+
+        if token.value == ',':
+            expecting_table = True
+            join_type = ''
+            current = None
+            index += 1
+            continue
+
+        if expecting_table:
+            expecting_table = False
+            if token.value == '(':
+                # Derived table: skip the subquery and its alias
+                index = matching_paren(tokens, index) + 1
+                index = _skip_alias(tokens, index)[1]
+                continue
+            parts, index = read_qualified_name(tokens, index)
+            if parts:
+                alias, index = _skip_alias(tokens, index)
+                current = TableReference(parts[-1], '.'.join(parts), alias, join_type)
+                tables.append(current)
+                continue
+
+        index += 1
+
+    return tables
+
+
+def _skip_alias(tokens: List[Token], index: int) -> Tuple[str, int]:
+    """Read an optional [AS] alias at index; return the alias and next index"""
+    if index < len(tokens) and tokens[index].is_keyword('AS'):
+        index += 1
+    if (index < len(tokens) and tokens[index].kind in (NAME, QUOTED_NAME) and
+            tokens[index].upper not in RESERVED_WORDS):
+        return unquote_name(tokens[index].value), index + 1
+    return '', index
+
+
+def split_alias(tokens: List[Token]) -> Tuple[List[Token], str]:
+    """Separate a trailing [AS] alias from a select-list item"""
+    if len(tokens) >= 2:
+        last = tokens[-1]
+        previous = tokens[-2]
+        if last.kind in (NAME, QUOTED_NAME) and last.upper not in RESERVED_WORDS:
+            if previous.is_keyword('AS'):
+                return tokens[:-2], unquote_name(last.value)
+            ends_value = (previous.kind in (NAME, QUOTED_NAME, NUMBER, STRING) and
+                          previous.upper not in RESERVED_WORDS) or previous.value == ')'
+            if ends_value:
+                return tokens[:-1], unquote_name(last.value)
+    return tokens, ''
+
+
+def is_column_reference(tokens: List[Token]) -> bool:
+    """Check whether tokens form a plain column reference such as col, t.col or t.*"""
+    if not tokens or len(tokens) % 2 == 0:
+        return False
+    for index, token in enumerate(tokens):
+        if index % 2:
+            if token.value != '.':
+                return False
+        elif not (token.kind in (NAME, QUOTED_NAME) or token.value == '*'):
+            return False
+    return True
+
+
+def find_function_call(tokens: List[Token]) -> Optional[int]:
+    """Index of the first name token that is followed by an opening parenthesis"""
+    for index in range(len(tokens) - 1):
+        if tokens[index].kind == NAME and tokens[index + 1].value == '(':
+            return index
+    return None
+
+
+def contains_function_call(tokens: List[Token], function_names) -> bool:
+    """Check whether any of the given functions is called anywhere in the tokens"""
+    for index in range(len(tokens) - 1):
+        if (tokens[index].kind == NAME and tokens[index + 1].value == '(' and
+                tokens[index].upper in function_names):
+            return True
+    return False
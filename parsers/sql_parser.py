@@ -1,7 +1,26 @@
 import re
-import sqlparse
 from typing import Dict, List, Any
 import logging
+from metrics import timed, count_error
+from .sql_ast import (
+    Statement, SelectQuery, Token, TableReference, split_statements, parse_select,
+    parse_from_clause, split_top_level, split_alias, matching_paren, find_function_call,
+    contains_function_call, is_column_reference, unquote_name
+)
+from .nodes import Node, SelectStatement, SelectColumn, Join, UnsupportedStatement
+
+# Delimited constructs, parentheses and statement terminators for the fast structure check
+STRUCTURE_PATTERN = re.compile(r"""
+    (?P<comment>--[^\n]*|/\*.*?(?:\*/|\Z))
+  | (?P<string>'(?:[^']|'')*(?:'|\Z))
+  | (?P<quoted_name>"(?:[^"]|"")*(?:"|\Z)|\[[^\]]*(?:\]|\Z)|`[^`]*(?:`|\Z))
+  | (?P<paren>[()])
+  | (?P<end>;)
+""", re.VERBOSE | re.DOTALL)
+
+# First word (or character) of a statement after whitespace and comments
+LEADING_WORD_PATTERN = re.compile(r'(?:\s+|--[^\n]*|/\*.*?(?:\*/|\Z))*(?P<first>[A-Za-z_]\w*|\S)?', re.DOTALL)
+
 
 class SQLParser:
     """Parser for SQL code"""
@@ -18,172 +37,224 @@ class SQLParser:
             'SUM', 'COUNT', 'AVG', 'MIN', 'MAX', 'STDEV', 'VAR',
             'COUNT_BIG', 'GROUPING', 'CHECKSUM_AGG'
         }
+        
+        # Words a statement may start with, including T-SQL control flow, transactions and
+        # permissions, so valid scripts pass the quick structural check
+        self.statement_keywords = {
+            'SELECT', 'WITH', 'VALUES', 'INSERT', 'UPDATE', 'DELETE', 'MERGE', 'REPLACE',
+            'CREATE', 'ALTER', 'DROP', 'TRUNCATE', 'RENAME', 'COMMENT',
+            'DECLARE', 'SET', 'EXEC', 'EXECUTE', 'CALL', 'USE', 'GO', 'PRINT', 'RAISERROR', 'THROW',
+            'IF', 'ELSE', 'WHILE', 'BREAK', 'CONTINUE', 'RETURN', 'GOTO', 'WAITFOR', 'BEGIN', 'END',
+            'START', 'COMMIT', 'ROLLBACK', 'SAVE', 'SAVEPOINT', 'RELEASE',
+            'GRANT', 'REVOKE', 'DENY', 'OPEN', 'FETCH', 'CLOSE', 'DEALLOCATE', 'PREPARE',
+            'BULK', 'BACKUP', 'RESTORE', 'DBCC', 'CHECKPOINT', 'KILL', 'REVERT',
+            'EXPLAIN', 'ANALYZE', 'SHOW', 'DESCRIBE', 'LOCK', 'UNLOCK', 'COPY', 'VACUUM'
+        }
     
     def parse(self, sql_code: str) -> Dict[str, Any]:
-        """Parse SQL code and extract structure"""
+        """Parse SQL code and extract structure (objects are identified separately by identify_objects)"""
         try:
-            # Parse using sqlparse
-            parsed = sqlparse.parse(sql_code)
+            # Tokenize once and split into statements
+            with timed('SQLParser', 'tokenize'):
+                parsed = split_statements(sql_code)
             
             result = {
                 'statements': [],
-                'objects': self._identify_objects(sql_code),
                 'warnings': [],
                 'notes': [],
                 'parse_errors': []
             }
             
-            for statement in parsed:
-                if statement.ttype is None:  # Only process statements, not individual tokens
+            with timed('SQLParser', 'extract_clauses'):
+                for statement in parsed:
                     stmt_result = self._parse_statement(statement)
                     if stmt_result:
                         result['statements'].append(stmt_result)
             
             # Add validation warnings
-            result['warnings'].extend(self._validate_sql(sql_code))
+            with timed('SQLParser', 'validate'):
+                result['warnings'].extend(self._validate_sql(sql_code))
             
             return result
             
         except Exception as e:
             logging.error(f"SQL parsing error: {str(e)}")
+            count_error('SQLParser', 'parse')
             return {
                 'statements': [],
-                'objects': {},
                 'warnings': [],
                 'notes': [],
                 'parse_errors': [f"Parse error: {str(e)}"]
             }
     
-    def _parse_statement(self, statement) -> Dict[str, Any]:
+    def check_structure(self, sql_code: str) -> Dict[str, List[str]]:
+        """Fast structural check: balanced parentheses, closed quotes and comments, known statement starts"""
+        errors = []
+        suggestions = []
+        open_positions = []
+        
+        def check_statement_start(position: int) -> None:
+            match = LEADING_WORD_PATTERN.match(sql_code, position)
+            first = match.group('first')
+            if first and first not in ';(' and first.upper() not in self.statement_keywords:
+                line = self._line_of(sql_code, match.start('first'))
+                errors.append(f"Unexpected '{first}' at the start of a statement (line {line})")
+                suggestions.append("Statements should start with a keyword such as SELECT or WITH")
+        
+        check_statement_start(0)
+        
+        # Only delimiters, parentheses and semicolons are matched; other text is skipped by the regex engine
+        for match in STRUCTURE_PATTERN.finditer(sql_code):
+            kind = match.lastgroup
+            value = match.group()
+            if kind == 'paren':
+                if value == '(':
+                    open_positions.append(match.start())
+                elif open_positions:
+                    open_positions.pop()
+                else:
+                    errors.append(f"Unmatched ')' at line {self._line_of(sql_code, match.start())}")
+                    suggestions.append("Check that parentheses are balanced")
+            elif kind == 'end':
+                if open_positions:
+                    errors.append(f"Unclosed '(' at line {self._line_of(sql_code, open_positions[0])}")
+                    suggestions.append("Check that parentheses are balanced")
+                    open_positions = []
+                check_statement_start(match.end())
+            elif kind == 'comment':
+                if value.startswith('/*') and (len(value) < 4 or not value.endswith('*/')):
+                    errors.append(f"Unterminated block comment starting at line {self._line_of(sql_code, match.start())}")
+                    suggestions.append("Close every /* comment with */")
+            elif not self._is_closed(value):
+                what = 'string literal' if kind == 'string' else 'quoted identifier'
+                errors.append(f"Unterminated {what} starting at line {self._line_of(sql_code, match.start())}")
+                suggestions.append("Close every quote, bracket and backtick")
+        
+        if open_positions:
+            errors.append(f"Unclosed '(' at line {self._line_of(sql_code, open_positions[0])}")
+            suggestions.append("Check that parentheses are balanced")
+        
+        return {'errors': errors, 'suggestions': list(dict.fromkeys(suggestions))}
+    
+    def _is_closed(self, value: str) -> bool:
+        """Check whether a string or quoted identifier token has its closing delimiter"""
+        opener = value[0]
+        if opener in "'\"":
+            # Doubled quotes are escapes, so a closed literal has an even number of quotes
+            return len(value) >= 2 and value.endswith(opener) and value.count(opener) % 2 == 0
+        closer = ']' if opener == '[' else opener
+        return len(value) >= 2 and value.endswith(closer)
+    
+    def _line_of(self, code: str, position: int) -> int:
+        return code.count('\n', 0, position) + 1
+    
+    def _parse_statement(self, statement: Statement) -> Node:
         """Parse individual SQL statement"""
         try:
-            statement_str = str(statement).strip()
+            statement_str = statement.text
             
             if not statement_str:
-                return {
-                    'type': 'EMPTY',
-                    'original': '',
-                    'supported': False,
-                    'note': 'Empty statement'
-                }
+                return UnsupportedStatement('EMPTY', '', supported=False, note='Empty statement')
             
             # Determine statement type
-            stmt_type = self._get_statement_type(statement_str)
+            stmt_type = self._get_statement_type(statement)
             
             if stmt_type == 'SELECT':
                 return self._parse_select_statement(statement_str, statement)
             elif stmt_type in ['INSERT', 'UPDATE', 'DELETE']:
-                return {
-                    'type': stmt_type,
-                    'original': statement_str,
-                    'supported': False,
-                    'note': f'{stmt_type} statements are not directly convertible to DAX'
-                }
+                return UnsupportedStatement(stmt_type, statement_str, supported=False,
+                                            note=f'{stmt_type} statements are not directly convertible to DAX')
             else:
-                return {
-                    'type': 'UNKNOWN',
-                    'original': statement_str,
-                    'supported': False,
-                    'note': 'Unsupported statement type'
-                }
+                return UnsupportedStatement('UNKNOWN', statement_str, supported=False,
+                                            note='Unsupported statement type')
                 
         except Exception as e:
             logging.error(f"Statement parsing error: {str(e)}")
-            return {
-                'type': 'ERROR',
-                'original': str(statement),
-                'error': str(e)
-            }
+            return UnsupportedStatement('ERROR', statement.text, error=str(e))
     
-    def _get_statement_type(self, statement: str) -> str:
-        """Determine the type of SQL statement"""
-        statement_upper = statement.upper().strip()
+    def _get_statement_type(self, statement: Statement) -> str:
+        """Determine the type of SQL statement from its leading keyword"""
+        keyword = statement.keyword
         
-        if statement_upper.startswith('SELECT'):
-            return 'SELECT'
-        elif statement_upper.startswith('INSERT'):
-            return 'INSERT'
-        elif statement_upper.startswith('UPDATE'):
-            return 'UPDATE'
-        elif statement_upper.startswith('DELETE'):
-            return 'DELETE'
-        elif statement_upper.startswith('CREATE'):
-            return 'CREATE'
-        elif statement_upper.startswith('ALTER'):
-            return 'ALTER'
-        elif statement_upper.startswith('DROP'):
-            return 'DROP'
+        if keyword == 'WITH':
+            # A CTE is a SELECT when its main query is a SELECT
+            query = parse_select(statement)
+            return 'SELECT' if query.clause('SELECT') else 'UNKNOWN'
+        elif keyword in ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'CREATE', 'ALTER', 'DROP'):
+            return keyword
         else:
             return 'UNKNOWN'
     
-    def _parse_select_statement(self, statement_str: str, statement) -> Dict[str, Any]:
+    def _parse_select_statement(self, statement_str: str, statement: Statement) -> SelectStatement:
         """Parse SELECT statement"""
-        result = {
-            'type': 'SELECT',
-            'original': statement_str,
-            'select_columns': [],
-            'from_tables': [],
-            'where_clause': '',
-            'group_by': [],
-            'having_clause': '',
-            'order_by': [],
-            'has_aggregation': False,
-            'joins': []
-        }
+        result = SelectStatement(statement_str)
         
         try:
+            # Build the clause tree once; every extractor reads from it
+            query = parse_select(statement)
+            table_references = parse_from_clause(self._clause_tokens(query, 'FROM'))
+            
             # Extract SELECT columns
-            result['select_columns'] = self._extract_select_columns(statement_str)
+            result.select_columns = self._extract_select_columns(query)
             
             # Extract FROM tables
-            result['from_tables'] = self._extract_from_tables(statement_str)
+            result.from_tables = self._extract_from_tables(table_references)
             
             # Extract WHERE clause
-            result['where_clause'] = self._extract_where_clause(statement_str)
+            result.where_clause = self._extract_where_clause(query)
             
             # Extract GROUP BY
-            result['group_by'] = self._extract_group_by(statement_str)
+            result.group_by = self._extract_group_by(query)
             
             # Extract HAVING clause
-            result['having_clause'] = self._extract_having_clause(statement_str)
+            result.having_clause = self._extract_having_clause(query)
             
             # Extract ORDER BY
-            result['order_by'] = self._extract_order_by(statement_str)
+            result.order_by = self._extract_order_by(query)
             
             # Extract JOINs
-            result['joins'] = self._extract_joins(statement_str)
+            result.joins = self._extract_joins(query, table_references)
+            
+            # Map table aliases to table names
+            result.table_aliases = {reference.alias: reference.name for reference in table_references if reference.alias}
             
             # Check for aggregation
-            result['has_aggregation'] = self._has_aggregation_functions(statement_str)
+            result.has_aggregation = self._has_aggregation_functions(query)
             
             return result
             
         except Exception as e:
             logging.error(f"SELECT statement parsing error: {str(e)}")
-            result['error'] = str(e)
+            result.error = str(e)
             return result
     
-    def _extract_select_columns(self, statement: str) -> List[Dict[str, Any]]:
+    def _clause_tokens(self, query: SelectQuery, keyword: str) -> List[Token]:
+        """Tokens of a top-level clause, or an empty list if it is absent"""
+        clause = query.clause(keyword)
+        return clause.tokens if clause else []
+    
+    def _extract_select_columns(self, query: SelectQuery) -> List[SelectColumn]:
         """Extract columns from SELECT clause"""
         columns = []
         
         try:
-            # Find SELECT clause
-            select_match = re.search(r'SELECT\s+(.*?)\s+FROM', statement, re.IGNORECASE | re.DOTALL)
-            if not select_match:
+            # Columns are only extracted from queries that read from a table
+            if not query.clause('FROM'):
                 return columns
             
-            select_clause = select_match.group(1)
+            tokens = self._clause_tokens(query, 'SELECT')
             
-            # Split by commas (simple approach - could be improved)
-            column_parts = re.split(r',(?![^()]*\))', select_clause)
+            # Skip set quantifiers and row limits before the column list
+            while tokens and tokens[0].is_keyword('DISTINCT', 'ALL', 'TOP'):
+                if tokens[0].is_keyword('TOP') and len(tokens) > 1:
+                    if tokens[1].value == '(':
+                        tokens = tokens[matching_paren(tokens, 1):]
+                    else:
+                        tokens = tokens[1:]
+                tokens = tokens[1:]
             
-            for part in column_parts:
-                part = part.strip()
-                if not part:
-                    continue
-                
-                column_info = self._parse_select_column(part)
+            for part in split_top_level(tokens):
+                column_info = self._parse_select_column(query, part)
                 if column_info:
                     columns.append(column_info)
             
@@ -193,47 +264,30 @@ class SQLParser:
             logging.error(f"Column extraction error: {str(e)}")
             return columns
     
-    def _parse_select_column(self, column_expr: str) -> Dict[str, Any]:
+    def _parse_select_column(self, query: SelectQuery, tokens: List[Token]) -> SelectColumn:
         """Parse individual SELECT column expression"""
-        column_info = {
-            'original': column_expr,
-            'column': '',
-            'alias': '',
-            'is_aggregation': False,
-            'function': '',
-            'expression': column_expr
-        }
+        original = query.text_of(tokens)
+        column_info = SelectColumn(original, expression=original)
         
         try:
             # Check for alias (both AS and implicit)
-            alias_match = re.search(r'\s+(?:AS\s+)?([a-zA-Z_][a-zA-Z0-9_]*)\s*$', column_expr, re.IGNORECASE)
-            if alias_match:
-                # Check if this might be an alias (not a table.column reference)
-                potential_alias = alias_match.group(1)
-                column_part = column_expr[:alias_match.start()].strip()
-                
-                # If there's a dot or function call before the potential alias, it's likely an alias
-                if ('.' in column_part or '(' in column_part or 
-                    re.search(r'\s+AS\s+', column_expr, re.IGNORECASE)):
-                    column_info['alias'] = potential_alias
-                    column_expr = column_part
+            expression_tokens, alias = split_alias(tokens)
+            if alias:
+                column_info.alias = alias
+                column_info.expression = query.text_of(expression_tokens)
             
             # Check for aggregation functions
-            agg_match = re.search(r'(\w+)\s*\(\s*(.+?)\s*\)', column_expr)
-            if agg_match:
-                function = agg_match.group(1).upper()
+            call_index = find_function_call(expression_tokens)
+            if call_index is not None:
+                function = expression_tokens[call_index].upper
                 if function in self.aggregation_functions:
-                    column_info['is_aggregation'] = True
-                    column_info['function'] = function
-                    column_info['column'] = agg_match.group(2).strip()
-            else:
-                # Simple column reference - handle table.column format
-                clean_column = column_expr.strip()
-                if '.' in clean_column:
-                    # Extract just the column name after the dot
-                    column_info['column'] = clean_column.split('.')[-1]
-                else:
-                    column_info['column'] = clean_column
+                    close_index = matching_paren(expression_tokens, call_index + 1)
+                    column_info.is_aggregation = True
+                    column_info.function = function
+                    column_info.column = query.text_of(expression_tokens[call_index + 2:close_index]).strip()
+            elif is_column_reference(expression_tokens):
+                # Simple column reference - keep the column name after any table prefix
+                column_info.column = unquote_name(expression_tokens[-1].value)
             
             return column_info
             
@@ -241,120 +295,43 @@ class SQLParser:
             logging.error(f"Column parsing error: {str(e)}")
             return column_info
     
-    def _extract_from_tables(self, statement: str) -> List[str]:
+    def _extract_from_tables(self, table_references: List[TableReference]) -> List[str]:
         """Extract table names from FROM clause"""
-        tables = []
-        
-        try:
-            # Improved regex to better capture table names before WHERE, GROUP BY, etc.
-            from_match = re.search(r'FROM\s+(.+?)(?:\s+WHERE|\s+GROUP\s+BY|\s+ORDER\s+BY|\s+HAVING|;|$)', statement, re.IGNORECASE | re.DOTALL)
-            if from_match:
-                from_clause = from_match.group(1).strip()
-                
-                # Remove comments and extra whitespace
-                from_clause = re.sub(r'--.*', '', from_clause)
-                from_clause = ' '.join(from_clause.split())
-                
-                # Handle JOINs - split by JOIN keywords but keep the joined tables
-                join_pattern = r'\s+(?:INNER\s+|LEFT\s+(?:OUTER\s+)?|RIGHT\s+(?:OUTER\s+)?|FULL\s+(?:OUTER\s+)?)?JOIN\s+'
-                table_parts = re.split(join_pattern, from_clause, flags=re.IGNORECASE)
-                
-                for part in table_parts:
-                    part = part.strip()
-                    if not part:
-                        continue
-                    
-                    # Remove ON conditions for JOINs
-                    part = re.sub(r'\s+ON\s+.+', '', part, flags=re.IGNORECASE)
-                    
-                    # Extract table name (before any alias or additional keywords)
-                    # Handle: table_name, schema.table_name, table_name alias, table_name AS alias
-                    table_match = re.search(r'^([a-zA-Z_][a-zA-Z0-9_]*(?:\.[a-zA-Z_][a-zA-Z0-9_]*)*)', part)
-                    if table_match:
-                        table_name = table_match.group(1)
-                        # Remove schema prefix if present for DAX conversion
-                        if '.' in table_name:
-                            table_name = table_name.split('.')[-1]
-                        tables.append(table_name)
-            
-            return tables
-            
-        except Exception as e:
-            logging.error(f"Table extraction error: {str(e)}")
-            return tables
+        # Schema prefixes are already dropped for DAX conversion
+        return [reference.name for reference in table_references]
     
-    def _extract_where_clause(self, statement: str) -> str:
+    def _extract_where_clause(self, query: SelectQuery) -> str:
         """Extract WHERE clause"""
-        try:
-            where_match = re.search(r'WHERE\s+(.+?)(?:\s+GROUP\s+BY|\s+ORDER\s+BY|\s+HAVING|;|$)', statement, re.IGNORECASE | re.DOTALL)
-            if where_match:
-                return where_match.group(1).strip()
-            return ''
-        except Exception as e:
-            logging.error(f"WHERE clause extraction error: {str(e)}")
-            return ''
+        return query.text_of(self._clause_tokens(query, 'WHERE'))
     
-    def _extract_group_by(self, statement: str) -> List[str]:
+    def _extract_group_by(self, query: SelectQuery) -> List[str]:
         """Extract GROUP BY columns"""
-        try:
-            group_match = re.search(r'GROUP\s+BY\s+(.+?)(?:\s+HAVING|\s+ORDER\s+BY|;|$)', statement, re.IGNORECASE)
-            if group_match:
-                group_clause = group_match.group(1).strip()
-                return [col.strip() for col in group_clause.split(',')]
-            return []
-        except Exception as e:
-            logging.error(f"GROUP BY extraction error: {str(e)}")
-            return []
+        return [query.text_of(part) for part in split_top_level(self._clause_tokens(query, 'GROUP'))]
     
-    def _extract_having_clause(self, statement: str) -> str:
+    def _extract_having_clause(self, query: SelectQuery) -> str:
         """Extract HAVING clause"""
-        try:
-            having_match = re.search(r'HAVING\s+(.+?)(?:\s+ORDER\s+BY|;|$)', statement, re.IGNORECASE | re.DOTALL)
-            if having_match:
-                return having_match.group(1).strip()
-            return ''
-        except Exception as e:
-            logging.error(f"HAVING clause extraction error: {str(e)}")
-            return ''
+        return query.text_of(self._clause_tokens(query, 'HAVING'))
     
-    def _extract_order_by(self, statement: str) -> List[str]:
+    def _extract_order_by(self, query: SelectQuery) -> List[str]:
         """Extract ORDER BY columns"""
-        try:
-            order_match = re.search(r'ORDER\s+BY\s+(.+?)(?:;|$)', statement, re.IGNORECASE)
-            if order_match:
-                order_clause = order_match.group(1).strip()
-                return [col.strip() for col in order_clause.split(',')]
-            return []
-        except Exception as e:
-            logging.error(f"ORDER BY extraction error: {str(e)}")
-            return []
+        return [query.text_of(part) for part in split_top_level(self._clause_tokens(query, 'ORDER'))]
     
-    def _extract_joins(self, statement: str) -> List[Dict[str, str]]:
+    def _extract_joins(self, query: SelectQuery, table_references: List[TableReference]) -> List[Join]:
         """Extract JOIN information"""
-        joins = []
-        
-        try:
-            join_pattern = r'((?:INNER\s+|LEFT\s+|RIGHT\s+|FULL\s+)?JOIN)\s+([a-zA-Z_][a-zA-Z0-9_]*)\s+ON\s+(.+?)(?=\s+(?:INNER\s+|LEFT\s+|RIGHT\s+|FULL\s+)?JOIN|WHERE|GROUP|ORDER|HAVING|;|$)'
-            
-            for match in re.finditer(join_pattern, statement, re.IGNORECASE):
-                joins.append({
-                    'type': match.group(1).strip(),
-                    'table': match.group(2).strip(),
-                    'condition': match.group(3).strip()
-                })
-            
-            return joins
-            
-        except Exception as e:
-            logging.error(f"JOIN extraction error: {str(e)}")
-            return joins
+        return [
+            Join(reference.join_type, reference.name, reference.alias, query.text_of(reference.condition))
+            for reference in table_references
+            if reference.join_type
+        ]
     
-    def _has_aggregation_functions(self, statement: str) -> bool:
+    def _has_aggregation_functions(self, query: SelectQuery) -> bool:
         """Check if statement contains aggregation functions"""
-        for func in self.aggregation_functions:
-            if re.search(rf'\b{func}\s*\(', statement, re.IGNORECASE):
-                return True
-        return False
+        return contains_function_call(query.tokens, self.aggregation_functions)
+    
+    def identify_objects(self, sql_code: str) -> Dict[str, List[str]]:
+        """Identify the tables, columns, functions and aliases used in SQL code"""
+        with timed('SQLParser', 'identify_objects'):
+            return self._identify_objects(sql_code)
     
     def _identify_objects(self, sql_code: str) -> Dict[str, List[str]]:
         """Identify SQL objects (tables, columns, functions)"""
@@ -0,0 +1,43 @@
+from typing import Iterator, TextIO, Union
+import os
+from .sql_ast import StatementScanner
+
+# Characters read from the stream per step; memory stays bounded by this plus the longest statement
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+# Longest statement read from a stream; longer ones are reported and skipped
+MAX_STATEMENT_SIZE = int(os.environ.get("MAX_STATEMENT_SIZE", str(16 << 20)))
+
+
+class StatementTooLargeError(ValueError):
+    """A statement longer than the size limit, whose text was not kept"""
+
+    def __init__(self, limit: int, preview: str):
+        super().__init__(f"Statement exceeds the maximum size of {limit} characters")
+        self.limit = limit
+        self.source = preview
+
+
+def iter_sql_statements(stream: TextIO, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                        max_statement_size: int = MAX_STATEMENT_SIZE
+                        ) -> Iterator[Union[str, StatementTooLargeError]]:
+    """Yield statement texts from a SQL stream without reading it all into memory.
+
+    A statement longer than max_statement_size characters is skipped, and a
+    StatementTooLargeError carrying its first characters is yielded in its place.
+    """
+    scanner = StatementScanner()
+    while True:
+        # Reading at least as much as is buffered keeps the copying into the buffer linear
+        text = stream.read(max(chunk_size, len(scanner.buffer)))
+        final = not text
+        for start, end, _ in scanner.feed(text, final):
+            yield scanner.buffer[start:end]
+        if final:
+            break
+
+        if max_statement_size and scanner.start is not None \
+                and len(scanner.buffer) - scanner.start > max_statement_size:
+            yield StatementTooLargeError(max_statement_size, scanner.buffer[scanner.start:scanner.start + 200])
+            scanner.discard()
+        scanner.compact()
@@ -106,7 +106,8 @@ Case When [Status] = 'Active' Then [Value] Else 0 End`;
                 },
                 body: JSON.stringify({
                     source_code: sourceCode,
-                    conversion_type: conversionType
+                    conversion_type: conversionType,
+                    incremental: true
                 })
             });
 
@@ -151,7 +152,10 @@ Case When [Status] = 'Active' Then [Value] Else 0 End`;
                 },
                 body: JSON.stringify({
                     source_code: sourceCode,
-                    conversion_type: conversionType
+                    conversion_type: conversionType,
+                    // As-you-type checks only need the structural scan
+                    mode: silent ? 'quick' : 'full',
+                    incremental: true
                 })
             });
 
@@ -0,0 +1,50 @@
+import os
+import unittest
+
+# The app opens its persistent cache and job store on import; tests run without them
+os.environ['PERSISTENT_CACHE_PATH'] = ''
+os.environ['JOB_STORE_PATH'] = ''
+
+import app as app_module
+from converters.batch import convert_batch
+
+
+GOOD = {'id': 'good', 'source_code': 'SELECT a FROM t', 'conversion_type': 'sql_to_dax'}
+BAD_ITEMS = [
+    ({'id': 1, 'source_code': 123}, 'source_code must be a string'),
+    ({'id': 2, 'source_code': 'SELECT a FROM t', 'conversion_type': ['sql_to_dax']},
+     'conversion_type must be a string'),
+    ({'id': 3, 'source_code': 'SELECT a FROM t', 'include_objects': 'no'},
+     'include_objects must be true or false'),
+    ({'id': 4, 'source_code': 'SELECT a FROM t', 'conversion_type': 'cobol_to_dax'}, 'Invalid conversion type'),
+    ({'id': 5, 'source_code': '   '}, 'Please provide source code to convert'),
+    ('not an object', 'Batch item must be an object with id, source_code and conversion_type'),
+]
+
+
+class ConvertBatchTest(unittest.TestCase):
+    """Malformed items fail on their own and the rest of the batch is converted"""
+
+    def test_bad_items_among_good_ones(self):
+        items = [GOOD]
+        for item, _ in BAD_ITEMS:
+            items.extend([item, GOOD])
+        results = convert_batch(items)
+        self.assertEqual(len(results), len(items))
+        for index, (_, error) in enumerate(BAD_ITEMS):
+            self.assertEqual(results[2 * index + 1]['success'], False)
+            self.assertEqual(results[2 * index + 1]['error'], error)
+        self.assertTrue(all(result['success'] for result in results[::2]))
+
+    def test_endpoint(self):
+        items = [GOOD, {'id': 'bad', 'source_code': 123}, GOOD]
+        response = app_module.app.test_client().post('/convert/batch', json={'items': items})
+        body = response.get_json()
+        self.assertTrue(body['success'])
+        self.assertEqual([result['success'] for result in body['results']], [True, False, True])
+        self.assertEqual(body['results'][1]['error'], 'source_code must be a string')
+        self.assertEqual(body['summary'], {'total': 3, 'succeeded': 2, 'failed': 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
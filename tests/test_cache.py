@@ -0,0 +1,51 @@
+import os
+import tempfile
+import unittest
+
+from converters.cache import ConversionCache, make_cache_key
+from converters.persistent_cache import SQLiteCache
+from converters.sql_to_dax import SQLToDaxConverter
+
+
+class CacheKeyTest(unittest.TestCase):
+    """Keys ignore line endings but not whitespace, which can be part of a string literal"""
+
+    def key(self, source_code):
+        return make_cache_key(source_code, 'sql_to_dax', '1')
+
+    def test_line_endings(self):
+        self.assertEqual(self.key("SELECT a\r\nFROM t"), self.key("SELECT a\nFROM t"))
+
+    def test_trailing_space_in_string_literal(self):
+        self.assertNotEqual(self.key("SELECT 'a  \nb' AS c FROM t"), self.key("SELECT 'a\nb' AS c FROM t"))
+
+    def test_leading_lines(self):
+        self.assertNotEqual(self.key("\nSELECT (a FROM t"), self.key("SELECT (a FROM t"))
+
+
+class ConversionCacheClearTest(unittest.TestCase):
+    """clear() only empties the shared persistent store when asked to"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = SQLiteCache(os.path.join(self.directory.name, 'cache.sqlite3'))
+        self.cache = ConversionCache(store=self.store)
+        self.cache.get_result(SQLToDaxConverter(), 'SELECT a FROM b', 'sql_to_dax', 'convert',
+                              lambda: {'success': True})
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_clear_keeps_persistent_entries(self):
+        self.cache.clear()
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(len(self.store), 1)
+
+    def test_clear_persistent(self):
+        self.cache.clear(persistent=True)
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(len(self.store), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
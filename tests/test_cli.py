@@ -0,0 +1,73 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import cli
+from converters.sql_to_dax import SQLToDaxConverter
+
+
+class ConvertCommandTest(unittest.TestCase):
+    """Sources with the same name and different extensions get separate outputs; unchanged ones are skipped"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.source_dir = os.path.join(self.directory.name, 'src')
+        self.out_dir = os.path.join(self.directory.name, 'out')
+        os.makedirs(os.path.join(self.source_dir, 'reports'))
+        for name, code in (('reports/a.sql', 'SELECT SUM(x) AS total FROM t'),
+                           ('reports/a.expr', 'Sum([y])'),
+                           ('reports/b.sql', 'SELECT x FROM t')):
+            with open(os.path.join(self.source_dir, name), 'w', encoding='utf-8') as source_file:
+                source_file.write(code)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def convert(self):
+        return cli.main(['convert', self.source_dir, '--out', self.out_dir, '--workers', '1'])
+
+    def read(self, name):
+        with open(os.path.join(self.out_dir, 'reports', name), encoding='utf-8') as output_file:
+            return output_file.read()
+
+    def test_colliding_sources_keep_their_extension(self):
+        self.assertEqual(self.convert(), 0)
+        self.assertIn('SUM(t[x])', self.read('a.sql.dax'))
+        self.assertIn('SUM([y])', self.read('a.expr.dax'))
+        self.assertIn('t[x]', self.read('b.dax'))
+        self.assertFalse(os.path.exists(os.path.join(self.out_dir, 'reports', 'a.dax')))
+
+    def summary(self):
+        with open(os.path.join(self.out_dir, cli.SUMMARY_FILENAME), encoding='utf-8') as summary_file:
+            return json.load(summary_file)
+
+    def test_second_run_skips_each_source(self):
+        self.convert()
+        first = self.summary()['files']
+        self.assertEqual(self.convert(), 0)
+        summary = self.summary()
+        self.assertEqual(summary['skipped'], 3)
+        # Skipped files keep the warnings and notes of the run that converted them
+        for converted, skipped in zip(first, summary['files']):
+            self.assertEqual((skipped['warnings'], skipped['notes'], skipped['version']),
+                             (converted['warnings'], converted['notes'], converted['version']))
+
+    def test_new_converter_version_reconverts(self):
+        self.convert()
+        with mock.patch.object(SQLToDaxConverter, 'version', 'next'):
+            self.assertEqual(self.convert(), 0)
+        summary = self.summary()
+        self.assertEqual((summary['converted'], summary['skipped']), (2, 1))
+        self.assertEqual({entry['version'] for entry in summary['files'] if entry['status'] == 'converted'}, {'next'})
+
+    def test_missing_summary_reconverts(self):
+        self.convert()
+        os.remove(os.path.join(self.out_dir, cli.SUMMARY_FILENAME))
+        self.convert()
+        self.assertEqual(self.summary()['converted'], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import json
+import os
+import unittest
+import zlib
+
+from werkzeug.datastructures import Accept
+
+# The app opens its persistent cache and job store on import; tests run without them
+os.environ['PERSISTENT_CACHE_PATH'] = ''
+os.environ['JOB_STORE_PATH'] = ''
+
+import app as app_module
+import compression
+from compression import choose_encoding, compress_chunks
+
+SCRIPT = ';\n'.join(f'SELECT SUM(Amount{index}) AS total{index} FROM Sales WHERE Region = {index}'
+                    for index in range(300))
+
+
+def gunzip(data):
+    return zlib.decompressobj(wbits=31).decompress(data)
+
+
+class NegotiationTest(unittest.TestCase):
+    """The best supported encoding the client accepts is used, or none"""
+
+    def test_gzip(self):
+        self.assertEqual(choose_encoding(Accept([('gzip', 1), ('deflate', 1)])), 'gzip')
+        self.assertIsNone(choose_encoding(Accept([('deflate', 1)])))
+        self.assertIsNone(choose_encoding(Accept([('gzip', 0)])))
+
+    def test_brotli_when_installed(self):
+        expected = 'br' if compression.brotli is not None else 'gzip'
+        self.assertEqual(choose_encoding(Accept([('gzip', 1), ('br', 1)])), expected)
+        self.assertEqual(choose_encoding(Accept([('gzip', 0.5), ('br', 1)])), expected)
+        self.assertEqual(choose_encoding(Accept([('gzip', 1), ('br', 0.5)])), 'gzip')
+
+
+class CompressChunksTest(unittest.TestCase):
+    """Compressed chunks decode to the input, and each flush makes the lines so far decodable"""
+
+    def test_first_line_is_flushed(self):
+        lines = [(json.dumps({'index': index}) + '\n').encode('utf-8') for index in range(1000)]
+        output = compress_chunks(iter(lines), 'gzip', flush_bytes=4096)
+        decompressor = zlib.decompressobj(wbits=31)
+        self.assertEqual(decompressor.decompress(next(output)), lines[0])
+        decoded = lines[0] + b''.join(decompressor.decompress(chunk) for chunk in output)
+        self.assertEqual(decoded, b''.join(lines))
+
+    @unittest.skipIf(compression.brotli is None, 'brotli is not installed')
+    def test_brotli(self):
+        lines = [(json.dumps({'index': index}) + '\n').encode('utf-8') for index in range(1000)]
+        data = b''.join(compress_chunks(iter(lines), 'br', flush_bytes=4096))
+        self.assertEqual(compression.brotli.decompress(data), b''.join(lines))
+
+
+class StreamedConvertTest(unittest.TestCase):
+    """A compressed /convert stream decodes to the same NDJSON lines as the uncompressed one"""
+
+    def convert(self, accept_encoding):
+        response = app_module.app.test_client().post(
+            '/convert', json={'source_code': SCRIPT, 'conversion_type': 'sql_to_dax', 'stream': True},
+            headers={'Accept-Encoding': accept_encoding})
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        self.assertIn('Accept-Encoding', response.headers.get('Vary', ''))
+        return response
+
+    def test_gzip_matches_identity(self):
+        plain = self.convert('identity').get_data().decode('utf-8').splitlines()
+        response = self.convert('gzip')
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        compressed = gunzip(response.get_data()).decode('utf-8').splitlines()
+        self.assertEqual([json.loads(line)['index'] for line in plain], list(range(300)))
+        self.assertEqual(compressed, plain)
+
+    @unittest.skipIf(compression.brotli is None, 'brotli is not installed')
+    def test_brotli_matches_identity(self):
+        plain = self.convert('identity').get_data().decode('utf-8').splitlines()
+        response = self.convert('br')
+        self.assertEqual(response.headers['Content-Encoding'], 'br')
+        self.assertEqual(compression.brotli.decompress(response.get_data()).decode('utf-8').splitlines(), plain)
+
+    def test_br_without_brotli_is_not_compressed(self):
+        if compression.brotli is not None:
+            self.skipTest('brotli is installed')
+        response = self.convert('br')
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertEqual(response.get_data().decode('utf-8').splitlines(),
+                         self.convert('identity').get_data().decode('utf-8').splitlines())
+
+
+if __name__ == '__main__':
+    unittest.main()
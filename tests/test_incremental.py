@@ -0,0 +1,57 @@
+import unittest
+from unittest import mock
+
+from converters.cache import LRUCache
+from converters.incremental import IncrementalConverter
+from converters.spotfire_to_dax import SpotfireToDaxConverter
+from converters.sql_to_dax import SQLToDaxConverter
+
+
+class IncrementalValidateTest(unittest.TestCase):
+    """Errors in later statements report their line in the whole document"""
+
+    def test_sql_line_numbers(self):
+        incremental = IncrementalConverter(SQLToDaxConverter(), 'sql_to_dax', LRUCache())
+        result = incremental.validate("SELECT a FROM t;\n\nSELECT (b FROM t;\nSELECT c\nFROM t WHERE 'x;\n")
+        self.assertEqual(result['errors'],
+                         ["Unclosed '(' at line 3", 'Unterminated string literal starting at line 5'])
+
+    def test_spotfire_line_numbers(self):
+        incremental = IncrementalConverter(SpotfireToDaxConverter(), 'spotfire_to_dax', LRUCache())
+        result = incremental.validate('Sum([a])\n\nSum([b]\n)\n[c] + 1)')
+        self.assertEqual(result['errors'], ["Unmatched ')' at line 5"])
+
+    def test_cached_statement_moved_down(self):
+        incremental = IncrementalConverter(SQLToDaxConverter(), 'sql_to_dax', LRUCache())
+        self.assertEqual(incremental.validate('SELECT (a FROM t;')['errors'], ["Unclosed '(' at line 1"])
+        self.assertEqual(incremental.validate('SELECT b FROM t;\nSELECT (a FROM t;')['errors'],
+                         ["Unclosed '(' at line 2"])
+
+
+class IncrementalConvertTest(unittest.TestCase):
+    """Statements missing from the cache are converted once, in worker processes when there are several"""
+
+    SCRIPT = ';\n'.join(['SELECT a FROM t', 'SELECT SUM(b) AS total FROM t WHERE c > 1', 'SELECT a FROM t',
+                          'SELECT ISNULL(d, 0) AS e FROM u'] * 5)
+
+    def test_workers_match_serial(self):
+        serial = IncrementalConverter(SQLToDaxConverter(), 'sql_to_dax', LRUCache()).convert(self.SCRIPT)
+        progress = []
+        parallel = IncrementalConverter(SQLToDaxConverter(), 'sql_to_dax', LRUCache(), workers=2).convert(
+            self.SCRIPT, progress=lambda done, total: progress.append((done, total)))
+        self.assertEqual(parallel, serial)
+        self.assertEqual(progress[0], (0, 20))
+        self.assertEqual(progress[-1], (20, 20))
+
+    def test_cached_statements_are_not_reconverted(self):
+        converter = SQLToDaxConverter()
+        incremental = IncrementalConverter(converter, 'sql_to_dax', LRUCache())
+        incremental.convert(self.SCRIPT)
+        progress = []
+        with mock.patch.object(converter, 'convert', side_effect=AssertionError('reconverted')):
+            incremental.convert(self.SCRIPT, progress=lambda done, total: progress.append((done, total)))
+        self.assertEqual(progress, [(0, 20), (20, 20)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import os
+import tempfile
+import unittest
+
+from converters.cache import ConversionCache
+from converters.jobs import COMPLETED, JobQueue, SQLiteJobStore
+
+
+SOURCE = 'SELECT SUM(Amount) AS total FROM Sales;\nSELECT Region FROM Sales'
+
+
+class SharedJobStoreTest(unittest.TestCase):
+    """A job accepted by one process can be polled from another sharing the store"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'jobs.sqlite3')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def run_job(self, jobs, source_code=SOURCE):
+        job = jobs.submit(source_code, 'sql_to_dax')
+        jobs._queue.join()
+        return job
+
+    def test_status_from_other_queue(self):
+        accepting = JobQueue(workers=1, store=SQLiteJobStore(self.path))
+        polled = JobQueue(workers=1, store=SQLiteJobStore(self.path))
+        job = self.run_job(accepting)
+        status = polled.status(job.id)
+        self.assertEqual(status['status'], COMPLETED)
+        self.assertEqual(status, accepting.status(job.id))
+        self.assertIn('total = SUM(Sales[Amount])', status['result']['converted_code'])
+        self.assertIsNone(polled.status('unknown'))
+
+    def test_retention(self):
+        store = SQLiteJobStore(self.path, max_finished=2)
+        jobs = [self.run_job(JobQueue(workers=1, store=store)) for _ in range(3)]
+        self.assertIsNone(store.get(jobs[0].id))
+        self.assertEqual(store.get(jobs[2].id)['status'], COMPLETED)
+
+    def test_resubmitted_source_is_not_reconverted(self):
+        cache = ConversionCache()
+        jobs = JobQueue(workers=1, cache=cache)
+        first = self.run_job(jobs)
+        second = self.run_job(jobs, SOURCE)
+        self.assertEqual((cache.misses, cache.hits), (1, 1))
+        self.assertEqual(jobs.status(second.id)['result'], jobs.status(first.id)['result'])
+
+
+if __name__ == '__main__':
+    unittest.main()
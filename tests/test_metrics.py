@@ -0,0 +1,76 @@
+import os
+import re
+import unittest
+
+# The app opens its persistent cache and job store on import; tests run without them
+os.environ['PERSISTENT_CACHE_PATH'] = ''
+os.environ['JOB_STORE_PATH'] = ''
+
+import app as app_module
+from converters.cache import LRUCache
+from metrics import MetricsRegistry
+
+# name{labels} value, where label values may contain escaped quotes
+SAMPLE_PATTERN = re.compile(r'^[a-z_]+(?:\{(?:[a-z_]+="(?:[^"\\]|\\.)*",?)+\})? (?:-?[0-9.e+-]+|\+Inf)$')
+
+
+class RenderTest(unittest.TestCase):
+    """Metrics render in the Prometheus text format"""
+
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_label_escaping(self):
+        errors = self.registry.counter('test_errors_total', 'Errors', ['component'])
+        errors.inc('a "quoted"\\path\nnext')
+        self.assertEqual(self.registry.render().splitlines()[:3], [
+            '# HELP test_errors_total Errors',
+            '# TYPE test_errors_total counter',
+            'test_errors_total{component="a \\"quoted\\"\\\\path\\nnext"} 1'
+        ])
+
+    def test_histogram_buckets(self):
+        sizes = self.registry.histogram('test_size_bytes', 'Sizes', ['operation'], buckets=(10, 100))
+        for value in (5, 10, 50, 500):
+            sizes.observe(value, 'convert')
+        self.assertEqual(self.registry.render().splitlines()[2:7], [
+            'test_size_bytes_bucket{operation="convert",le="10.0"} 2',
+            'test_size_bytes_bucket{operation="convert",le="100.0"} 3',
+            'test_size_bytes_bucket{operation="convert",le="+Inf"} 4',
+            'test_size_bytes_sum{operation="convert"} 565.0',
+            'test_size_bytes_count{operation="convert"} 4'
+        ])
+
+    def test_cache_stats(self):
+        cache = LRUCache()
+        cache.get_or_compute('key', lambda: 1)
+        cache.get_or_compute('key', lambda: 1)
+        self.registry.register_cache('parse', cache)
+        lines = self.registry.render().splitlines()
+        self.assertIn('# TYPE sqldax_cache_entries gauge', lines)
+        for line in ('sqldax_cache_hits_total{cache="parse"} 1', 'sqldax_cache_misses_total{cache="parse"} 1',
+                     'sqldax_cache_entries{cache="parse"} 1', 'sqldax_cache_hit_ratio{cache="parse"} 0.5'):
+            self.assertIn(line, lines)
+
+
+class MetricsEndpointTest(unittest.TestCase):
+    """/metrics serves every sample line in the exposition format, including request latencies"""
+
+    def test_metrics(self):
+        client = app_module.app.test_client()
+        client.post('/convert', json={'source_code': 'SELECT SUM(a) AS t FROM x', 'conversion_type': 'sql_to_dax'})
+        response = client.get('/metrics')
+        self.assertEqual(response.mimetype, 'text/plain')
+        self.assertEqual(response.mimetype_params.get('version'), '0.0.4')
+        lines = response.get_data(as_text=True).splitlines()
+        for line in lines:
+            if not line.startswith('#'):
+                self.assertRegex(line, SAMPLE_PATTERN)
+        self.assertTrue(any(line.startswith('sqldax_request_duration_seconds_bucket{endpoint="convert_code",'
+                                            'status="200",le="+Inf"}') for line in lines))
+        self.assertTrue(any(line.startswith('sqldax_stage_duration_seconds_count{component="SQLToDaxConverter",'
+                                            'stage="parse"}') for line in lines))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+
+from parsers.nodes import (
+    CaseBranch, ConditionalExpression, Join, SelectColumn, SelectStatement, UnsupportedStatement
+)
+from parsers.sql_parser import SQLParser
+
+
+class ToDictTest(unittest.TestCase):
+    """to_dict gives plain nested dicts, leads with type and original, and leaves out unset optional fields"""
+
+    def test_select_statement(self):
+        statement = SelectStatement(
+            'SELECT SUM(s.Amount) total FROM Sales s JOIN Product p ON s.pk = p.pk',
+            select_columns=[SelectColumn('SUM(s.Amount) total', 's.Amount', 'total', True, 'SUM', 'SUM(s.Amount)')],
+            from_tables=['Sales', 'Product'],
+            has_aggregation=True,
+            joins=[Join('JOIN', 'Product', 'p', 's.pk = p.pk')],
+            table_aliases={'s': 'Sales', 'p': 'Product'}
+        )
+        result = statement.to_dict()
+        self.assertEqual(list(result)[:2], ['type', 'original'])
+        self.assertEqual(result, {
+            'type': 'SELECT',
+            'original': 'SELECT SUM(s.Amount) total FROM Sales s JOIN Product p ON s.pk = p.pk',
+            'select_columns': [{'original': 'SUM(s.Amount) total', 'column': 's.Amount', 'alias': 'total',
+                                'is_aggregation': True, 'function': 'SUM', 'expression': 'SUM(s.Amount)'}],
+            'from_tables': ['Sales', 'Product'],
+            'where_clause': '',
+            'group_by': [],
+            'having_clause': '',
+            'order_by': [],
+            'has_aggregation': True,
+            'joins': [{'type': 'JOIN', 'table': 'Product', 'alias': 'p', 'condition': 's.pk = p.pk'}],
+            'table_aliases': {'s': 'Sales', 'p': 'Product'}
+        })
+
+    def test_unset_optional_fields(self):
+        self.assertEqual(UnsupportedStatement('INSERT', 'INSERT INTO t VALUES (1)', supported=False).to_dict(),
+                         {'type': 'INSERT', 'original': 'INSERT INTO t VALUES (1)', 'supported': False})
+
+    def test_nested_case_branches(self):
+        expression = ConditionalExpression('Case When [a] > 1 Then "x" Else "y" End', condition_type='CASE',
+                                           cases=[CaseBranch('[a] > 1', '"x"')], default_value='"y"')
+        self.assertEqual(expression.to_dict(), {
+            'type': 'CONDITIONAL',
+            'original': 'Case When [a] > 1 Then "x" Else "y" End',
+            'condition_type': 'CASE',
+            'cases': [{'condition': '[a] > 1', 'value': '"x"'}],
+            'default_value': '"y"'
+        })
+
+    def test_parsed_statements(self):
+        statements = SQLParser().parse(
+            'SELECT [s].[Region] AS r FROM [dbo].[Sales] [s] WHERE s.x > 1;\nDELETE FROM t')['statements']
+        self.assertEqual([statement.to_dict()['type'] for statement in statements], ['SELECT', 'DELETE'])
+        select = statements[0].to_dict()
+        self.assertEqual((select['from_tables'], select['table_aliases'], select['where_clause']),
+                         (['Sales'], {'s': 'Sales'}, 's.x > 1'))
+        self.assertNotIn('error', select)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+
+from converters.sql_to_dax import SQLToDaxConverter
+
+
+class NullRewriterTest(unittest.TestCase):
+    """NULL rules apply inside nested parentheses and calls, but not inside string literals"""
+
+    def setUp(self):
+        self.rewriter = SQLToDaxConverter().null_rewriter
+
+    def test_nested_calls(self):
+        self.assertEqual(self.rewriter.rewrite('ISNULL(NULLIF(a, 0), ISNULL(b, 1))'),
+                         'IF(ISBLANK(IF(a = 0, BLANK(), a)), IF(ISBLANK(b), 1, b), IF(a = 0, BLANK(), a))')
+
+    def test_postfix_inside_parentheses(self):
+        self.assertEqual(self.rewriter.rewrite('((a IS NOT NULL) AND (b + 1 IS NULL))'),
+                         '((NOT(ISBLANK(a))) AND (ISBLANK(b + 1)))')
+
+    def test_string_literals(self):
+        self.assertEqual(self.rewriter.rewrite("ISNULL(a, 'ISNULL(b, c)') = 'x IS NULL'"),
+                         "IF(ISBLANK(a), 'ISNULL(b, c)', a) = 'x IS NULL'")
+
+    def test_unbalanced(self):
+        self.assertEqual(self.rewriter.rewrite('a IS NULL) OR (ISNULL(b'), 'ISBLANK(a)) OR (ISNULL(b')
+
+    def test_deep_nesting(self):
+        depth = 5000
+        self.assertEqual(self.rewriter.rewrite('(' * depth + 'a IS NULL' + ')' * depth),
+                         '(' * depth + 'ISBLANK(a)' + ')' * depth)
+        self.assertEqual(self.rewriter.rewrite('(' * depth + 'NULLIF(a, 0' + ')' * (depth + 1)),
+                         '(' * depth + 'IF(a = 0, BLANK(), a)' + ')' * depth)
+
+
+if __name__ == '__main__':
+    unittest.main()
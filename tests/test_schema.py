@@ -0,0 +1,97 @@
+import unittest
+
+from converters.schema import SchemaIndex
+from converters.spotfire_to_dax import SpotfireToDaxConverter
+from converters.sql_to_dax import SQLToDaxConverter
+
+
+SCHEMA = {
+    'tables': [
+        {'name': 'Sales', 'columns': ['Amount', 'ProductKey']},
+        {'name': 'Product', 'columns': ['ProductKey', 'Category', 'Subcategory']}
+    ],
+    'aliases': {'dbo.FactSales': 'Sales', 'dbo.DimProduct': 'Product'},
+    'relationships': [
+        {'fromTable': 'Sales', 'fromColumn': 'ProductKey', 'toTable': 'Product', 'toColumn': 'ProductKey'}
+    ]
+}
+
+
+class SchemaQualifiedAliasTest(unittest.TestCase):
+    """Aliases written with a schema prefix resolve the schema-less names the SQL parser produces"""
+
+    def setUp(self):
+        self.schema = SchemaIndex.from_dict(SCHEMA)
+        self.converter = SQLToDaxConverter(self.schema)
+
+    def test_table_name(self):
+        self.assertEqual(self.schema.table_name('dbo.FactSales'), 'Sales')
+        self.assertEqual(self.schema.table_name('FactSales'), 'Sales')
+        self.assertEqual(self.schema.table_name('[dbo].[FactSales]'), 'Sales')
+
+    def test_measure_from_qualified_table(self):
+        result = self.converter.convert('SELECT SUM(Amount) AS t FROM dbo.FactSales WHERE Amount > 5',
+                                        include_objects=False)
+        self.assertEqual(result['dax_code'], 't = CALCULATE(SUM(Sales[Amount]), KEEPFILTERS(Sales[Amount] > 5))')
+
+    def test_join_between_qualified_tables(self):
+        result = self.converter.convert(
+            'SELECT f.Amount, p.Category FROM dbo.FactSales f '
+            'INNER JOIN dbo.DimProduct p ON f.ProductKey = p.ProductKey',
+            include_objects=False)
+        self.assertEqual(result['dax_code'], 'Amount = Sales[Amount]\nCategory = RELATED(Product[Category])')
+
+
+class UnjoinedTableTest(unittest.TestCase):
+    """Columns of other tables are related to the first FROM table without a JOIN, or reported"""
+
+    def setUp(self):
+        schema = dict(SCHEMA, tables=SCHEMA['tables'] + [{'name': 'Store', 'columns': ['StoreKey', 'City']}])
+        self.converter = SQLToDaxConverter(SchemaIndex.from_dict(schema))
+
+    def convert(self, sql):
+        return self.converter.convert(sql, include_objects=False)
+
+    def test_related_without_join(self):
+        result = self.convert('SELECT SUM(Amount) AS t FROM Sales WHERE Category > Amount')
+        self.assertEqual(result['dax_code'],
+                         't = CALCULATE(SUM(Sales[Amount]), FILTER(Sales, RELATED(Product[Category]) > Sales[Amount]))')
+        self.assertEqual(result['warnings'], [])
+
+    def test_column_filter_without_join(self):
+        result = self.convert("SELECT SUM(Amount) AS t FROM Sales WHERE Category = 'Bikes'")
+        self.assertEqual(result['dax_code'], 't = CALCULATE(SUM(Sales[Amount]), KEEPFILTERS(Product[Category] = "Bikes"))')
+
+    def test_unrelated_table(self):
+        result = self.convert('SELECT Amount, City FROM Sales')
+        self.assertEqual(result['dax_code'], 'Amount = Sales[Amount]\nCity = Store[City]')
+        self.assertEqual(result['warnings'],
+                         ['Store[City] is used with Sales rows, but no relationship or JOIN connects Store to Sales'])
+
+    def test_join_column_missing_from_schema(self):
+        result = self.convert('SELECT s.Amount, t.City FROM Sales s JOIN Store t ON s.StoreKey = t.StoreKey')
+        self.assertEqual(result['dax_code'],
+                         'Amount = Sales[Amount]\nCity = LOOKUPVALUE(Store[City], Store[StoreKey], Sales[StoreKey])')
+        self.assertEqual(result['warnings'], ['JOIN column Sales[StoreKey] is not in the schema'])
+
+
+class SpotfireFilterTableTest(unittest.TestCase):
+    """WHERE conditions on columns of other model tables filter those tables"""
+
+    def setUp(self):
+        self.converter = SpotfireToDaxConverter(SchemaIndex.from_dict(SCHEMA))
+
+    def convert(self, expression):
+        return self.converter.convert(expression, include_objects=False)['dax_code']
+
+    def test_column_predicate_on_related_table(self):
+        self.assertEqual(self.convert('Sum([Amount]) WHERE [Category] = "Bikes"'),
+                         'CALCULATE(SUM(Sales[Amount]), KEEPFILTERS(Product[Category] = "Bikes"))')
+
+    def test_row_condition_iterates_its_own_table(self):
+        self.assertEqual(self.convert('Sum([Amount]) WHERE [Category] <> [Subcategory]'),
+                         'CALCULATE(SUM(Sales[Amount]), FILTER(Product, Product[Category] <> Product[Subcategory]))')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+
+from parsers.sql_ast import (
+    COMMENT, NAME, PUNCTUATION, QUOTED_NAME, STRING, WHITESPACE,
+    parse_from_clause, parse_select, split_statements, tokenize
+)
+
+
+def select(source):
+    return parse_select(split_statements(source)[0])
+
+
+def clause_texts(query):
+    return {keyword: query.text_of(clause.tokens) for keyword, clause in query.clauses.items()}
+
+
+class TokenizeTest(unittest.TestCase):
+    """Quoted identifiers, strings and comments are single tokens; comments are not significant"""
+
+    def test_quoted_identifiers_and_comments(self):
+        source = "SELECT \"Order Id\", [Unit Price] /* a; b */ AS p -- tail\nFROM `t`"
+        self.assertEqual([(token.kind, token.value) for token in tokenize(source)], [
+            (NAME, 'SELECT'), (WHITESPACE, ' '), (QUOTED_NAME, '"Order Id"'), (PUNCTUATION, ','),
+            (WHITESPACE, ' '), (QUOTED_NAME, '[Unit Price]'), (WHITESPACE, ' '), (COMMENT, '/* a; b */'),
+            (WHITESPACE, ' '), (NAME, 'AS'), (WHITESPACE, ' '), (NAME, 'p'), (WHITESPACE, ' '),
+            (COMMENT, '-- tail'), (WHITESPACE, '\n'), (NAME, 'FROM'), (WHITESPACE, ' '), (QUOTED_NAME, '`t`')
+        ])
+        self.assertEqual([token.value for token in split_statements(source)[0].tokens],
+                         ['SELECT', '"Order Id"', ',', '[Unit Price]', 'AS', 'p', 'FROM', '`t`'])
+
+    def test_string_with_doubled_quote(self):
+        tokens = tokenize("SELECT 'it''s -- not a comment' FROM t")
+        self.assertEqual([(token.kind, token.value) for token in tokens if token.kind == STRING],
+                         [(STRING, "'it''s -- not a comment'")])
+        self.assertNotIn(COMMENT, [token.kind for token in tokens])
+
+
+class ClauseTreeTest(unittest.TestCase):
+    """Only top-level keywords start clauses; subqueries stay inside the clause that holds them"""
+
+    def test_nested_subqueries(self):
+        query = select(
+            "WITH x AS (SELECT a FROM (SELECT a FROM t WHERE b IN (SELECT b FROM u)) s) "
+            "SELECT a, (SELECT MAX(b) FROM u) AS m FROM x WHERE a IN (SELECT a FROM v GROUP BY a) "
+            "ORDER BY a UNION SELECT 1"
+        )
+        self.assertEqual(query.ctes, ['x'])
+        self.assertEqual(clause_texts(query), {
+            'SELECT': 'a, (SELECT MAX(b) FROM u) AS m',
+            'FROM': 'x',
+            'WHERE': 'a IN (SELECT a FROM v GROUP BY a)',
+            'ORDER': 'a'
+        })
+
+    def test_comments_inside_clauses(self):
+        query = select("SELECT a -- FROM u\n, b /* WHERE c */ FROM t")
+        self.assertEqual(clause_texts(query), {'SELECT': 'a -- FROM u\n, b', 'FROM': 't'})
+
+
+class FromClauseTest(unittest.TestCase):
+    """Tables keep their unquoted names, aliases and join conditions"""
+
+    def tables(self, source):
+        query = select(source)
+        return [(table.name, table.qualified_name, table.alias, table.join_type, query.text_of(table.condition))
+                for table in parse_from_clause(query.clause('FROM').tokens)]
+
+    def test_tsql_bracket_names(self):
+        self.assertEqual(self.tables('SELECT a FROM [dbo].[Order Details] AS [o d] JOIN [My Table] m ON [o d].[k] = m.k'), [
+            ('Order Details', 'dbo.Order Details', 'o d', '', ''),
+            ('My Table', 'My Table', 'm', 'JOIN', '[o d].[k] = m.k')
+        ])
+
+    def test_derived_table_and_joins(self):
+        self.assertEqual(self.tables(
+            'SELECT a FROM (SELECT a FROM t JOIN u ON t.k = u.k) AS d '
+            'LEFT OUTER JOIN "c" c ON (c.x = d.a), e'
+        ), [
+            ('c', 'c', 'c', 'LEFT OUTER JOIN', '(c.x = d.a)'),
+            ('e', 'e', '', '', '')
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,29 @@
+import unittest
+
+from parsers.sql_parser import SQLParser
+
+
+class CheckStructureTest(unittest.TestCase):
+    """The quick structural check accepts the statements of T-SQL scripts"""
+
+    def setUp(self):
+        self.parser = SQLParser()
+
+    def test_tsql_statements(self):
+        script = (
+            "BEGIN TRANSACTION;\n"
+            "IF EXISTS (SELECT 1 FROM t) PRINT 'found';\n"
+            "WHILE 1 = 0 BREAK;\n"
+            "GRANT SELECT ON t TO reporting;\n"
+            "COMMIT;\n"
+            "RETURN;"
+        )
+        self.assertEqual(self.parser.check_structure(script)['errors'], [])
+
+    def test_unknown_statement_start(self):
+        self.assertEqual(self.parser.check_structure('SELCT a FROM t')['errors'],
+                         ["Unexpected 'SELCT' at the start of a statement (line 1)"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import io
+import unittest
+
+from converters.sql_to_dax import SQLToDaxConverter
+from parsers.sql_ast import split_statement_texts, split_statements
+from parsers.sql_stream import StatementTooLargeError, iter_sql_statements
+
+
+SCRIPT = (
+    "SELECT 'a;b' AS x FROM t; -- trailing; comment\n"
+    "SELECT [c;d], \"e;\"\"f\" FROM t /* ; */\n"
+    "GO\n"
+    "SELECT 'it''s' FROM t\n"
+    "  go 2\r\n"
+    "SELECT 1\n"
+    "GOTO done"
+)
+STATEMENTS = [
+    "SELECT 'a;b' AS x FROM t;",
+    "SELECT [c;d], \"e;\"\"f\" FROM t",
+    "SELECT 'it''s' FROM t",
+    "SELECT 1\nGOTO done",
+]
+
+
+class StatementSplitTest(unittest.TestCase):
+    """Statements end at semicolons and GO lines outside literals and comments"""
+
+    def test_split_statement_texts(self):
+        self.assertEqual(split_statement_texts(SCRIPT), STATEMENTS)
+
+    def test_split_statements(self):
+        self.assertEqual([statement.text for statement in split_statements(SCRIPT)], STATEMENTS)
+
+    def test_stream_matches_at_every_chunk_size(self):
+        for chunk_size in range(1, 12):
+            self.assertEqual(list(iter_sql_statements(io.StringIO(SCRIPT), chunk_size=chunk_size)),
+                             STATEMENTS, chunk_size)
+
+    def test_long_statement(self):
+        statement = 'INSERT INTO t VALUES ' + ', '.join(f"({index}, 'v;{index}')" for index in range(20000)) + ';'
+        self.assertEqual(list(iter_sql_statements(io.StringIO(statement + '\nSELECT 1;'), chunk_size=1024)),
+                         [statement, 'SELECT 1;'])
+
+
+class StatementSizeLimitTest(unittest.TestCase):
+    """Statements over the size limit are reported and skipped without keeping their text"""
+
+    def test_iter_sql_statements(self):
+        script = "SELECT 1;\nSELECT '" + 'x;' * 5000 + "';\nSELECT 2;"
+        statements = list(iter_sql_statements(io.StringIO(script), chunk_size=100, max_statement_size=1000))
+        self.assertEqual(statements[0], 'SELECT 1;')
+        self.assertIsInstance(statements[1], StatementTooLargeError)
+        self.assertTrue(statements[1].source.startswith("SELECT 'x;x;"))
+        self.assertEqual(statements[2], 'SELECT 2;')
+
+    def test_convert_stream_continues(self):
+        converter = SQLToDaxConverter()
+        converter.iter_source_chunks = lambda stream: iter_sql_statements(stream, 100, 1000)
+        script = 'SELECT a FROM t;\nSELECT ' + ', '.join(['a'] * 1000) + ' FROM t;\nSELECT b FROM t;'
+        results = list(converter.convert_stream(io.StringIO(script), include_objects=False))
+        self.assertEqual([result['success'] for result in results], [True, False, True])
+        self.assertEqual(results[1]['error'], 'Statement exceeds the maximum size of 1000 characters')
+        self.assertEqual(results[2]['dax_code'], 'b = t[b]')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+
+from converters.sql_to_dax import SQLToDaxConverter
+
+
+class WhereClauseTest(unittest.TestCase):
+    """WHERE clauses become CALCULATE filter arguments"""
+
+    def setUp(self):
+        self.converter = SQLToDaxConverter()
+
+    def convert(self, sql):
+        return self.converter.convert(sql, include_objects=False)['dax_code']
+
+    def test_columns_named_like_functions_are_qualified(self):
+        self.assertEqual(
+            self.convert("SELECT SUM(amount) AS t FROM sales WHERE region = 'West' AND year > 2020"),
+            't = CALCULATE(SUM(sales[amount]), KEEPFILTERS(sales[region] = "West"), KEEPFILTERS(sales[year] > 2020))')
+
+    def test_type_name_after_as_is_kept(self):
+        self.assertEqual(self.convert('SELECT CAST(x AS DATE) AS d FROM sales'), 'd = VALUE(sales[x] AS DATE)')
+
+    def test_date_column_next_to_type_name(self):
+        self.assertEqual(self.converter._convert_column_references('CAST(date AS time) + datetime', 'sales'),
+                         'CAST(sales[date] AS time) + sales[datetime]')
+
+    def test_many_date_columns(self):
+        # Each reference is decided without looking back over the expression
+        expression = ' + '.join(['date'] * 20000)
+        self.assertEqual(self.converter._convert_column_references(expression, 'sales'),
+                         ' + '.join(['sales[date]'] * 20000))
+
+
+if __name__ == '__main__':
+    unittest.main()